@@ -0,0 +1,438 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import struct
+import time
+import tracemalloc
+
+from ygo.card import Card
+from ygo.card_catalog import CardCatalog, CardTexts
+from ygo.catalog_file import CatalogFile, compile_catalog, load_catalog, load_texts
+from ygo.constants import *
+from ygo.duel_journal import DuelJournal, read_events, writer
+from ygo.event_bus import EventBus
+from ygo.message_reader import MessageReader
+from ygo.message_schema import DECODERS, SCHEMA
+from ygo.script_archive import ScriptArchive, pack_scripts
+from ygo.script_cache import ScriptCache
+from ygo import globals
+
+BENCHMARKS = {}
+
+def benchmark(func):
+	BENCHMARKS[func.__name__] = func
+	return func
+
+def measure(func, items):
+	start = time.perf_counter()
+	for item in items:
+		func(item)
+	return (time.perf_counter() - start) / len(items)
+
+def report(name, seconds, baseline=None):
+	s = "%-40s %12.3f us" % (name, seconds * 1000000)
+	if baseline:
+		s += " (%.1fx)" % (baseline / seconds)
+	print(s)
+
+def open_db(path):
+	db = sqlite3.connect(path)
+	db.row_factory = sqlite3.Row
+	return db
+
+class SQLCard:
+	"""The way Card used to load itself, kept for comparison."""
+
+	def __init__(self, db, code):
+		row = db.execute('select * from datas where id=?', (code,)).fetchone()
+		self.code = code
+		self.alias = row['alias']
+		self.setcode = row['setcode']
+		self.type = row['type']
+		self.level = row['level'] & 0xff
+		self.lscale = (row['level'] >> 24) & 0xff
+		self.rscale = (row['level'] >> 16) & 0xff
+		self.attack = row['atk']
+		self.defense = row['def']
+		self.race = row['race']
+		self.attribute = row['attribute']
+		self.category = row['category']
+		row = db.execute('select * from texts where id = ?', (self.code, )).fetchone()
+		self.name = row[1]
+		self.desc = row[2]
+		self.strings = []
+		for i in range(3, len(row), 1):
+			self.strings.append(row[i])
+
+	set_location = Card.set_location
+
+@benchmark
+def card(args):
+	db = open_db(args.database)
+	start = time.perf_counter()
+	globals.catalog = CardCatalog.from_db(db)
+	print("catalog with %d cards loaded in %.3f s" % (len(globals.catalog), time.perf_counter() - start))
+	codes = [random.choice(list(globals.catalog)) for i in range(args.number)]
+	sql = measure(lambda code: SQLCard(db, code), codes)
+	report("Card construction (sql)", sql)
+	report("Card construction (catalog)", measure(Card, codes), sql)
+
+@benchmark
+def texts(args):
+	globals.catalog = CardCatalog.from_db(open_db(args.database))
+	cdb = sqlite3.connect(args.localized_database)
+	store = CardTexts.from_db(cdb, globals.catalog)
+	codes = [random.choice(list(globals.catalog)) for i in range(args.number)]
+	def sql_name(code):
+		row = cdb.execute('select name from texts where id=?', (code,)).fetchone()
+		if row:
+			return row[0]
+		return globals.catalog[code].name
+	sql = measure(sql_name, codes)
+	report("localized name lookup (sql)", sql)
+	report("localized name lookup (store)", measure(store.get_name, codes), sql)
+	print("%d texts, hit rate %.1f%%, %.1f MB" % (len(store), store.hit_rate * 100, store.memory_usage() / 1048576.0))
+
+@benchmark
+def duel_creation(args):
+	# importing the duel module requires the compiled core
+	from ygo.duel import ffi, lib, load_card_data
+	globals.catalog = CardCatalog.from_db(open_db(args.database))
+	main_deck = [code for code in globals.catalog if not globals.catalog[code].type & (TYPE_XYZ | TYPE_SYNCHRO | TYPE_FUSION | TYPE_LINK)]
+	def create(deck):
+		duel = lib.create_duel(0)
+		for player in (0, 1):
+			lib.set_player_info(duel, player, 8000, 5, 1)
+			for code in deck:
+				lib.new_card(duel, code, player, player, LOCATION_DECK, 0, POS_FACEDOWN_DEFENSE)
+		lib.start_duel(duel, 0)
+		lib.end_duel(duel)
+	number = max(1, args.number // 100)
+	for size in (40, 60, 200):
+		decks = [[random.choice(main_deck) for i in range(size)] for j in range(number)]
+		lib.set_card_reader(lib.card_reader_callback)
+		callback = measure(create, decks)
+		report("%d card duel creation (callback)" % size, callback)
+		load_card_data(globals.catalog)
+		report("%d card duel creation (native)" % size, measure(create, decks), callback)
+
+@benchmark
+def duel_construction(args):
+	# importing the duel module requires the compiled core
+	from ygo.duel import Duel
+	# builds the handler registry
+	Duel().core.end()
+	number = max(1, args.number // 100)
+	tracemalloc.start()
+	start = time.perf_counter()
+	duels = [Duel() for i in range(number)]
+	seconds = (time.perf_counter() - start) / number
+	size = tracemalloc.get_traced_memory()[0] / number
+	tracemalloc.stop()
+	for duel in duels:
+		duel.core.end()
+	report("duel construction", seconds)
+	print("%-40s %12.1f bytes" % ("memory per duel", size))
+
+@benchmark
+def startup(args):
+	sources = (('en', args.database), ('de', args.localized_database))
+	compile_catalog('benchmark_cards.bin', sources)
+	def from_db(i):
+		catalog = CardCatalog.from_db(open_db(args.database))
+		CardTexts.from_db(sqlite3.connect(args.localized_database), catalog)
+	def from_file(i):
+		file = CatalogFile.open('benchmark_cards.bin', sources)
+		load_texts(file, 'de', load_catalog(file))
+	number = max(1, args.number // 1000)
+	db = measure(from_db, range(number))
+	report("catalog loading (sqlite)", db)
+	report("catalog loading (mapped file)", measure(from_file, range(number)), db)
+	os.remove('benchmark_cards.bin')
+
+@benchmark
+def scripts(args):
+	# what a cold duel start asks for: the utility scripts plus the scripts of two decks
+	names = sorted(n for n in os.listdir(args.scripts) if n.endswith('.lua'))
+	cards = [n for n in names if n.startswith('c')]
+	common = [n for n in names if not n.startswith('c')]
+	pack_scripts(args.scripts, 'benchmark_scripts.bin')
+	starts = [common + random.sample(cards, min(len(cards), 80)) for i in range(max(1, args.number // 1000))]
+	def loose(start):
+		cache = ScriptCache()
+		for n in start:
+			cache.read(os.path.join(args.scripts, n).encode('utf-8'))
+	# the archive gets opened once per server process
+	start = time.perf_counter()
+	archive = ScriptArchive('benchmark_scripts.bin')
+	print("archive with %d scripts opened in %.3f s" % (len(archive), time.perf_counter() - start))
+	def archived(start):
+		for n in start:
+			archive.read(os.path.join('script', n).encode('utf-8'))
+	files = measure(loose, starts)
+	report("cold duel start scripts (loose files)", files)
+	report("cold duel start scripts (archive)", measure(archived, starts), files)
+	os.remove('benchmark_scripts.bin')
+
+def recorded_buffers(args):
+	"""Message buffers the core returned in real duels, from a duel log or from simulated duels."""
+	events = read_events(args.journal) if args.journal else []
+	buffers = [event['data'].encode('latin1') for event in events if event['event_type'] == 'process' and 'data' in event]
+	if buffers:
+		return buffers
+	# binary journals only keep checksums, the messages have to come from the core again
+	from ygo.duel import Duel, load_card_data
+	from ygo.simulation import Simulation
+	globals.catalog = CardCatalog.from_db(open_db(args.database))
+	load_card_data(globals.catalog)
+	if events:
+		start = events[0]
+		duel = Duel(start.get('seed'))
+		duel.start_headless(start.get('decks', []), start.get('options', 0), start.get('lp', [8000, 8000]))
+		for event in events[1:]:
+			t = event['event_type']
+			if t == 'process':
+				buffers.append(duel.core.process()[1][:])
+			elif t == 'set_responsei':
+				duel.core.set_responsei(event['response'])
+			elif t == 'set_responseb':
+				duel.core.set_responseb(event['response'].encode('latin1'))
+		duel.core.end()
+		return buffers
+	main_deck = [code for code in globals.catalog if not globals.catalog[code].type & (TYPE_XYZ | TYPE_SYNCHRO | TYPE_FUSION | TYPE_LINK)]
+	rng = random.Random(0)
+	decks = [[rng.choice(main_deck) for i in range(40)] for player in (0, 1)]
+	for seed in range(10):
+		simulation = Simulation(decks, seed=seed)
+		while not simulation.done:
+			res, data = simulation.duel.core.process()
+			buffers.append(data[:])
+			simulation.feed(res, data)
+		simulation.finish()
+	return buffers
+
+@benchmark
+def events(args):
+	buffers = recorded_buffers(args)
+	def emit(bus):
+		def run(i):
+			bus.call_callbacks('move', 1234, 0x0a040100, 0x05000400, 0x40)
+			bus.call_callbacks('unheard', 1)
+		return run
+	def process(bus):
+		# what Duel.process does for debug events
+		def run(data):
+			if bus.has_subscribers('debug'):
+				bus.call_callbacks('debug', event_type='process', result=0, data=data.decode('latin1'))
+		return run
+	items = [buffers[i % len(buffers)] for i in range(args.number)]
+	for name, subscribe in (("no subscribers", False), ("one subscriber", True)):
+		bus = EventBus()
+		if subscribe:
+			bus.register_callback('move', lambda *args: None)
+			bus.register_callback('debug', lambda **kwargs: None)
+		report("two events, %s" % name, measure(emit(bus), items))
+		report("debug event, %s" % name, measure(process(bus), items))
+
+@benchmark
+def journal(args):
+	buffers = recorded_buffers(args)
+	items = [buffers[i % len(buffers)] for i in range(args.number)]
+	with open('benchmark_journal.json', 'w') as fp:
+		def legacy(data):
+			# what debug.py used to do on every process() call
+			fp.write(json.dumps({'event_type': 'process', 'result': 0, 'data': data.decode('latin1')}) + '\n')
+			fp.flush()
+		old = measure(legacy, items)
+	report("process event (json lines)", old)
+	journal = DuelJournal('benchmark_journal.bin')
+	report("process event (binary journal)", measure(lambda data: journal.process(0, data), items), old)
+	journal.close()
+	start = time.perf_counter()
+	writer.wait()
+	print("writer caught up after %.3f s" % (time.perf_counter() - start))
+	print("%-40s %12d bytes" % ("json lines size", os.path.getsize('benchmark_journal.json')))
+	print("%-40s %12d bytes" % ("binary journal size", os.path.getsize('benchmark_journal.bin')))
+	os.remove('benchmark_journal.json')
+	os.remove('benchmark_journal.bin')
+
+@benchmark
+def reactor_lag(args):
+	# needs the compiled core and twisted
+	from twisted.internet import defer, reactor, task
+	from ygo.duel import load_card_data
+	from ygo.process_pool import ProcessPool
+	from ygo.simulation import Simulation
+	globals.catalog = CardCatalog.from_db(open_db(args.database))
+	load_card_data(globals.catalog)
+	main_deck = [code for code in globals.catalog if not globals.catalog[code].type & (TYPE_XYZ | TYPE_SYNCHRO | TYPE_FUSION | TYPE_LINK)]
+	decks = [[random.choice(main_deck) for i in range(40)] for player in (0, 1)]
+	pool = ProcessPool(4)
+	interval = 0.01
+	def inline(duel):
+		# what process_duel does, once per reactor iteration
+		res, data = duel.core.process()
+		return res, data[:]
+	@defer.inlineCallbacks
+	def play(seed, process):
+		simulation = Simulation(decks, seed=seed, max_responses=2000)
+		while not simulation.done:
+			simulation.feed(*(yield process(simulation.duel)))
+		simulation.finish()
+	@defer.inlineCallbacks
+	def run():
+		duels = max(1, args.number // 200)
+		for name, process in (("inline", lambda duel: task.deferLater(reactor, 0, inline, duel)), ("process pool", pool.process)):
+			lags = []
+			last = [time.perf_counter()]
+			def tick():
+				now = time.perf_counter()
+				lags.append(now - last[0] - interval)
+				last[0] = now
+			monitor = task.LoopingCall(tick)
+			monitor.start(interval, now=False)
+			start = time.perf_counter()
+			yield defer.gatherResults([play(seed, process) for seed in range(duels)])
+			elapsed = time.perf_counter() - start
+			monitor.stop()
+			lags = sorted(lags) or [0.0]
+			print("%-40s %d duels in %.2f s, lag p50 %.2f ms, p99 %.2f ms, max %.2f ms" % ("reactor lag (%s)" % name, duels, elapsed, lags[len(lags) // 2] * 1000, lags[len(lags) * 99 // 100] * 1000, lags[-1] * 1000))
+		reactor.stop()
+	reactor.callWhenRunning(run)
+	reactor.run()
+
+@benchmark
+def messages(args):
+	buffers = recorded_buffers(args)
+	def decode(data):
+		reader = MessageReader(data)
+		count = 0
+		while reader.remaining > 0:
+			decode = DECODERS.get(reader.peek())
+			if decode is None:
+				break
+			decode(reader)
+			count += 1
+		return count
+	count = sum(map(decode, buffers))
+	print("%d buffers with %d messages, %.1f bytes per buffer" % (len(buffers), count, sum(map(len, buffers)) / len(buffers)))
+	seconds = measure(decode, buffers)
+	report("decode per buffer", seconds)
+	report("decode per message", seconds * len(buffers) / max(1, count))
+
+def encode_fields(fields, values):
+	"""Packs random values for a list of schema fields."""
+	data = b''
+	for field in fields:
+		name = field[0]
+		if len(field) == 2:
+			value = random.randrange(4) if field[1] != 'x' else None
+			values[name] = value
+			data += struct.pack('<' + field[1], *([] if value is None else [value]))
+			continue
+		count = values[field[1]] if field[1] in values else random.randrange(6)
+		if field[1] in ('B', 'H', 'I'):
+			data += struct.pack('<' + field[1], count)
+		item = field[2]
+		for i in range(count):
+			if isinstance(item, str):
+				data += struct.pack('<' + item, random.randrange(4))
+			else:
+				data += encode_fields(item[1], {})
+	return data
+
+@benchmark
+def decoders(args):
+	number = max(1, args.number // 10)
+	for msg, (name, fields) in sorted(SCHEMA.items()):
+		buffers = [bytes([msg]) + encode_fields(fields, {}) for i in range(number)]
+		decode = DECODERS[msg]
+		report("decode %s (%d)" % (name, msg), measure(lambda buffer: decode(MessageReader(buffer)), buffers))
+
+def allocated(factory, codes):
+	tracemalloc.start()
+	cards = []
+	for code in codes:
+		card = factory(code)
+		card.set_location(0x0a040100)
+		card.attack = card.attack
+		cards.append(card)
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return size / len(codes)
+
+@benchmark
+def card_memory(args):
+	db = open_db(args.database)
+	globals.catalog = CardCatalog.from_db(db)
+	codes = [random.choice(list(globals.catalog)) for i in range(args.number)]
+	sql = allocated(lambda code: SQLCard(db, code), codes)
+	card = allocated(Card, codes)
+	print("%-40s %12.1f bytes" % ("memory per card (sql)", sql))
+	print("%-40s %12.1f bytes (%.1fx)" % ("memory per card (flyweight)", card, sql / card))
+
+@benchmark
+def name_lookup(args):
+	db = open_db(args.database)
+	globals.catalog = CardCatalog.from_db(db)
+	start = time.perf_counter()
+	store = CardTexts.from_catalog(globals.catalog)
+	store.names
+	print("name index built in %.3f s" % (time.perf_counter() - start))
+	names = [globals.catalog[code].name for code in globals.catalog]
+	queries = []
+	for i in range(max(1, args.number // 10)):
+		name = random.choice(names)
+		start = random.randint(0, max(0, len(name) - 3))
+		queries.append((name[start:start + random.randint(3, 8)], random.randint(1, 3)))
+	def sql(query):
+		return tuple(row[0] for row in db.execute('select id from texts where name like ? limit ?', ('%'+query[0]+'%', query[1])))
+	mismatches = sum(1 for query in queries if sql(query) != store.names.search(*query))
+	if mismatches:
+		print("%d results differ from the sql query" % mismatches)
+	like = measure(sql, queries)
+	report("card name lookup (sql like)", like)
+	report("card name lookup (trigram index)", measure(lambda query: store.names._search(*query), queries), like)
+	report("card name lookup (cached)", measure(lambda query: store.names.search(*query), queries), like)
+
+@benchmark
+def deck_search(args):
+	db = open_db(args.database)
+	globals.catalog = CardCatalog.from_db(db)
+	store = CardTexts.from_catalog(globals.catalog)
+	store.all_names
+	all_cards = sorted(globals.catalog)
+	positions = {code: i for i, code in enumerate(all_cards)}
+	def sql_find_next(text, start, limit=None, wrapped=False):
+		sql = 'SELECT id FROM texts WHERE UPPER(name) LIKE ? and id in (%s) ORDER BY id ASC LIMIT 1'
+		if limit:
+			cards = all_cards[start:start+limit]
+		else:
+			cards = all_cards[start:]
+		row = db.execute(sql % (', '.join([str(c) for c in cards])), ('%'+text.upper()+'%', )).fetchone()
+		if row is not None:
+			return all_cards.index(row[0])
+		if wrapped:
+			return
+		return sql_find_next(text, 0, start, wrapped=True)
+	words = [globals.catalog[code].name.split()[0] for code in all_cards if globals.catalog[code].name]
+	searches = [(random.choice(words), random.randrange(len(all_cards))) for i in range(max(1, args.number // 100))]
+	sql = measure(lambda search: sql_find_next(*search), searches)
+	report("deck editor search (sql)", sql)
+	report("deck editor search (name index)", measure(lambda search: store.all_names.find_next(search[0], search[1], positions), searches), sql)
+
+def main():
+	parser = argparse.ArgumentParser(description="Run microbenchmarks against the hot paths of the server.")
+	parser.add_argument('benchmark', choices=sorted(BENCHMARKS.keys()))
+	parser.add_argument('-d', '--database', default='locale/en/cards.cdb', help="English card database to load")
+	parser.add_argument('-l', '--localized-database', default='locale/de/cards.cdb', help="Localized card database to load")
+	parser.add_argument('-s', '--scripts', default='script', help="Directory containing the lua scripts")
+	parser.add_argument('-j', '--journal', help="Duel log to take message buffers from, duels get simulated otherwise")
+	parser.add_argument('-n', '--number', type=int, default=10000, help="Number of iterations")
+	args = parser.parse_args()
+	BENCHMARKS[args.benchmark](args)
+
+if __name__ == '__main__':
+	main()
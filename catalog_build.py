@@ -0,0 +1,9 @@
+import argparse
+
+from ygo.catalog_file import CATALOG_PATH, SOURCES, compile_catalog
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Compile the card databases into a catalog file the server maps into memory.")
+	parser.add_argument('-o', '--output', default=CATALOG_PATH, help="File to write")
+	args = parser.parse_args()
+	compile_catalog(args.output, SOURCES)
@@ -6,6 +6,8 @@ ffibuilder.set_source("_duel",
 #include "card.h"
 #include "duel.h"
 #include "field.h"
+#include <cstring>
+#include <unordered_map>
 #include <vector>
 int32 is_declarable(card_data const& cd, const std::vector<uint32>& opcode);
 int32 declarable(card_data *cd, int32 size, uint32 *array) {
@@ -15,6 +17,26 @@ int32 declarable(card_data *cd, int32 size, uint32 *array) {
 	}
 	return is_declarable(*cd, v);
 }
+// static card data, filled once from the card catalog
+// so the core can read cards without calling into python
+static std::unordered_map<uint32, card_data> card_table;
+void load_card_data(card_data *cards, int32 count) {
+	card_table.clear();
+	card_table.reserve(count);
+	for (int i = 0; i < count; i++) {
+		card_table[cards[i].code] = cards[i];
+	}
+}
+uint32 native_card_reader(uint32 code, card_data *data) {
+	auto it = card_table.find(code);
+	if (it == card_table.end()) {
+		std::memset(data, 0, sizeof(card_data));
+		data->code = code;
+		return 0;
+	}
+	*data = it->second;
+	return 0;
+}
 // modified from query_card()
 uint32 query_linked_zone(ptr pduel, uint8 playerid, uint8 location, uint8 sequence) {
 	if(playerid != 0 && playerid != 1)
@@ -50,6 +72,76 @@ uint32 query_linked_zone(ptr pduel, uint8 playerid, uint8 location, uint8 sequen
 		return 0;
 	}
 }
+static inline void write32(byte*& p, uint32 value) {
+	std::memcpy(p, &value, sizeof(value));
+	p += sizeof(value);
+}
+// everything needed to render the field, for both players in a single call
+// layout per player: deck, hand, grave, removed and extra deck counts,
+// then monster and spell zones, each as number of zones followed by every zone.
+// a zone is a code of 0 if it is empty, otherwise code, location info,
+// attack, defense, level, rank, link, link marker, linked zone,
+// location info of the equip target or 0, xyz material count and codes,
+// counter count and counters
+static int32 field_snapshot_size(duel* ptduel) {
+	int32 size = 0;
+	for(int32 playerid = 0; playerid < 2; ++playerid) {
+		auto& player = ptduel->game_field->player[playerid];
+		size += 5 * 4;
+		for(auto* zones : {&player.list_mzone, &player.list_szone}) {
+			size += 4;
+			for(card* pcard : *zones) {
+				if(!pcard)
+					size += 4;
+				else
+					size += 12 * 4 + pcard->xyz_materials.size() * 4 + pcard->counters.size() * 4;
+			}
+		}
+	}
+	return size;
+}
+// returns the negated size needed instead if the snapshot doesn't fit into size bytes
+int32 query_field_snapshot(ptr pduel, byte* buf, int32 size) {
+	duel* ptduel = (duel*)pduel;
+	int32 needed = field_snapshot_size(ptduel);
+	if(needed > size)
+		return -needed;
+	byte* p = buf;
+	for(int32 playerid = 0; playerid < 2; ++playerid) {
+		auto& player = ptduel->game_field->player[playerid];
+		write32(p, player.list_main.size());
+		write32(p, player.list_hand.size());
+		write32(p, player.list_grave.size());
+		write32(p, player.list_remove.size());
+		write32(p, player.list_extra.size());
+		for(auto* zones : {&player.list_mzone, &player.list_szone}) {
+			write32(p, zones->size());
+			for(card* pcard : *zones) {
+				if(!pcard) {
+					write32(p, 0);
+					continue;
+				}
+				write32(p, pcard->data.code);
+				write32(p, pcard->get_info_location());
+				write32(p, pcard->get_attack());
+				write32(p, pcard->get_defense());
+				write32(p, pcard->get_level());
+				write32(p, pcard->get_rank());
+				write32(p, pcard->get_link());
+				write32(p, pcard->get_link_marker());
+				write32(p, pcard->get_linked_zone());
+				write32(p, pcard->equiping_target ? pcard->equiping_target->get_info_location() : 0);
+				write32(p, pcard->xyz_materials.size());
+				for(card* material : pcard->xyz_materials)
+					write32(p, material->data.code);
+				write32(p, pcard->counters.size());
+				for(auto& cmit : pcard->counters)
+					write32(p, cmit.first + ((cmit.second[0] + cmit.second[1]) << 16));
+			}
+		}
+	}
+	return p - buf;
+}
 """,
 libraries = ['ygo'],
 library_dirs=['.'],
@@ -105,7 +197,10 @@ int32 query_card(ptr pduel, uint8 playerid, uint8 location, uint8 sequence, int3
 int32 query_field_count(ptr pduel, uint8 playerid, uint8 location);
 int32 query_field_card(ptr pduel, uint8 playerid, uint8 location, int32 query_flag, byte* buf, int32 use_cache);
 uint32 query_linked_zone(ptr pduel, uint8 playerid, uint8 location, uint8 sequence);
+int32 query_field_snapshot(ptr pduel, byte* buf, int32 size);
 int32 declarable(struct card_data *cd, int32 size, uint32 *array);
+void load_card_data(struct card_data *cards, int32 count);
+uint32 native_card_reader(uint32 code, struct card_data *data);
 """)
 
 if __name__ == "__main__":
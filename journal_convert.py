@@ -0,0 +1,20 @@
+import argparse
+import json
+
+from ygo.duel_journal import MAGIC, read_events, write_journal
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Convert duel logs between binary journals and json lines. Binary journals keep only a checksum of the messages of every process call.")
+	parser.add_argument('input', help="Duel log to read, either format")
+	parser.add_argument('output', help="File to write, in the other format")
+	parser.add_argument('--no-checksums', action='store_true', help="Leave message checksums out of binary journals")
+	args = parser.parse_args()
+	with open(args.input, 'rb') as fp:
+		binary = fp.read(len(MAGIC)) == MAGIC
+	events = read_events(args.input)
+	if binary:
+		with open(args.output, 'w') as fp:
+			for event in events:
+				fp.write(json.dumps(event) + '\n')
+	else:
+		write_journal(args.output, events, not args.no_checksums)
@@ -0,0 +1,10 @@
+import argparse
+
+from ygo.script_archive import ARCHIVE_PATH, pack_scripts
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Pack the lua scripts into an archive the server can serve them from.")
+	parser.add_argument('-d', '--directory', default='script', help="Directory containing the scripts")
+	parser.add_argument('-o', '--output', default=ARCHIVE_PATH, help="File to write")
+	args = parser.parse_args()
+	print("packed %d scripts" % pack_scripts(args.directory, args.output))
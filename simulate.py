@@ -0,0 +1,58 @@
+import argparse
+import collections
+import json
+import time
+
+from ygo.simulation import run_batch
+
+def load_deck(path):
+	"""Decks are read in the format they are stored in the database, or as a plain list of codes."""
+	with open(path) as fp:
+		deck = json.load(fp)
+	if isinstance(deck, dict):
+		deck = deck['cards']
+	return deck
+
+def main():
+	parser = argparse.ArgumentParser(description="Play seeded duels between two decks with random responses, without any players.")
+	parser.add_argument('deck1', help="Deck of player 0, json")
+	parser.add_argument('deck2', help="Deck of player 1, json")
+	parser.add_argument('-n', '--number', type=int, default=1000, help="Number of duels")
+	parser.add_argument('-s', '--seed', type=int, default=0, help="Seed of the first duel, the others count up from there")
+	parser.add_argument('-p', '--processes', type=int, help="Number of worker processes, one per core by default")
+	parser.add_argument('-d', '--database', default='locale/en/cards.cdb', help="Card database to use without a compiled catalog")
+	parser.add_argument('-v', '--verbose', action='store_true', help="Print every duel")
+	args = parser.parse_args()
+	decks = [load_deck(args.deck1), load_deck(args.deck2)]
+	outcomes = collections.Counter()
+	messages = collections.Counter()
+	turns = responses = 0
+	errors = []
+	begin = time.perf_counter()
+	for result in run_batch(decks, range(args.seed, args.seed + args.number), args.processes, args.database):
+		if result.error:
+			errors.append(result)
+			outcomes['error'] += 1
+		elif result.winner is None:
+			# the core ended the duel without announcing a winner
+			outcomes['unfinished'] += 1
+		elif result.winner == 2:
+			outcomes['draw'] += 1
+		else:
+			outcomes['player %d' % result.winner] += 1
+		messages.update(result.messages)
+		turns += result.turns
+		responses += result.responses
+		if args.verbose:
+			print("seed %d: winner %r, reason %r, %d turns, %d responses, %.3f s%s" % (result.seed, result.winner, result.reason, result.turns, result.responses, result.elapsed, ", " + result.error if result.error else ""))
+	elapsed = time.perf_counter() - begin
+	print("%d duels in %.1f s, %.1f duels/s" % (args.number, elapsed, args.number / elapsed))
+	for outcome, count in sorted(outcomes.items()):
+		print("%s: %d" % (outcome, count))
+	print("%.1f turns and %.1f responses per duel" % (turns / args.number, responses / args.number))
+	print("most frequent messages: %s" % ", ".join("%d (%d)" % item for item in messages.most_common(10)))
+	for result in errors:
+		print("seed %d failed: %s" % (result.seed, result.error))
+
+if __name__ == '__main__':
+	main()
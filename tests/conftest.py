@@ -0,0 +1,26 @@
+import os.path
+import random
+import sqlite3
+
+import pytest
+
+from ygo.card_catalog import CardCatalog
+from ygo.constants import TYPE_FUSION, TYPE_LINK, TYPE_SYNCHRO, TYPE_XYZ
+from ygo import globals
+
+DATABASE = 'locale/en/cards.cdb'
+
+@pytest.fixture(scope='session')
+def catalog():
+	"""The card catalog, for tests running the core."""
+	if not os.path.exists(DATABASE):
+		pytest.skip("%s is missing" % DATABASE)
+	globals.catalog = CardCatalog.from_db(sqlite3.connect(DATABASE))
+	return globals.catalog
+
+@pytest.fixture
+def decks(catalog):
+	"""Two decks of 40 random main deck cards, the same ones every time."""
+	rng = random.Random(0)
+	main = sorted(code for code in catalog if not catalog[code].type & (TYPE_XYZ | TYPE_SYNCHRO | TYPE_FUSION | TYPE_LINK))
+	return [[rng.choice(main) for i in range(40)] for player in (0, 1)]
@@ -0,0 +1,41 @@
+from ygo.card_catalog import CardCatalog, CardData, CardText, CardTexts
+
+def make_catalog(names):
+	return CardCatalog({code: CardData(code, 0, 0, 0x21, 4, 0, 0, 1000, 1000, 1, 1, 0, name, '', ()) for code, name in names.items()})
+
+def test_texts_follow_a_new_catalog():
+	old = make_catalog({10: 'Dark Magician', 20: 'Blue-Eyes White Dragon'})
+	new = make_catalog({10: 'Dark Magician', 20: 'Blue-Eyes White Dragon', 30: 'Dark Magician Girl'})
+	en = CardTexts.from_catalog(old)
+	de = CardTexts({10: CardText('Dunkler Magier', '', ())}, old)
+	assert en.names.search('dark', 10) == (10,)
+	assert de.all_names.search('dark', 10) == ()
+	for texts in (en, de):
+		texts.use_catalog(new)
+	assert en.names.search('dark', 10) == (10, 30)
+	assert de.all_names.search('dark', 10) == (30,)
+	assert de.all_names.search('magier', 10) == (10,)
+	assert de.get_name(30) == 'Dark Magician Girl'
+
+def test_find_positions_by_code():
+	catalog = make_catalog({10: 'Dark Magician', 20: 'Blue-Eyes White Dragon', 30: 'Dark Magician Girl'})
+	texts = CardTexts.from_catalog(catalog)
+	# the deck editor lists a card the texts don't know about
+	all_cards = [5, 10, 20, 30]
+	positions = {code: i for i, code in enumerate(all_cards)}
+	assert texts.all_names.find_next('dark', 0, positions) == 1
+	assert texts.all_names.find_next('dark', 2, positions) == 3
+	assert texts.all_names.find_next('dark', 4, positions) == 1
+	assert texts.all_names.find_prev('dark', 2, positions) == 1
+	assert texts.all_names.find_prev('dark', 0, positions) == 3
+	assert texts.all_names.find_next('exodia', 0, positions) is None
+
+def test_wildcards_like_sql():
+	catalog = make_catalog({10: 'Dark Magician', 20: 'Blue-Eyes White Dragon', 30: 'Dark Magician Girl', 40: '100% Dark'})
+	names = CardTexts.from_catalog(catalog).names
+	assert names.search('dark%girl', 10) == (30,)
+	assert names.search('d_rk', 10) == (10, 30, 40)
+	assert names.search('blue_eyes', 10) == (20,)
+	assert names.search('%', 10) == (10, 20, 30, 40)
+	assert names.search('ma_ician g', 10) == (30,)
+	assert names.search('magician', 1) == (10,)
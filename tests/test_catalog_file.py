@@ -0,0 +1,62 @@
+import os
+import sqlite3
+
+import pytest
+
+from ygo.catalog_file import CatalogFile, StaleCatalogError, compile_catalog, load_catalog, load_texts
+
+def make_db(path, cards):
+	db = sqlite3.connect(str(path))
+	db.execute('create table datas (id integer primary key, ot integer, alias integer, setcode integer, type integer, atk integer, def integer, level integer, race integer, attribute integer, category integer)')
+	db.execute('create table texts (id integer primary key, name text, desc text, %s)' % ', '.join('str%d text' % i for i in range(1, 17)))
+	for code, name in cards.items():
+		db.execute('insert into datas values (?, 0, 0, 0, 33, 1000, 1000, 4, 1, 1, 0)', (code,))
+		db.execute('insert into texts (id, name, desc) values (?, ?, ?)', (code, name, ''))
+	db.commit()
+	db.close()
+	return str(path)
+
+@pytest.fixture
+def sources(tmp_path):
+	en = make_db(tmp_path / 'en.cdb', {10: 'Dark Magician', 20: 'Blue-Eyes White Dragon'})
+	de = make_db(tmp_path / 'de.cdb', {10: 'Dunkler Magier', 30: 'Nur auf Deutsch'})
+	return (('en', en), ('de', de))
+
+def test_cards_of_all_databases(tmp_path, sources):
+	path = str(tmp_path / 'cards.bin')
+	compile_catalog(path, sources)
+	file = CatalogFile.open(path, sources)
+	catalog = load_catalog(file)
+	assert list(catalog) == [10, 20, 30]
+	assert catalog[10].name == 'Dark Magician'
+	assert catalog[30].name == 'Nur auf Deutsch'
+	assert 40 not in catalog
+	assert catalog.classify(30) and not catalog.classify(40)
+	de = load_texts(file, 'de', catalog)
+	assert len(de) == 2
+	assert list(de.all_names.codes) == [10, 20, 30]
+	assert de.get_name(10) == 'Dunkler Magier'
+	assert de.get_name(20) == 'Blue-Eyes White Dragon'
+
+def test_stale_catalog(tmp_path, sources):
+	path = str(tmp_path / 'cards.bin')
+	compile_catalog(path, sources)
+	# touched, but the same contents
+	os.utime(sources[0][1], ns=(0, 0))
+	CatalogFile.open(path, sources)
+	db = sqlite3.connect(sources[1][1])
+	db.execute("update texts set name = 'Schwarzer Magier' where id = 10")
+	db.commit()
+	db.close()
+	with pytest.raises(StaleCatalogError):
+		CatalogFile.open(path, sources)
+
+def test_records_skip_the_texts(tmp_path, sources):
+	path = str(tmp_path / 'cards.bin')
+	compile_catalog(path, sources)
+	catalog = load_catalog(CatalogFile.open(path, sources))
+	records = list(catalog.records())
+	assert not catalog._cards._cache
+	# everything but name, desc and strings
+	assert [record[:12] for record in records] == [catalog[code][:12] for code in (10, 20, 30)]
+	assert records[0].level == 4 and records[0].lscale == records[0].rscale == 0
@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip('_duel')
+pytest.importorskip('twisted')
+
+from ygo.constants import LOCATION_MZONE, LOCATION_SZONE
+from ygo.field_state import LOCATIONS, MONSTER_ZONES, QUERY_FLAGS, FieldState, field_state
+from ygo.simulation import Simulation
+
+def test_field_state_answers_like_the_core(decks):
+	simulation = Simulation(decks, seed=5)
+	core = simulation.duel.core
+	while not simulation.done:
+		simulation.feed(*core.process())
+		if core.ended:
+			break
+		state = FieldState(field_state(core))
+		assert state.snapshot == core.query_field_snapshot()[:]
+		for player in (0, 1):
+			for location in LOCATIONS:
+				data = core.query_field_card(player, location, QUERY_FLAGS, False)[:]
+				assert state.query_field_card(player, location) == data
+			for location, zones in ((LOCATION_MZONE, MONSTER_ZONES), (LOCATION_SZONE, 8)):
+				for sequence in range(zones):
+					assert state.query_card(player, location, sequence) == core.query_card(player, location, sequence, QUERY_FLAGS, False)[:]
+					assert state.query_linked_zone(player, location, sequence) == core.query_linked_zone(player, location, sequence)
+	simulation.finish()
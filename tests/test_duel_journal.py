@@ -0,0 +1,29 @@
+import zlib
+
+import pytest
+
+from ygo.duel_journal import read_journal, write_journal
+
+START = {'event_type': 'start', 'players': ['a', 'b'], 'decks': [[10, 20], [30]], 'seed': 7, 'options': 0, 'lp': [8000, 8000]}
+
+def test_roundtrip(tmp_path):
+	path = str(tmp_path / 'duel.bin')
+	events = [
+		START,
+		{'event_type': 'process', 'result': 0, 'data': '\x28\x00'},
+		{'event_type': 'set_responsei', 'response': 3},
+		{'event_type': 'set_responseb', 'response': '\x01\x02'},
+	]
+	write_journal(path, events)
+	read = list(read_journal(path))
+	assert read[0] == START
+	# the messages themselves are reduced to their checksum
+	assert read[1] == {'event_type': 'process', 'result': 0, 'checksum': zlib.crc32(b'\x28\x00')}
+	assert read[2:] == events[2:]
+
+def test_start_comes_first(tmp_path):
+	path = str(tmp_path / 'duel.bin')
+	with pytest.raises(ValueError):
+		write_journal(path, [{'event_type': 'process', 'result': 0}, START])
+	with pytest.raises(ValueError):
+		write_journal(path, [])
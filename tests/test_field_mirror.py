@@ -0,0 +1,88 @@
+import struct
+
+from ygo.constants import *
+from ygo.field_mirror import LOCATIONS, FieldMirror
+from ygo.message_reader import MessageReader
+from ygo.message_schema import DECODERS
+
+def decode(fmt, msg, *values):
+	return DECODERS[msg](MessageReader(struct.pack('<B' + fmt, msg, *values)))
+
+def info(player, location, sequence, position):
+	return player | location << 8 | sequence << 16 | position << 24
+
+class Core:
+	"""The contents of every location, as (code, location info) like query_location returns them."""
+
+	def __init__(self):
+		self.locations = {(player, location): [] for player in (0, 1) for location in LOCATIONS}
+		for player in (0, 1):
+			self.locations[player, LOCATION_DECK] = [(100 + player * 10 + i, info(player, LOCATION_DECK, i, POS_FACEDOWN_DEFENSE)) for i in range(5)]
+		self.locations[0, LOCATION_EXTRA] = [(200, info(0, LOCATION_EXTRA, 0, POS_FACEDOWN_DEFENSE)), (201, info(0, LOCATION_EXTRA, 1, POS_FACEDOWN_DEFENSE))]
+
+	def query(self, player, location):
+		return list(self.locations[player, location])
+
+def setup():
+	core = Core()
+	mirror = FieldMirror(core.query)
+	mirror.sync()
+	return core, mirror
+
+def test_draw():
+	core, mirror = setup()
+	mirror.apply(decode('BB2I', 90, 0, 2, 104, 103 | 0x80000000))
+	assert not mirror.stale
+	assert mirror.locations[0, LOCATION_DECK] == [(code, POS_FACEDOWN_DEFENSE) for code in (100, 101, 102)]
+	assert mirror.locations[0, LOCATION_HAND] == [(104, POS_FACEDOWN), (103, POS_FACEUP)]
+	del core.locations[0, LOCATION_DECK][3:]
+	core.locations[0, LOCATION_HAND] = [(104, info(0, LOCATION_HAND, 0, POS_FACEDOWN)), (103, info(0, LOCATION_HAND, 1, POS_FACEUP))]
+	assert mirror.differences() == []
+
+def test_draw_from_an_empty_deck():
+	core, mirror = setup()
+	mirror.apply(decode('BB6I', 90, 1, 6, *range(110, 116)))
+	assert mirror.stale
+
+def test_move():
+	core, mirror = setup()
+	mirror.apply(decode('BB1I', 90, 0, 1, 104))
+	mirror.apply(decode('IIII', 50, 104, info(0, LOCATION_HAND, 0, POS_FACEDOWN), info(0, LOCATION_MZONE, 2, POS_FACEUP_ATTACK), 0))
+	assert mirror.locations[0, LOCATION_HAND] == []
+	assert mirror.locations[0, LOCATION_MZONE] == {2: (104, POS_FACEUP_ATTACK)}
+	mirror.apply(decode('IIII', 50, 104, info(0, LOCATION_MZONE, 2, POS_FACEUP_ATTACK), info(1, LOCATION_GRAVE, 0, POS_FACEUP), 0))
+	assert mirror.locations[0, LOCATION_MZONE] == {}
+	assert mirror.locations[1, LOCATION_GRAVE] == [(104, POS_FACEUP)]
+	assert not mirror.stale
+
+def test_move_from_an_empty_zone():
+	core, mirror = setup()
+	mirror.apply(decode('IIII', 50, 104, info(0, LOCATION_MZONE, 2, POS_FACEUP_ATTACK), info(0, LOCATION_GRAVE, 0, POS_FACEUP), 0))
+	assert mirror.stale
+
+def test_shuffle_pile():
+	core, mirror = setup()
+	mirror.apply(decode('BB2I', 39, 0, 2, 201, 200))
+	assert mirror.locations[0, LOCATION_EXTRA] == [(201, POS_FACEDOWN_DEFENSE), (200, POS_FACEDOWN_DEFENSE)]
+	assert not mirror.stale
+	# a card the mirror doesn't know about
+	mirror.apply(decode('BB2I', 39, 0, 2, 201, 202))
+	assert mirror.stale
+
+def test_swap():
+	core, mirror = setup()
+	mirror.locations[0, LOCATION_MZONE][0] = (100, POS_FACEUP_ATTACK)
+	mirror.locations[1, LOCATION_MZONE][1] = (110, POS_FACEUP_DEFENSE)
+	mirror.apply(decode('IIII', 55, 100, info(1, LOCATION_MZONE, 1, POS_FACEUP_ATTACK), 110, info(0, LOCATION_MZONE, 0, POS_FACEUP_DEFENSE)))
+	assert mirror.locations[0, LOCATION_MZONE] == {0: (110, POS_FACEUP_DEFENSE)}
+	assert mirror.locations[1, LOCATION_MZONE] == {1: (100, POS_FACEUP_ATTACK)}
+	assert not mirror.stale
+
+def test_unfollowed_messages():
+	core, mirror = setup()
+	# a hint leaves everything in place
+	mirror.apply(decode('BBI', 2, 1, 0, 0))
+	assert not mirror.stale
+	# reversing the deck isn't followed, so the mirror has to read the field again
+	mirror.apply(decode('', 37))
+	assert mirror.stale
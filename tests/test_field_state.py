@@ -0,0 +1,90 @@
+import struct
+
+from ygo.constants import *
+from ygo.field_state import EMPTY_RECORD, LOCATIONS, MONSTER_ZONES, QUERY_FLAGS, SECTION, FieldState, field_state
+
+def record(*values):
+	"""A query record like the core writes it, prefixed with its own length."""
+	return struct.pack('<I%dI' % len(values), 4 + 4 * len(values), *values)
+
+class Core:
+	"""Query answers like LocalCore gives them, as long as the duel didn't end."""
+
+	def __init__(self):
+		self.snapshot = b'snapshot'
+		self.locations = {(player, location): b'' for player in (0, 1) for location in LOCATIONS}
+		self.locations[0, LOCATION_MZONE] = record(QUERY_CODE, 100) + EMPTY_RECORD + record(QUERY_CODE | QUERY_ATTACK, 101, 1800)
+		self.locations[1, LOCATION_HAND] = record(QUERY_CODE, 110) + record(QUERY_CODE, 111)
+		self.linked_zones = {(0, 2): 0x21, (1, 6): 0x40}
+
+	def query_field_snapshot(self):
+		return self.snapshot
+
+	def query_field_card(self, player, location, flags, use_cache):
+		assert flags == QUERY_FLAGS and not use_cache
+		return self.locations[player, location]
+
+	def query_linked_zone(self, player, location, sequence):
+		assert location == LOCATION_MZONE
+		return self.linked_zones.get((player, sequence), 0)
+
+class EndedCore(Core):
+	"""A core whose duel ended, every query comes back empty."""
+
+	def query_field_snapshot(self):
+		return b''
+
+	def query_field_card(self, player, location, flags, use_cache):
+		return b''
+
+	def query_linked_zone(self, player, location, sequence):
+		return 0
+
+def test_sections():
+	core = Core()
+	data = field_state(core)
+	pos = 0
+	sections = []
+	while pos < len(data):
+		length = SECTION.unpack_from(data, pos)[0]
+		sections.append(data[pos + SECTION.size:pos + SECTION.size + length])
+		pos += SECTION.size + length
+	assert pos == len(data)
+	# the snapshot, every location of both players, the linked zones
+	assert len(sections) == 2 + 2 * len(LOCATIONS)
+	assert sections[0] == b'snapshot'
+	assert sections[1 + LOCATIONS.index(LOCATION_HAND) + len(LOCATIONS)] == core.locations[1, LOCATION_HAND]
+	assert len(sections[-1]) == 2 * MONSTER_ZONES * 4
+
+def test_answers_like_the_core():
+	core = Core()
+	state = FieldState(field_state(core))
+	assert state.snapshot == core.snapshot
+	for player, location in core.locations:
+		assert state.query_field_card(player, location) == core.locations[player, location]
+	assert state.query_card(0, LOCATION_MZONE, 0) == record(QUERY_CODE, 100)
+	assert state.query_card(0, LOCATION_MZONE, 1) == EMPTY_RECORD
+	assert state.query_card(0, LOCATION_MZONE, 2) == record(QUERY_CODE | QUERY_ATTACK, 101, 1800)
+	assert state.query_card(1, LOCATION_HAND, 1) == record(QUERY_CODE, 111)
+	# past the last card or in a location without any
+	assert state.query_card(0, LOCATION_MZONE, 3) == EMPTY_RECORD
+	assert state.query_card(1, LOCATION_GRAVE, 0) == EMPTY_RECORD
+	for player in (0, 1):
+		for sequence in range(MONSTER_ZONES):
+			assert state.query_linked_zone(player, LOCATION_MZONE, sequence) == core.linked_zones.get((player, sequence), 0)
+	assert state.query_linked_zone(0, LOCATION_SZONE, 2) == 0
+	assert state.query_linked_zone(0, LOCATION_MZONE, MONSTER_ZONES) == 0
+
+def test_before_the_first_reply():
+	state = FieldState()
+	assert state.snapshot == b''
+	assert state.query_field_card(0, LOCATION_HAND) == b''
+	assert state.query_card(0, LOCATION_MZONE, 0) == EMPTY_RECORD
+	assert state.query_linked_zone(1, LOCATION_MZONE, 0) == 0
+
+def test_ended_core():
+	state = FieldState(field_state(EndedCore()))
+	assert state.snapshot == b''
+	assert state.query_field_card(1, LOCATION_DECK) == b''
+	assert state.query_card(0, LOCATION_MZONE, 0) == EMPTY_RECORD
+	assert state.linked_zones == (0,) * (2 * MONSTER_ZONES)
@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+pytest.importorskip('_duel')
+pytest.importorskip('twisted')
+
+from ygo.process_pool import process_core
+from ygo.simulation import Simulation
+
+def run_in_thread(duel, results, count=200):
+	def run():
+		for i in range(count):
+			results.append(process_core(duel))
+	thread = threading.Thread(target=run)
+	thread.start()
+	return thread
+
+def test_responses_while_processing(decks):
+	simulation = Simulation(decks, seed=1)
+	duel = simulation.duel
+	results = []
+	thread = run_in_thread(duel, results)
+	# nonsense, but the core must never see both at once
+	for i in range(200):
+		duel.core.set_responsei(-1)
+		duel.core.set_responseb(bytes([0]))
+	thread.join()
+	assert all(result is not None for result in results)
+	simulation.finish()
+
+def test_end_while_processing(decks):
+	for seed in range(20):
+		simulation = Simulation(decks, seed=seed)
+		duel = simulation.duel
+		results = []
+		thread = run_in_thread(duel, results)
+		duel.core.end()
+		thread.join()
+		assert duel.core.ended
+		# an ended core is never touched again
+		assert process_core(duel) is None
+		if None in results:
+			assert all(result is None for result in results[results.index(None):])
+		duel.core.set_responsei(-1)
+		simulation.finish()
@@ -0,0 +1,19 @@
+import os
+
+from ygo.script_cache import ScriptCache
+
+def test_check_mtime(tmp_path):
+	path = str(tmp_path / 'c10.lua').encode('utf-8')
+	with open(path, 'wb') as fp:
+		fp.write(b'old')
+	cached = ScriptCache()
+	checked = ScriptCache(check_mtime=True)
+	for cache in (cached, checked):
+		assert cache.read(path) == b'old'
+	with open(path, 'wb') as fp:
+		fp.write(b'new')
+	os.utime(path, (0, 1))
+	assert cached.read(path) == b'old'
+	assert checked.read(path) == b'new'
+	assert (cached.hits, cached.misses) == (1, 1)
+	assert (checked.hits, checked.misses) == (0, 2)
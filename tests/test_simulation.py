@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip('_duel')
+pytest.importorskip('twisted')
+
+from ygo.process_pool import ProcessRunner
+from ygo.simulation import Simulation, run_batch, simulate
+
+def outcome(result):
+	return (result.seed, result.winner, result.reason, result.turns, result.steps, result.responses, result.error)
+
+def test_seeded_duel(decks):
+	result = simulate(decks, seed=3)
+	assert result.error is None
+	assert result.winner is not None
+	assert result.turns > 0
+	assert outcome(simulate(decks, seed=3)) == outcome(result)
+
+def test_batch_matches_single_duel(decks):
+	results = list(run_batch(decks, [3], processes=1))
+	assert [outcome(result) for result in results] == [outcome(simulate(decks, seed=3))]
+
+def test_process_runner(decks):
+	simulation = Simulation(decks, seed=3)
+	runner = ProcessRunner()
+	while not simulation.done:
+		results = []
+		runner.process(simulation.duel).addCallback(results.append)
+		# the runner calls the core right away
+		simulation.feed(*results[0])
+	assert outcome(simulation.finish()) == outcome(simulate(decks, seed=3))
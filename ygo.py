@@ -2,21 +2,45 @@ import argparse
 import os.path
 import sqlite3
 
+from ygo.card_catalog import CardCatalog, CardTexts
+from ygo.core_shards import ShardManager
+from ygo.catalog_file import CATALOG_PATH, CatalogFile, StaleCatalogError, load_catalog, load_texts
+from ygo.duel import script_cache, use_script_archive
 from ygo import globals
 from ygo import i18n
 from ygo.parsers.login_parser import LoginParser
+from ygo.process_pool import ProcessPool
+from ygo.scheduler import scheduler
 from ygo.server import Server
 from ygo.utils import parse_lflist
 from ygo.websockets import start_websocket_server
 
 def main():
 	server = Server(port = 4000, default_parser = LoginParser)
+	catalog_file = None
+	if os.path.exists(CATALOG_PATH):
+		try:
+			catalog_file = CatalogFile.open(CATALOG_PATH)
+		except (StaleCatalogError, ValueError) as e:
+			print("%s, reading the card databases instead." % e)
+	if catalog_file:
+		server.set_catalog(load_catalog(catalog_file))
+	else:
+		server.set_catalog(CardCatalog.from_db(server.db))
 	if os.path.exists('locale/de/cards.cdb'):
 		globals.german_db = sqlite3.connect('locale/de/cards.cdb')
 	if os.path.exists('locale/ja/cards.cdb'):
 		globals.japanese_db = sqlite3.connect('locale/ja/cards.cdb')
 	if os.path.exists('locale/es/cards.cdb'):
 		globals.spanish_db = sqlite3.connect('locale/es/cards.cdb')
+	globals.card_texts['en'] = CardTexts.from_catalog(globals.catalog)
+	if catalog_file:
+		for lang in ('de', 'ja', 'es'):
+			globals.card_texts[lang] = load_texts(catalog_file, lang, globals.catalog)
+	else:
+		globals.card_texts['de'] = CardTexts.from_db(globals.german_db, globals.catalog)
+		globals.card_texts['ja'] = CardTexts.from_db(globals.japanese_db, globals.catalog)
+		globals.card_texts['es'] = CardTexts.from_db(globals.spanish_db, globals.catalog)
 	for i in ('en', 'de', 'ja', 'es'):
 		globals.strings[i] = i18n.parse_strings(os.path.join('locale', i, 'strings.conf'))
 	globals.lflist = parse_lflist('lflist.conf')
@@ -25,8 +49,26 @@ def main():
 	parser.add_argument('-w', '--websocket-port', type=int)
 	parser.add_argument('--websocket-cert', '-c')
 	parser.add_argument('--websocket-key', '-k')
+	parser.add_argument('-s', '--script-archive', help="Serve scripts from an archive packed by script_build.py")
+	parser.add_argument('--reload-scripts', action='store_true', help="Read cached scripts again once their file changed, without --script-archive")
+	parser.add_argument('-j', '--journal', action='store_true', help="Keep a binary journal of every duel in the duels directory")
+	parser.add_argument('-t', '--process-threads', type=int, default=0, help="Run the core of duels in a pool of this many threads, off the reactor")
+	parser.add_argument('--shards', type=int, default=0, help="Run the core of duels in this many worker processes")
+	parser.add_argument('--time-slice', type=float, default=5.0, help="Milliseconds a duel may process before the next one gets its turn")
 	args = parser.parse_args()
 	server.port = args.port
+	globals.journal = args.journal
+	script_cache.check_mtime = args.reload_scripts
+	if args.script_archive:
+		use_script_archive(args.script_archive)
+	scheduler.max_time = args.time_slice / 1000.0
+	if args.process_threads > 0:
+		globals.process_pool = ProcessPool(args.process_threads)
+	if args.shards > 0:
+		worker_args = ['--script-archive', args.script_archive] if args.script_archive else []
+		if args.reload_scripts:
+			worker_args.append('--reload-scripts')
+		globals.shards = ShardManager(args.shards, worker_args)
 	if args.websocket_port:
 		start_websocket_server(args.websocket_port, args.websocket_cert, args.websocket_key)
 	globals.server = server
@@ -1,27 +1,60 @@
+from operator import attrgetter
+
 from .constants import *
 from . import globals
 
+def static_field(name):
+	"""Reads a field from the card data record shared by all cards with the same code"""
+	get = attrgetter(name)
+	return property(lambda self: get(self.data))
+
+def overridable_field(name):
+	"""Like static_field, but the core may report a different current value for a single card"""
+	get = attrgetter(name)
+	slot = '_' + name
+	def getter(self):
+		try:
+			return getattr(self, slot)
+		except AttributeError:
+			return get(self.data)
+	def setter(self, value):
+		setattr(self, slot, value)
+	return property(getter, setter)
+
 class Card(object):
+
+	# static card data lives in the catalog, only location and duel state is kept per card
+	__slots__ = (
+		'code', '_data', '_level', '_attack', '_defense',
+		'controller', 'location', 'sequence', 'position',
+		'extra', 'param', 'release_param', 'counter', 'counters', 'xyz_materials', 'equip_target',
+		'chain_index', 'chain_spec', 'effect_description',
+	)
+
 	def __init__(self, code):
-		row = globals.server.db.execute('select * from datas where id=?', (code,)).fetchone()
 		self.code = code
-		self.alias = row['alias']
-		self.setcode = row['setcode']
-		self.type = row['type']
-		self.level = row['level'] & 0xff
-		self.lscale = (row['level'] >> 24) & 0xff
-		self.rscale = (row['level'] >> 16) & 0xff
-		self.attack = row['atk']
-		self.defense = row['def']
-		self.race = row['race']
-		self.attribute = row['attribute']
-		self.category = row['category']
-		row = globals.server.db.execute('select * from texts where id = ?', (self.code, )).fetchone()
-		self.name = row[1]
-		self.desc = row[2]
-		self.strings = []
-		for i in range(3, len(row), 1):
-			self.strings.append(row[i])
+		self._data = None
+
+	@property
+	def data(self):
+		if self._data is None:
+			self._data = globals.catalog[self.code]
+		return self._data
+
+	alias = static_field('alias')
+	setcode = static_field('setcode')
+	type = static_field('type')
+	lscale = static_field('lscale')
+	rscale = static_field('rscale')
+	race = static_field('race')
+	attribute = static_field('attribute')
+	category = static_field('category')
+	name = static_field('name')
+	desc = static_field('desc')
+	strings = static_field('strings')
+	level = overridable_field('level')
+	attack = overridable_field('attack')
+	defense = overridable_field('defense')
 
 	def set_location(self, location):
 		self.controller = location & 0xff
@@ -33,27 +66,13 @@ class Card(object):
 		return self.code == other.code and self.location == other.location and self.sequence == other.sequence
 
 	def get_name(self, pl):
-		name = self.name
-		row = pl.cdb.execute('select name from texts where id=?', (self.code,)).fetchone()
-		if row:
-			return row[0]
-		return name
+		return pl.card_texts.get_name(self.code)
 
 	def get_desc(self, pl):
-		desc = self.desc
-		row = pl.cdb.execute('select desc from texts where id=?', (self.code,)).fetchone()
-		if row:	
-			return row[0]
-		return desc
+		return pl.card_texts.get_desc(self.code)
 
 	def get_strings(self, pl, code=None):
-		row = pl.cdb.execute('select * from texts where id = ?', (code or self.code, )).fetchone()
-		if not row:
-			return self.strings
-		strings = []
-		for i in range(3, len(row), 1):
-			strings.append(row[i])
-		return strings
+		return pl.card_texts.get_strings(code or self.code)
 
 	def get_effect_description(self, pl, i, existing=False):
 		s = ''
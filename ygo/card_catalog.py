@@ -0,0 +1,320 @@
+from array import array
+import bisect
+import collections
+import functools
+import re
+import string
+import sys
+
+from .constants import TYPE_MONSTER, TYPE_SPELL, TYPE_TRAP, TYPE_FUSION, TYPE_SYNCHRO, TYPE_XYZ, TYPE_LINK
+
+# classification bits precomputed for every card of the catalog
+CARD_MAIN = 0x1
+CARD_EXTRA = 0x2
+CARD_MONSTER = 0x4
+CARD_SPELL = 0x8
+CARD_TRAP = 0x10
+
+CardData = collections.namedtuple('CardData', ('code', 'alias', 'setcode', 'type', 'level', 'lscale', 'rscale', 'attack', 'defense', 'race', 'attribute', 'category', 'name', 'desc', 'strings'))
+
+CardText = collections.namedtuple('CardText', ('name', 'desc', 'strings'))
+
+DeckSummary = collections.namedtuple('DeckSummary', ('main', 'extra', 'monsters', 'spells', 'traps', 'counts'))
+
+# sqlite's like operator only folds the case of ascii characters
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+class CardCatalog:
+	"""
+	Immutable in-memory copy of the static card data stored in a cards.cdb.
+
+	It gets loaded once at startup and maps every card code to a CardData record,
+	so constructing cards doesn't need to query the database anymore.
+	"""
+
+	def __init__(self, cards, classes=None):
+		# any mapping of codes to CardData records, see catalog_file.py for the mapped one
+		self._cards = cards
+		if classes is None:
+			classes = {code: self.classify_type(data.type) for code, data in cards.items()}
+		self._classes = classes
+
+	@staticmethod
+	def classify_type(type):
+		if type & (TYPE_XYZ | TYPE_SYNCHRO | TYPE_FUSION | TYPE_LINK):
+			cls = CARD_EXTRA
+		else:
+			cls = CARD_MAIN
+		if type & TYPE_MONSTER:
+			cls |= CARD_MONSTER
+		if type & TYPE_SPELL:
+			cls |= CARD_SPELL
+		if type & TYPE_TRAP:
+			cls |= CARD_TRAP
+		return cls
+
+	@classmethod
+	def from_db(cls, db):
+		texts = {}
+		for row in db.execute('select * from texts'):
+			row = tuple(row)
+			texts[row[0]] = row
+		cards = {}
+		for row in db.execute('select id, alias, setcode, type, level, atk, def, race, attribute, category from datas'):
+			code, alias, setcode, type, level, attack, defense, race, attribute, category = row
+			text = texts.get(code, (code, '', ''))
+			cards[code] = CardData(
+				code = code,
+				alias = alias,
+				setcode = setcode,
+				type = type,
+				level = level & 0xff,
+				lscale = (level >> 24) & 0xff,
+				rscale = (level >> 16) & 0xff,
+				attack = attack,
+				defense = defense,
+				race = race,
+				attribute = attribute,
+				category = category,
+				name = text[1],
+				desc = text[2],
+				strings = tuple(text[3:]),
+			)
+		return cls(cards)
+
+	def __getitem__(self, code):
+		return self._cards[code]
+
+	def __contains__(self, code):
+		return code in self._cards
+
+	def __iter__(self):
+		return iter(self._cards)
+
+	def __len__(self):
+		return len(self._cards)
+
+	def get(self, code, default=None):
+		return self._cards.get(code, default)
+
+	def items(self):
+		return self._cards.items()
+
+	def values(self):
+		return self._cards.values()
+
+	def records(self):
+		"""CardData records of all cards, a mapped catalog leaves out the texts instead of decoding them."""
+		records = getattr(self._cards, 'records', None)
+		if records is None:
+			return self._cards.values()
+		return records()
+
+	def classify(self, code):
+		"""Returns the CARD_* bits of a card, or 0 if it is unknown."""
+		return self._classes.get(code, 0)
+
+	def summarize(self, deck):
+		"""
+		Counts the cards of a deck in a single pass.
+
+		Unknown cards are only part of the per-code counts.
+		"""
+		counts = collections.Counter(deck)
+		main = extra = monsters = spells = traps = 0
+		for code, count in counts.items():
+			cls = self._classes.get(code, 0)
+			if cls & CARD_MAIN:
+				main += count
+			elif cls & CARD_EXTRA:
+				extra += count
+			if cls & CARD_MONSTER:
+				monsters += count
+			if cls & CARD_SPELL:
+				spells += count
+			if cls & CARD_TRAP:
+				traps += count
+		return DeckSummary(main, extra, monsters, spells, traps, counts)
+
+class CardTexts:
+	"""
+	Names, descriptions and effect strings of all cards in one language.
+
+	Cards which aren't translated fall back to the english texts of the catalog.
+	"""
+
+	def __init__(self, texts, fallback):
+		self._texts = texts
+		self.fallback = fallback
+		self.hits = 0
+		self.misses = 0
+		self._names = None
+		self._all_names = None
+
+	# the name indexes get built on first use, so loading the texts stays cheap
+
+	@property
+	def names(self):
+		if self._names is None:
+			self._names = NameIndex((code, text.name) for code, text in self._texts.items())
+		return self._names
+
+	@property
+	def all_names(self):
+		# the deck editor browses every card of the catalog, translated or not
+		if self._all_names is None:
+			if len(self._texts) == len(self.fallback) and all(code in self._texts for code in self.fallback):
+				self._all_names = self.names
+			else:
+				self._all_names = NameIndex((code, (self._texts.get(code) or self.fallback[code]).name) for code in self.fallback)
+		return self._all_names
+
+	@classmethod
+	def from_db(cls, db, fallback):
+		texts = {}
+		if db is not None:
+			for row in db.execute('select * from texts'):
+				row = tuple(row)
+				texts[row[0]] = CardText(name = row[1], desc = row[2], strings = tuple(row[3:]))
+		return cls(texts, fallback)
+
+	@classmethod
+	def from_catalog(cls, catalog):
+		# the catalog records already carry name, desc and strings
+		return cls(catalog, catalog)
+
+	def use_catalog(self, catalog):
+		"""Falls back to another catalog, the name indexes get built again on next use."""
+		if self._texts is self.fallback:
+			self._texts = catalog
+		self.fallback = catalog
+		self._names = None
+		self._all_names = None
+
+	def get(self, code):
+		text = self._texts.get(code)
+		if text is None:
+			self.misses += 1
+			return self.fallback[code]
+		self.hits += 1
+		return text
+
+	def get_name(self, code):
+		return self.get(code).name
+
+	def get_desc(self, code):
+		return self.get(code).desc
+
+	def get_strings(self, code):
+		return self.get(code).strings
+
+	@property
+	def hit_rate(self):
+		lookups = self.hits + self.misses
+		if lookups == 0:
+			return 0.0
+		return float(self.hits) / lookups
+
+	def memory_usage(self):
+		"""Approximate amount of bytes occupied by the texts held in this store."""
+		size = sys.getsizeof(self._texts)
+		for text in self._texts.values():
+			size += sys.getsizeof(text) + sys.getsizeof(text.name) + sys.getsizeof(text.desc) + sys.getsizeof(text.strings)
+			size += sum(sys.getsizeof(s) for s in text.strings)
+		return size
+
+	def __len__(self):
+		return len(self._texts)
+
+class NameIndex:
+	"""
+	Trigram index over card names.
+
+	Resolves substring searches like the query "select id from texts where name like '%text%'"
+	did before, including the ascii-only case folding, the % and _ wildcards and results
+	being ordered by code.
+	The most recent queries are kept in a small LRU cache.
+	"""
+
+	def __init__(self, names):
+		names = sorted(names)
+		self.codes = [code for code, name in names]
+		self.names = [(name or '').translate(ASCII_LOWER) for code, name in names]
+		self.trigrams = {}
+		for pos, name in enumerate(self.names):
+			for trigram in set(name[i:i+3] for i in range(len(name) - 2)):
+				postings = self.trigrams.get(trigram)
+				if postings is None:
+					postings = self.trigrams[trigram] = array('I')
+				postings.append(pos)
+		self.search = functools.lru_cache(maxsize=1024)(self._search)
+		self.matches = functools.lru_cache(maxsize=256)(self._matches)
+
+	def _candidates(self, text):
+		# names containing text must contain all of its trigrams,
+		# so the shortest posting list is enough to check
+		if len(text) < 3:
+			return range(len(self.names))
+		candidates = None
+		for i in range(len(text) - 2):
+			postings = self.trigrams.get(text[i:i+3])
+			if postings is None:
+				return ()
+			if candidates is None or len(postings) < len(candidates):
+				candidates = postings
+		return candidates
+
+	def _matcher(self, text):
+		"""Candidate positions and a test for names containing text, with % and _ as wildcards like in sql."""
+		text = text.translate(ASCII_LOWER)
+		if '%' not in text and '_' not in text:
+			return self._candidates(text), lambda name: text in name
+		# every literal part has to be part of the name, the longest one narrows down the most
+		pattern = re.compile(''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in text), re.DOTALL)
+		return self._candidates(max(re.split('[%_]', text), key=len)), lambda name: pattern.search(name) is not None
+
+	def _search(self, text, limit):
+		"""Returns the codes of the first limit cards whose name contains text."""
+		candidates, match = self._matcher(text)
+		codes = []
+		for pos in candidates:
+			if match(self.names[pos]):
+				codes.append(self.codes[pos])
+				if len(codes) == limit:
+					break
+		return tuple(codes)
+
+	def _matches(self, text):
+		"""Returns the codes of all cards whose name contains text, in ascending order."""
+		candidates, match = self._matcher(text)
+		return array('I', (self.codes[pos] for pos in candidates if match(self.names[pos])))
+
+	def positions(self, text, positions):
+		"""
+		Positions of all matches within a list of codes sorted in ascending order.
+
+		positions maps the codes of the list to their position, matches which
+		aren't part of it are left out.
+		"""
+		# both are sorted by code, so the positions come out ascending as well
+		return [positions[code] for code in self.matches(text) if code in positions]
+
+	def find_next(self, text, start, positions):
+		"""Position of the first match at or after start, wrapping around at the end."""
+		positions = self.positions(text, positions)
+		if not positions:
+			return
+		i = bisect.bisect_left(positions, start)
+		if i == len(positions):
+			return positions[0]
+		return positions[i]
+
+	def find_prev(self, text, start, positions):
+		"""Position of the first match at or before start, wrapping around at the beginning."""
+		positions = self.positions(text, positions)
+		if not positions:
+			return
+		i = bisect.bisect_right(positions, start)
+		if i == 0:
+			return positions[-1]
+		return positions[i - 1]
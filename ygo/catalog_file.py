@@ -0,0 +1,314 @@
+import bisect
+import collections.abc
+import hashlib
+import mmap
+import os.path
+import sqlite3
+import struct
+
+from .card_catalog import CardCatalog, CardData, CardText, CardTexts
+
+# all card databases compiled into the catalog file, english first
+SOURCES = (
+	('en', os.path.join('locale', 'en', 'cards.cdb')),
+	('de', os.path.join('locale', 'de', 'cards.cdb')),
+	('ja', os.path.join('locale', 'ja', 'cards.cdb')),
+	('es', os.path.join('locale', 'es', 'cards.cdb')),
+)
+
+CATALOG_PATH = 'cards.bin'
+
+MAGIC = b'YGOCAT02'
+# magic, sha256 of the source databases, number of cards, number of languages
+HEADER = struct.Struct('<8s32sII')
+# language code, modification time in nanoseconds and size of its database
+LANGUAGE = struct.Struct('<4sqq')
+
+# fixed width numeric columns, stored one after another
+COLUMNS = (
+	('code', 'I'),
+	('alias', 'I'),
+	('setcode', 'Q'),
+	('type', 'I'),
+	('level', 'I'),
+	('attack', 'i'),
+	('defense', 'i'),
+	('race', 'I'),
+	('attribute', 'I'),
+	('category', 'Q'),
+)
+
+# name, desc and str1 to str16 of the texts table
+TEXT_FIELDS = 18
+
+class StaleCatalogError(Exception):
+	pass
+
+def content_hash(sources):
+	"""sha256 over the contents of all source databases which exist."""
+	h = hashlib.sha256()
+	for lang, path in sources:
+		if not os.path.exists(path):
+			continue
+		h.update(lang.encode('ascii'))
+		with open(path, 'rb') as fp:
+			for chunk in iter(lambda: fp.read(1 << 20), b''):
+				h.update(chunk)
+	return h.digest()
+
+def source_stats(sources):
+	"""Language, modification time and size of all source databases which exist."""
+	stats = []
+	for lang, path in sources:
+		if os.path.exists(path):
+			st = os.stat(path)
+			stats.append((lang, st.st_mtime_ns, st.st_size))
+	return stats
+
+def align(size):
+	return (size + 7) & ~7
+
+def compile_catalog(path, sources=SOURCES):
+	"""
+	Compiles the card databases into a single file which can be mapped into memory.
+
+	Layout after the header and the languages, every section aligned to 8 bytes:
+	all numeric columns, then per language a presence byte per card and
+	count * TEXT_FIELDS + 1 offsets into the utf-8 string heap which follows last.
+	Cards are ordered by code. Cards missing from the english database take their
+	data from the first database which has them.
+	"""
+	sources = [(lang, p) for lang, p in sources if os.path.exists(p)]
+	stats = source_stats(sources)
+	datas = {}
+	for lang, p in sources:
+		for row in sqlite3.connect(p).execute('select id, alias, setcode, type, level, atk, def, race, attribute, category from datas'):
+			datas.setdefault(row[0], row)
+	codes = sorted(datas)
+	rows = [datas[code] for code in codes]
+	count = len(codes)
+	columns = []
+	for i, (name, fmt) in enumerate(COLUMNS):
+		columns.append(struct.pack('<%d%s' % (count, fmt), *(row[i] for row in rows)))
+	heap = bytearray()
+	texts = []
+	for lang, p in sources:
+		tdb = sqlite3.connect(p)
+		rows = {row[0]: row for row in tdb.execute('select * from texts')}
+		present = bytearray(count)
+		offsets = []
+		for i, code in enumerate(codes):
+			row = rows.get(code)
+			if row is not None:
+				present[i] = 1
+				fields = list(row[1:TEXT_FIELDS + 1])
+			else:
+				fields = []
+			fields += [''] * (TEXT_FIELDS - len(fields))
+			for field in fields:
+				offsets.append(len(heap))
+				heap += (field or '').encode('utf-8')
+		offsets.append(len(heap))
+		texts.append((bytes(present), struct.pack('<%dI' % len(offsets), *offsets)))
+	with open(path + '.tmp', 'wb') as fp:
+		def write(data):
+			fp.write(data)
+			fp.write(b'\0' * (align(len(data)) - len(data)))
+		write(HEADER.pack(MAGIC, content_hash(sources), count, len(stats)) + b''.join(LANGUAGE.pack(lang.encode('ascii'), mtime, size) for lang, mtime, size in stats))
+		for column in columns:
+			write(column)
+		for present, offsets in texts:
+			write(present)
+			write(offsets)
+		fp.write(heap)
+	os.replace(path + '.tmp', path)
+
+class CatalogFile:
+	"""
+	Read-only view on a compiled catalog file.
+
+	The file is mapped into memory, so several server processes share the same pages
+	and nothing gets decoded before it is asked for. Codes are looked up by bisecting
+	the code column, no process builds an index of its own.
+	"""
+
+	def __init__(self, path):
+		with open(path, 'rb') as fp:
+			self.map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+		view = memoryview(self.map)
+		magic, self.hash, count, languages = HEADER.unpack_from(view)
+		if magic != MAGIC:
+			raise ValueError("%s is no compiled card catalog" % path)
+		pos = HEADER.size
+		self.languages = []
+		self.sources = []
+		for i in range(languages):
+			lang, mtime, size = LANGUAGE.unpack_from(view, pos)
+			lang = lang.rstrip(b'\0').decode('ascii')
+			self.languages.append(lang)
+			self.sources.append((lang, mtime, size))
+			pos += LANGUAGE.size
+		pos = align(pos)
+		self.columns = {}
+		for name, fmt in COLUMNS:
+			size = count * struct.calcsize(fmt)
+			self.columns[name] = view[pos:pos + size].cast(fmt)
+			pos = align(pos + size)
+		self.present = {}
+		self.offsets = {}
+		for lang in self.languages:
+			self.present[lang] = view[pos:pos + count]
+			pos = align(pos + count)
+			size = (count * TEXT_FIELDS + 1) * 4
+			self.offsets[lang] = view[pos:pos + size].cast('I')
+			pos = align(pos + size)
+		self.heap = view[pos:]
+		self.codes = self.columns['code']
+
+	@classmethod
+	def open(cls, path=CATALOG_PATH, sources=SOURCES):
+		"""Opens a catalog file, refusing it if the databases changed since it was compiled."""
+		catalog = cls(path)
+		# the contents only get hashed once a database was touched
+		if catalog.sources != source_stats(sources) and catalog.hash != content_hash(sources):
+			raise StaleCatalogError("%s is out of date, run catalog_build.py again" % path)
+		return catalog
+
+	def __len__(self):
+		return len(self.codes)
+
+	def row(self, code):
+		"""Row of a card, or None if the catalog doesn't know it."""
+		i = bisect.bisect_left(self.codes, code)
+		if i < len(self.codes) and self.codes[i] == code:
+			return i
+
+	def fields(self, lang, row):
+		# slice the whole record at once, the heap offsets of its fields are consecutive
+		offsets = self.offsets[lang][row * TEXT_FIELDS:(row + 1) * TEXT_FIELDS + 1].tolist()
+		base = offsets[0]
+		data = self.heap[base:offsets[-1]].tobytes()
+		return [data[offsets[i] - base:offsets[i + 1] - base].decode('utf-8') for i in range(TEXT_FIELDS)]
+
+	def text(self, lang, row):
+		if not self.present[lang][row]:
+			return None
+		fields = self.fields(lang, row)
+		return CardText(name = fields[0], desc = fields[1], strings = tuple(fields[2:]))
+
+	def card(self, row):
+		c = self.columns
+		level = c['level'][row]
+		# cards only found in a localized database are named in that language
+		text = None
+		for lang in self.languages:
+			text = self.text(lang, row)
+			if text is not None:
+				break
+		text = text or CardText('', '', ())
+		return CardData(
+			code = c['code'][row],
+			alias = c['alias'][row],
+			setcode = c['setcode'][row],
+			type = c['type'][row],
+			level = level & 0xff,
+			lscale = (level >> 24) & 0xff,
+			rscale = (level >> 16) & 0xff,
+			attack = c['attack'][row],
+			defense = c['defense'][row],
+			race = c['race'][row],
+			attribute = c['attribute'][row],
+			category = c['category'][row],
+			name = text.name,
+			desc = text.desc,
+			strings = text.strings,
+		)
+
+	def records(self):
+		"""CardData records of every card straight from the numeric columns, without their texts."""
+		for code, alias, setcode, type, level, attack, defense, race, attribute, category in zip(*(self.columns[name] for name, fmt in COLUMNS)):
+			yield CardData(code, alias, setcode, type, level & 0xff, (level >> 24) & 0xff, (level >> 16) & 0xff, attack, defense, race, attribute, category, '', '', ())
+
+class MappedCards(collections.abc.Mapping):
+	"""Card codes to CardData records, decoded from a CatalogFile when first used."""
+
+	def __init__(self, file):
+		self.file = file
+		self._cache = {}
+
+	def __getitem__(self, code):
+		data = self._cache.get(code)
+		if data is None:
+			row = self.file.row(code)
+			if row is None:
+				raise KeyError(code)
+			data = self._cache[code] = self.file.card(row)
+		return data
+
+	def __contains__(self, code):
+		return self.file.row(code) is not None
+
+	def __iter__(self):
+		return iter(self.file.codes)
+
+	def __len__(self):
+		return len(self.file)
+
+	def records(self):
+		return self.file.records()
+
+class MappedTexts(collections.abc.Mapping):
+	"""Card codes to CardText records of one language of a CatalogFile."""
+
+	def __init__(self, file, lang):
+		self.file = file
+		self.lang = lang
+		self._cache = {}
+		self._len = None
+
+	def __getitem__(self, code):
+		text = self._cache.get(code)
+		if text is None:
+			row = self.file.row(code)
+			if row is not None:
+				text = self.file.text(self.lang, row)
+			if text is None:
+				raise KeyError(code)
+			self._cache[code] = text
+		return text
+
+	def __contains__(self, code):
+		row = self.file.row(code)
+		return row is not None and bool(self.file.present[self.lang][row])
+
+	def __iter__(self):
+		present = self.file.present[self.lang]
+		return (code for i, code in enumerate(self.file.codes) if present[i])
+
+	def __len__(self):
+		if self._len is None:
+			self._len = self.file.present[self.lang].tobytes().count(1)
+		return self._len
+
+class MappedClasses:
+	"""Card codes to CARD_* bits, classified from the type column of a CatalogFile."""
+
+	def __init__(self, file):
+		self.file = file
+		self.types = file.columns['type']
+
+	def get(self, code, default=None):
+		row = self.file.row(code)
+		if row is None:
+			return default
+		return CardCatalog.classify_type(self.types[row])
+
+def load_catalog(file):
+	"""CardCatalog backed by a CatalogFile, classified straight from the type column."""
+	return CardCatalog(MappedCards(file), MappedClasses(file))
+
+def load_texts(file, lang, catalog):
+	"""CardTexts of one language, empty if the language wasn't compiled into the file."""
+	if lang not in file.languages:
+		return CardTexts({}, catalog)
+	return CardTexts(MappedTexts(file, lang), catalog)
@@ -69,6 +69,8 @@ QUERY_COUNTERS = 0x20000
 QUERY_LINK = 0x800000
 
 TYPE_MONSTER = 0x1
+TYPE_SPELL = 0x2
+TYPE_TRAP = 0x4
 TYPE_FUSION = 0x40
 TYPE_SYNCHRO = 0x2000
 TYPE_XYZ = 0x800000
@@ -0,0 +1,300 @@
+import itertools
+from logging import getLogger
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+from twisted.internet import defer, error, reactor
+
+from .core_worker import ARGUMENTS, PROCESS_RESULT, REPLY, encode_request
+from .core_worker import OP_CREATE, OP_END, OP_SET_PLAYER_INFO, OP_NEW_CARD, OP_NEW_TAG_CARD, OP_START, OP_PROCESS, OP_SET_RESPONSEI, OP_SET_RESPONSEB
+from .duel_core import LocalCore
+from .field_state import FieldState
+from .process_pool import ProcessRunner
+
+logger = getLogger('core_shards')
+
+class ShardLost(Exception):
+	pass
+
+class RemoteCore:
+	"""
+	Stands in for LocalCore while the core of a duel lives in a worker process.
+
+	It only gets processed through its shard manager. Queries never wait for the
+	worker, they are answered from the field state of the latest reply.
+	"""
+
+	def __init__(self, shard, id, seed):
+		self.shard = shard
+		self.id = id
+		self.runner = shard.manager
+		self.ended = False
+		self.state = FieldState()
+		shard.cast(OP_CREATE, id, ARGUMENTS[OP_CREATE].pack(seed))
+
+	def set_player_info(self, player, lp, start_count, draw_count):
+		self.shard.cast(OP_SET_PLAYER_INFO, self.id, ARGUMENTS[OP_SET_PLAYER_INFO].pack(player, lp, start_count, draw_count))
+
+	def new_card(self, code, owner, player, location, sequence, position):
+		self.shard.cast(OP_NEW_CARD, self.id, ARGUMENTS[OP_NEW_CARD].pack(code, owner, player, location, sequence, position))
+
+	def new_tag_card(self, code, owner, location):
+		self.shard.cast(OP_NEW_TAG_CARD, self.id, ARGUMENTS[OP_NEW_TAG_CARD].pack(code, owner, location))
+
+	def start(self, options):
+		d = self.shard.defer(OP_START, self.id, ARGUMENTS[OP_START].pack(options))
+		d.addCallback(self.update)
+		d.addErrback(lambda failure: logger.error("Starting core %d failed: %s", self.id, failure.getErrorMessage()))
+
+	def update(self, payload):
+		self.state = FieldState(payload)
+
+	def end(self):
+		if not self.ended:
+			self.ended = True
+			self.shard.release(self)
+
+	def defer_process(self):
+		return self.shard.defer(OP_PROCESS, self.id).addCallback(self.unpack_process)
+
+	def unpack_process(self, payload):
+		res, length = PROCESS_RESULT.unpack_from(payload)
+		end = PROCESS_RESULT.size + length
+		self.update(payload[end:])
+		return res, payload[PROCESS_RESULT.size:end]
+
+	def set_responsei(self, r):
+		self.shard.cast(OP_SET_RESPONSEI, self.id, ARGUMENTS[OP_SET_RESPONSEI].pack(r))
+
+	def set_responseb(self, r):
+		self.shard.cast(OP_SET_RESPONSEB, self.id, r)
+
+	def query_card(self, player, location, sequence, flags, use_cache):
+		return self.state.query_card(player, location, sequence)
+
+	def query_field_card(self, player, location, flags, use_cache):
+		return self.state.query_field_card(player, location)
+
+	def query_field_snapshot(self):
+		return self.state.snapshot
+
+	def query_linked_zone(self, player, location, sequence):
+		return self.state.query_linked_zone(player, location, sequence)
+
+class Shard:
+	"""
+	A worker process and the duels whose cores it owns.
+
+	Everything is asynchronous, replies are read whenever the reactor finds the
+	socket readable. Only start and process get replies, which carry the field
+	state the cores answer queries from, so the reactor never waits for a worker.
+	That includes its start: the shard takes no duels until the worker connected.
+	"""
+
+	# seconds a new worker gets to connect before it is given up
+	connect_timeout = 30
+
+	def __init__(self, manager, index, path, worker_args):
+		self.manager = manager
+		self.index = index
+		self.duels = {}
+		self.pending = {}
+		self.requests = itertools.count(1)
+		self.cores = itertools.count(1)
+		self.buffer = b''
+		self.alive = False
+		self.sock = None
+		self.path = path
+		if os.path.exists(path):
+			os.unlink(path)
+		self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.listener.setblocking(False)
+		try:
+			self.listener.bind(path)
+			self.listener.listen(1)
+			self.worker = subprocess.Popen([sys.executable, '-m', 'ygo.core_worker', path] + worker_args)
+		except OSError:
+			self.close_listener()
+			raise
+		# doRead accepts the worker once it connects
+		reactor.addReader(self)
+		self.timeout = reactor.callLater(self.connect_timeout, self.connect_failed)
+
+	def close_listener(self):
+		self.listener.close()
+		self.listener = None
+		if os.path.exists(self.path):
+			os.unlink(self.path)
+
+	def connected(self):
+		try:
+			self.sock = self.listener.accept()[0]
+		except BlockingIOError:
+			return
+		reactor.removeReader(self)
+		self.close_listener()
+		self.timeout.cancel()
+		self.sock.setblocking(True)
+		self.alive = True
+		reactor.addReader(self)
+
+	def connect_failed(self):
+		reactor.removeReader(self)
+		self.close_listener()
+		self.worker.kill()
+		logger.error("Shard %d didn't connect within %d seconds.", self.index, self.connect_timeout)
+		self.manager.shard_lost(self, [])
+
+	def create_core(self, duel, seed):
+		core = RemoteCore(self, next(self.cores), seed)
+		self.duels[core.id] = duel
+		return core
+
+	def release(self, core):
+		self.duels.pop(core.id, None)
+		if self.alive:
+			self.cast(OP_END, core.id)
+
+	def send(self, data):
+		if not self.alive:
+			raise ShardLost(self.index)
+		try:
+			self.sock.sendall(data)
+		except OSError:
+			self.lost()
+			raise ShardLost(self.index)
+
+	def cast(self, op, core, payload=b''):
+		"""Sends a request nobody waits for an answer to."""
+		self.send(encode_request(0, op, core, payload))
+
+	def defer(self, op, core, payload=b''):
+		request = next(self.requests)
+		self.send(encode_request(request, op, core, payload))
+		d = self.pending[request] = defer.Deferred()
+		return d
+
+	def receive(self):
+		try:
+			return self.sock.recv(65536)
+		except OSError:
+			return b''
+
+	def parse(self):
+		"""Takes all complete replies off the buffer."""
+		replies = []
+		pos = 0
+		while len(self.buffer) - pos >= REPLY.size:
+			length, request = REPLY.unpack_from(self.buffer, pos)
+			if len(self.buffer) - pos < REPLY.size + length:
+				break
+			replies.append((request, self.buffer[pos + REPLY.size:pos + REPLY.size + length]))
+			pos += REPLY.size + length
+		self.buffer = self.buffer[pos:]
+		return replies
+
+	def deliver(self, request, reply):
+		d = self.pending.pop(request, None)
+		if d is None:
+			return
+		if not reply:
+			d.errback(RuntimeError("shard %d failed to answer a request" % self.index))
+		else:
+			d.callback(reply)
+
+	def fileno(self):
+		return (self.sock or self.listener).fileno()
+
+	def logPrefix(self):
+		return 'shard %d' % self.index
+
+	def doRead(self):
+		if self.sock is None:
+			return self.connected()
+		data = self.receive()
+		if not data:
+			return error.ConnectionLost()
+		self.buffer += data
+		for request, reply in self.parse():
+			self.deliver(request, reply)
+
+	def connectionLost(self, reason):
+		self.lost()
+
+	def lost(self):
+		if not self.alive:
+			return
+		self.alive = False
+		reactor.removeReader(self)
+		self.sock.close()
+		pending = list(self.pending.values())
+		self.pending.clear()
+		for d in pending:
+			d.errback(ShardLost(self.index))
+		duels = list(self.duels.values())
+		self.duels.clear()
+		self.manager.shard_lost(self, duels)
+
+	def stop(self):
+		if self.listener is not None:
+			# still waiting for the worker
+			reactor.removeReader(self)
+			self.close_listener()
+			self.timeout.cancel()
+			self.worker.kill()
+		elif self.alive:
+			self.alive = False
+			reactor.removeReader(self)
+			# the worker ends all its duels and quits once the socket closes
+			self.sock.close()
+
+class ShardManager(ProcessRunner):
+	"""
+	Places the cores of new duels on the least loaded of several worker processes.
+
+	Connections, lobby, rooms and the message handlers stay in this process, the
+	workers only run the core. A worker going down only takes its own duels with
+	it, it gets restarted right away.
+	"""
+
+	def __init__(self, count, worker_args=[]):
+		super().__init__()
+		self.directory = tempfile.mkdtemp(prefix='ygo-shards-')
+		self.worker_args = worker_args
+		self.shards = [self.spawn(i) for i in range(count)]
+		reactor.addSystemEventTrigger('during', 'shutdown', self.stop)
+
+	def spawn(self, index):
+		return Shard(self, index, os.path.join(self.directory, 'shard%d' % index), self.worker_args)
+
+	def create_core(self, duel, seed):
+		shards = [shard for shard in self.shards if shard.alive]
+		if not shards:
+			logger.error("No shard alive, running the duel in the front-end.")
+			return LocalCore(seed)
+		return min(shards, key=lambda shard: len(shard.duels)).create_core(duel, seed)
+
+	def process(self, duel):
+		return duel.core.defer_process()
+
+	def shard_lost(self, shard, duels):
+		logger.error("Shard %d went down, aborting %d duels.", shard.index, len(duels))
+		for duel in duels:
+			self.running.pop(duel, None)
+			self.again.discard(duel)
+			if not duel.started:
+				continue
+			for pl in duel.players + duel.watchers:
+				pl.notify(pl._("The duel had to be aborted due to a server error."))
+			duel.end()
+		try:
+			self.shards[shard.index] = self.spawn(shard.index)
+		except OSError:
+			logger.exception("Couldn't restart shard %d.", shard.index)
+
+	def stop(self):
+		for shard in self.shards:
+			shard.stop()
+		os.rmdir(self.directory)
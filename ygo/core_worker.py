@@ -0,0 +1,156 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+import socket
+import struct
+import threading
+
+from .duel_core import LocalCore
+from .field_state import field_state
+
+logger = getLogger('core_worker')
+
+# payload length, request id, operation, core id
+# requests with id 0 don't get a reply
+REQUEST = struct.Struct('<IIBI')
+# payload length, request id
+REPLY = struct.Struct('<II')
+
+OP_CREATE = 1
+OP_END = 2
+OP_SET_PLAYER_INFO = 3
+OP_NEW_CARD = 4
+OP_NEW_TAG_CARD = 5
+OP_START = 6
+OP_PROCESS = 7
+OP_SET_RESPONSEI = 8
+OP_SET_RESPONSEB = 9
+
+# arguments of the operations, responseb and process have none besides the core id
+ARGUMENTS = {
+	OP_CREATE: struct.Struct('<I'),
+	OP_SET_PLAYER_INFO: struct.Struct('<Biii'),
+	OP_NEW_CARD: struct.Struct('<IBBBBB'),
+	OP_NEW_TAG_CARD: struct.Struct('<IBB'),
+	OP_START: struct.Struct('<I'),
+	OP_SET_RESPONSEI: struct.Struct('<i'),
+}
+
+# a process reply is the result and the length of the messages,
+# followed by the messages and the field state after the call
+PROCESS_RESULT = struct.Struct('<II')
+
+def encode_request(request, op, core, payload=b''):
+	return REQUEST.pack(len(payload), request, op, core) + payload
+
+def read_exactly(sock, size):
+	data = b''
+	while len(data) < size:
+		chunk = sock.recv(size - len(data))
+		if not chunk:
+			return None
+		data += chunk
+	return data
+
+class Worker:
+	"""
+	Owns the cores of a shard of duels and serves requests of the front-end for them.
+
+	Requests are handled in the order they arrive, except for process, which runs
+	in a thread of its own so a long chain doesn't hold up the other duels.
+	The front-end never queries a core, the field state comes along with the
+	replies to start and process instead.
+	"""
+
+	def __init__(self, sock, threads):
+		self.sock = sock
+		self.cores = {}
+		self.send_lock = threading.Lock()
+		self.executor = ThreadPoolExecutor(threads)
+
+	def reply(self, request, payload):
+		with self.send_lock:
+			self.sock.sendall(REPLY.pack(len(payload), request) + payload)
+
+	def serve(self):
+		while True:
+			header = read_exactly(self.sock, REQUEST.size)
+			if header is None:
+				break
+			length, request, op, core = REQUEST.unpack(header)
+			payload = read_exactly(self.sock, length) if length else b''
+			if payload is None:
+				break
+			if op == OP_PROCESS:
+				self.executor.submit(self.process, request, core)
+				continue
+			try:
+				self.handle(request, op, core, payload)
+			except Exception:
+				logger.exception("Error handling operation %d of core %d", op, core)
+				if request:
+					self.reply(request, b'')
+		# the front-end went away, nobody will ever answer these duels
+		self.executor.shutdown()
+		for core in self.cores.values():
+			core.end()
+
+	def process(self, request, id):
+		try:
+			core = self.cores[id]
+			# the duel may be ended from the reading thread meanwhile, it has to wait until the state is taken
+			with core.lock:
+				result = core.process()
+				if result is None:
+					raise KeyError(id)
+				messages = result[1][:]
+				payload = PROCESS_RESULT.pack(result[0], len(messages)) + messages + field_state(core)
+		except Exception:
+			logger.exception("Error processing core %d", id)
+			payload = b''
+		self.reply(request, payload)
+
+	def handle(self, request, op, id, payload):
+		arguments = ARGUMENTS[op].unpack(payload) if op in ARGUMENTS else ()
+		if op == OP_CREATE:
+			self.cores[id] = LocalCore(*arguments)
+			return
+		core = self.cores[id]
+		if op == OP_END:
+			core.end()
+			del self.cores[id]
+		elif op == OP_SET_PLAYER_INFO:
+			core.set_player_info(*arguments)
+		elif op == OP_NEW_CARD:
+			core.new_card(*arguments)
+		elif op == OP_NEW_TAG_CARD:
+			core.new_tag_card(*arguments)
+		elif op == OP_START:
+			core.start(*arguments)
+			if request:
+				self.reply(request, field_state(core))
+		elif op == OP_SET_RESPONSEI:
+			core.set_responsei(*arguments)
+		elif op == OP_SET_RESPONSEB:
+			core.set_responseb(payload)
+
+def main():
+	parser = argparse.ArgumentParser(description="Worker process owning the cores of a shard of duels, started by the server.")
+	parser.add_argument('socket', help="Unix socket of the front-end to connect to")
+	parser.add_argument('-s', '--script-archive', help="Serve scripts from an archive packed by script_build.py")
+	parser.add_argument('--reload-scripts', action='store_true', help="Read cached scripts again once their file changed")
+	parser.add_argument('-d', '--database', default='locale/en/cards.cdb', help="Card database to use without a compiled catalog")
+	parser.add_argument('-t', '--threads', type=int, default=2, help="Number of duels processed at once")
+	args = parser.parse_args()
+	from .duel import script_cache, use_script_archive
+	from .simulation import load_worker_catalog
+	load_worker_catalog(args.database)
+	script_cache.check_mtime = args.reload_scripts
+	if args.script_archive:
+		use_script_archive(args.script_archive)
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	sock.connect(args.socket)
+	Worker(sock, args.threads).serve()
+
+if __name__ == '__main__':
+	main()
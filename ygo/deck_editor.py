@@ -3,6 +3,7 @@ import json
 import natsort
 
 from .card import Card
+from .card_catalog import CARD_EXTRA, CARD_MONSTER, CARD_SPELL, CARD_TRAP
 from . import globals
 from . import models
 from .constants import *
@@ -105,15 +106,19 @@ class DeckEditor:
 		"""
 		Use the above function to group all cards, then sort them into groups.
 		"""
-		extras = [c for c in cardlist if (Card(c).type & (TYPE_XYZ | TYPE_SYNCHRO | TYPE_FUSION | TYPE_LINK))]
-		for c in extras: cardlist.remove(c)
-		traps = [c for c in cardlist if (Card(c).type & 4)]
-		for c in traps: cardlist.remove(c)
-		monsters = [c for c in cardlist if (Card(c).type&1)]
-		for c in monsters: cardlist.remove(c)
-		spells = [c for c in cardlist if (Card(c).type & 2)]
-		for c in spells: cardlist.remove(c)
-		other=cardlist
+		extras, traps, monsters, spells, other = [], [], [], [], []
+		for c in cardlist:
+			cls = globals.catalog.classify(c)
+			if cls & CARD_EXTRA:
+				extras.append(c)
+			elif cls & CARD_TRAP:
+				traps.append(c)
+			elif cls & CARD_MONSTER:
+				monsters.append(c)
+			elif cls & CARD_SPELL:
+				spells.append(c)
+			else:
+				other.append(c)
 		extras_group = self.group_cards(extras)
 		traps_group = self.group_cards(traps)
 		spells_group = self.group_cards(spells)
@@ -136,31 +141,12 @@ class DeckEditor:
 		for x, y in other.items(): full[x] = y
 		return full
 
-	def find_next(self, text, start, limit=None, wrapped=False):
-		sql = 'SELECT id FROM texts WHERE UPPER(name) LIKE ? and id in (%s) ORDER BY id ASC LIMIT 1'
-		if limit:
-			cards = globals.server.all_cards[start:start+limit]
-		else:
-			cards = globals.server.all_cards[start:]
-		row = self.player.cdb.execute(sql % (', '.join([str(c) for c in cards])), ('%'+text.upper()+'%', )).fetchone()
-		if row is not None:
-			return globals.server.all_cards.index(row[0])
-		if wrapped:
-			return
-		return self.find_next(text, 0, start, wrapped=True)
+	# start and the results are positions within globals.server.all_cards
+	def find_next(self, text, start):
+		return self.player.card_texts.all_names.find_next(text, start, globals.server.card_positions)
 
-	def find_prev(self, text, start, end=None, wrapped=False):
-		sql = 'SELECT id FROM texts WHERE UPPER(name) LIKE ? AND id IN (%s) ORDER BY id DESC LIMIT 1'
-		pos = start
-		if end is None:
-			end = 0
-		cards = globals.server.all_cards[end:start]
-		row = self.player.cdb.execute(sql % (', '.join([str(c) for c in cards])), ('%'+text.upper()+'%', )).fetchone()
-		if row is not None:
-			return globals.server.all_cards.index(row[0])
-		if wrapped:
-			return
-		return self.find_prev(text, len(globals.server.all_cards) - 1, start, wrapped=True)
+	def find_prev(self, text, start):
+		return self.player.card_texts.all_names.find_prev(text, start, globals.server.card_positions)
 
 	def save(self):
 		deck = json.dumps(self.player.deck)
@@ -197,10 +183,8 @@ class DeckEditor:
 		if banlist not in globals.lflist:
 			self.player.notify(self.player._("Invalid entry."))
 			return
-		codes = set(deck)
 		errors = 0
-		for code in codes:
-			count = deck.count(code)
+		for code, count in Counter(deck).items():
 			if code not in globals.lflist[banlist] or count <= globals.lflist[banlist][code]:
 				continue
 			card = Card(code)
@@ -1,19 +1,29 @@
 from _duel import ffi, lib
 import os
-import io
-import struct
 import random
 import binascii
+import importlib
 import pkgutil
 import re
 import datetime
+import threading
+import time
 import natsort
-from twisted.internet import reactor
 
-from . import callback_manager
 from .card import Card
+from .card_catalog import CARD_EXTRA
 from .constants import *
+from .duel_core import LocalCore
+from .duel_journal import DuelJournal
+from .duel_stats import stats
 from .duel_reader import DuelReader
+from .event_bus import EventBus
+from .field_mirror import FieldMirror
+from .field_snapshot import FieldSnapshot
+from .message_reader import MessageReader
+from .message_schema import DECODERS
+from .script_archive import ScriptArchive
+from .script_cache import ScriptCache
 from .utils import process_duel
 from . import globals
 from . import message_handlers
@@ -23,53 +33,145 @@ from .channels.watchers import Watchers
 
 __ = lambda x: x
 
-@ffi.def_extern()
-def card_reader_callback(code, data):
-	cd = data[0]
-	row = globals.server.db.execute('select * from datas where id=?', (code,)).fetchone()
-	cd.code = code
-	cd.alias = row['alias']
-	cd.setcode = row['setcode']
-	cd.type = row['type']
-	cd.level = row['level'] & 0xff
-	cd.lscale = (row['level'] >> 24) & 0xff
-	cd.rscale = (row['level'] >> 16) & 0xff
-	cd.attack = row['atk']
-	cd.defense = row['def']
+def fill_card_data(cd, data):
+	cd.code = data.code
+	cd.alias = data.alias
+	cd.setcode = data.setcode
+	cd.type = data.type
+	cd.level = data.level
+	cd.lscale = data.lscale
+	cd.rscale = data.rscale
+	cd.attack = data.attack
+	cd.defense = data.defense
 	if cd.type & TYPE_LINK:
 		cd.link_marker = cd.defense
 		cd.defense = 0
 	else:
 		cd.link_marker = 0
-	cd.race = row['race']
-	cd.attribute = row['attribute']
+	cd.race = data.race
+	cd.attribute = data.attribute
+
+@ffi.def_extern()
+def card_reader_callback(code, data):
+	fill_card_data(data[0], globals.catalog[code])
 	return 0
 
 lib.set_card_reader(lib.card_reader_callback)
 
-scriptbuf = ffi.new('char[131072]')
+# copies the whole catalog into the native card table
+# and lets the core read from there, without calling back into python
+def load_card_data(catalog):
+	cards = ffi.new('struct card_data[]', len(catalog))
+	for i, data in enumerate(catalog.records()):
+		fill_card_data(cards[i], data)
+	lib.load_card_data(cards, len(catalog))
+	lib.set_card_reader(ffi.addressof(lib, 'native_card_reader'))
+
+script_cache = ScriptCache()
+# either the script cache or a ScriptArchive, see use_script_archive()
+script_source = script_cache
+# duels may be processed in several threads at once, see process_pool.py
+script_buffers = threading.local()
 @ffi.def_extern()
 def script_reader_callback(name, lenptr):
-	fn = ffi.string(name)
-	if not os.path.exists(fn):
+	s = script_source.read(ffi.string(name))
+	if s is None:
 		lenptr[0] = 0
 		return ffi.NULL
-	s = open(fn, 'rb').read()
-	buf = ffi.buffer(scriptbuf)
-	buf[0:len(s)] = s
+	if isinstance(s, memoryview):
+		# archived scripts are handed to the core straight from the memory map
+		script_buffers.view = ffi.from_buffer(s)
+		lenptr[0] = len(s)
+		return ffi.cast('byte *', script_buffers.view)
+	# the core only reads the buffer until the next script gets requested,
+	# so one per thread is enough as long as it grows with the largest script
+	scriptbuf = getattr(script_buffers, 'buf', None)
+	if scriptbuf is None or len(s) > len(scriptbuf):
+		scriptbuf = script_buffers.buf = ffi.new('char[]', max(len(s), 131072))
+	ffi.buffer(scriptbuf, len(s))[:] = s
 	lenptr[0] = len(s)
 	return ffi.cast('byte *', scriptbuf)
 
 lib.set_script_reader(lib.script_reader_callback)
 
+def use_script_archive(path):
+	global script_source
+	script_source = ScriptArchive(path)
+
+def script_report():
+	"""A line of text on how the scripts were served so far."""
+	source = script_source
+	lookups = source.hits + source.misses
+	return "Scripts from the %s: %d hits, %d misses (%.1f%% hit rate), %.1f MB served" % ("archive" if isinstance(source, ScriptArchive) else "cache", source.hits, source.misses, 100.0 * source.hits / lookups if lookups else 0.0, source.bytes_served / 1048576.0)
+
+def reset_script_stats():
+	script_source.hits = script_source.misses = script_source.bytes_served = 0
+
+# all modules in ygo.message_handlers package will be imported here
+# if a module contains a MESSAGES dictionary attribute,
+# all of those entries will be considered message handlers
+# if a module contains a CALLBACKS dictionary attribute,
+# all of those entries will be considered callbacks for message handlers
+# all methods mentioned in those dictionaries will be linked into
+# every Duel object, same goes for all additional methods mentioned
+# in an additional METHODS dictionary attribute
+# this happens once per process, when the first duel gets created,
+# as some handlers import this module themselves
+
+registry = None
+
+def load_message_handlers():
+	"""Returns handlers as a list indexed by message id, callbacks and methods."""
+	global registry
+	if registry is not None:
+		return registry
+
+	all_handlers = {}
+
+	all_callbacks = {}
+
+	all_methods = {}
+
+	for importer, modname, ispkg in pkgutil.iter_modules(message_handlers.__path__):
+		if not ispkg:
+			try:
+				m = importlib.import_module(message_handlers.__name__ + '.' + modname)
+				# check if we got message handlers registered in there
+				handlers = m.__dict__.get('MESSAGES')
+				if type(handlers) is dict:
+					all_handlers.update(handlers)
+
+				# process callbacks defined in there
+				callbacks = m.__dict__.get('CALLBACKS')
+				if type(callbacks) is dict:
+					all_callbacks.update(callbacks)
+
+				# additional methods we shell link?
+				meths = m.__dict__.get('METHODS')
+				if type(meths) is dict:
+					all_methods.update(meths)
+
+			except Exception as e:
+				print("Error loading message handler", modname)
+				print(e)
+
+	table = [None] * 256
+	for msg, fn in all_handlers.items():
+		table[msg] = fn
+	registry = (table, all_callbacks, all_methods)
+	return registry
+
 class Duel:
-	def __init__(self, seed=None):
-		self.buf = ffi.new('char[]', 4096)
+	def __init__(self, seed=None, cores=None):
 		if seed is None:
 			seed = random.randint(0, 0xffffffff)
 		self.seed = seed
-		self.duel = lib.create_duel(seed)
-		self.cm = callback_manager.CallbackManager()
+		# duels of players may run their core in a worker process, see core_shards.py
+		if cores is not None:
+			self.core = cores.create_core(self, seed)
+		else:
+			self.core = LocalCore(seed)
+		self.cm = EventBus()
 		self.keep_processing = False
 		self.to_ep = False
 		self.to_m2 = False
@@ -78,16 +180,17 @@ class Duel:
 		self.private = False
 		self.started = False
 		self.debug_mode = False
-		self.debug_fp = None
+		self.journal = None
 		self.players = [None, None]
 		self.tag_players = []
 		self.lp = [8000, 8000]
 		self.started = False
-		self.message_map = {}
+		self.message_map = []
 		self.state = ''
 		self.cards = [None, None]
 		self.tag_cards = [None, None]
 		self.revealed = {}
+		self.mirror = FieldMirror(self.query_location)
 		self.say = Say()
 		self.watch = Watchers()
 		self.tags = [Tag(), Tag()]
@@ -95,7 +198,7 @@ class Duel:
 
 	def set_player_info(self, player, lp):
 		self.lp[player] = lp
-		lib.set_player_info(self.duel, player, lp, 5, 1)
+		self.core.set_player_info(player, lp, 5, 1)
 
 	def load_deck(self, player, shuffle=True, tag = False):
 		c = player.deck['cards'][:]
@@ -105,15 +208,18 @@ class Duel:
 			self.tag_cards[player.duel_player] = c
 		else:
 			self.cards[player.duel_player] = c
-		for sc in c[::-1]:
+		self.load_cards(player.duel_player, c, tag)
+
+	def load_cards(self, player, cards, tag=False):
+		for sc in cards[::-1]:
 			if tag is True:
-				if Card(sc).type & (TYPE_XYZ | TYPE_SYNCHRO | TYPE_FUSION | TYPE_LINK):
+				if globals.catalog.classify(sc) & CARD_EXTRA:
 					location = LOCATION_EXTRA
 				else:
 					location = LOCATION_DECK
-				lib.new_tag_card(self.duel, sc, player.duel_player, location)
+				self.core.new_tag_card(sc, player, location)
 			else:
-				lib.new_card(self.duel, sc, player.duel_player, player.duel_player, LOCATION_DECK, 0, POS_FACEDOWN_DEFENSE)
+				self.core.new_card(sc, player, player, LOCATION_DECK, 0, POS_FACEDOWN_DEFENSE)
 
 	def add_players(self, players, shuffle=True):
 		if len(players) == 4:
@@ -148,10 +254,30 @@ class Duel:
 				self.tags[i].add_recipient(self.tag_players[i])
 				self.load_deck(self.tag_players[i], shuffle, True)
 
-	def start(self, options):
+	def start_headless(self, decks, options=0, lp=(8000, 8000)):
+		"""Starts the duel with the given decks in order, without any players attached."""
+		if len(decks) == 4:
+			self.cards = [decks[0], decks[2]]
+			self.tag_cards = [decks[1], decks[3]]
+		else:
+			self.cards = list(decks)
+		for player, deck in enumerate(self.cards):
+			self.load_cards(player, deck)
+		for player, deck in enumerate(self.tag_cards):
+			if deck is not None:
+				self.load_cards(player, deck, True)
+		self.set_player_info(0, lp[0])
+		self.set_player_info(1, lp[1])
+		self.core.start(options)
+		self.started = True
+
+	def start(self, options, process=True):
+		"""Starts the duel, process=False leaves running the core to the caller."""
 		if os.environ.get('DEBUG', 0):
-			self.start_debug(options)
-		lib.start_duel(self.duel, options)
+			self.debug_mode = True
+		if self.debug_mode or globals.journal:
+			self.start_journal(options)
+		self.core.start(options)
 		self.started = True
 		for i, pl in enumerate(self.players):
 			pl.notify(pl._("Duel created. You are player %d.") % i)
@@ -161,10 +287,11 @@ class Duel:
 				pl.notify(pl._("Duel created. You are player %d.") % i)
 				pl.notify(pl._("Type help dueling for a list of usable commands."))
 				pl.notify(pl._("%s will go first.")%(self.players[i].nickname))
-		reactor.callLater(0, process_duel, self)
+		if process:
+			process_duel(self)
 
 	def end(self):
-		lib.end_duel(self.duel)
+		self.core.end()
 		self.started = False
 		for pl in self.players + self.watchers:
 			pl.duel = None
@@ -189,151 +316,183 @@ class Duel:
 		for pl in self.watchers:
 			if pl.watching is True:
 				pl.notify(pl._("Watching stopped."))
-		if self.debug_mode is True and self.debug_fp is not None:
-			self.debug_fp.close()
+		if self.journal is not None:
+			self.journal.close()
 		globals.server.check_reboot()
 
 	def process(self):
-		res = lib.process(self.duel)
-		l = lib.get_message(self.duel, ffi.cast('byte *', self.buf))
-		data = ffi.unpack(self.buf, l)
-		self.cm.call_callbacks('debug', event_type='process', result=res, data=data.decode('latin1'))
-		data = self.process_messages(data)
+		if stats.enabled:
+			start = time.perf_counter()
+			result = self.core.process()
+			stats.record_process(self, time.perf_counter() - start)
+		else:
+			result = self.core.process()
+		if result is None:
+			# the duel ended meanwhile
+			return 0x20000
+		return self.process_result(*result)
+
+	def process_result(self, res, data):
+		"""Handles the messages one process() call returned, on the reactor thread."""
+		if self.cm.has_subscribers('debug'):
+			self.cm.call_callbacks('debug', event_type='process', result=res, data=data)
+		self.process_messages(data)
+		if self.debug_mode:
+			self.check_mirror()
 		return res
 
+	def check_mirror(self):
+		if self.mirror.stale:
+			return
+		for player, location, mirror, core in self.mirror.differences():
+			self.cm.call_callbacks('debug', event_type='mirror_mismatch', player=player, location=location, mirror=repr(mirror), core=repr(core))
+			self.mirror.invalidate()
+
 	def process_messages(self, data):
-		while data:
-			msg = int(data[0])
-			fn = self.message_map.get(msg)
-			if fn:
-				data = fn(data)
-			else:
+		# messages get decoded by the layouts in message_schema,
+		# handlers only ever see the resulting records
+		reader = MessageReader(data)
+		timed = stats.enabled
+		count = 0
+		while reader.remaining > 0:
+			msg = reader.peek()
+			decode = DECODERS.get(msg)
+			if decode is None:
 				print("msg %d unhandled" % msg)
-				data = b''
-		return data
-
-	def read_cardlist(self, data, extra=False, extra8=False):
+				# whatever followed got lost, so the field has to be read again
+				self.mirror.invalidate()
+				break
+			m = decode(reader)
+			self.mirror.apply(m)
+			fn = self.message_map[msg]
+			if timed:
+				count += 1
+				if fn:
+					start = time.perf_counter()
+					fn(m)
+					stats.record_handler(self, msg, time.perf_counter() - start)
+			elif fn:
+				fn(m)
+		if timed:
+			stats.record_messages(self, len(data), count)
+
+	def get_cardlist(self, specs):
 		res = []
-		size = self.read_u8(data)
-		for i in range(size):
-			code = self.read_u32(data)
-			controller = self.read_u8(data)
-			location = self.read_u8(data)
-			sequence = self.read_u8(data)
-			card = self.get_card(controller, location, sequence)
-			card.extra = 0
-			if extra:
-				if extra8:
-					card.extra = self.read_u8(data)
-				else:
-					card.extra = self.read_u32(data)
+		for spec in specs:
+			card = self.get_card(spec.controller, spec.location, spec.sequence)
+			# records with an additional value carry it after the sequence
+			card.extra = spec[4] if len(spec) > 4 else 0
 			res.append(card)
 		return res
 
-	def read_u8(self, buf):
-		return struct.unpack('b', buf.read(1))[0]
-
-	def read_u16(self, buf):
-		return struct.unpack('h', buf.read(2))[0]
-
-	def read_u32(self, buf):
-		return struct.unpack('I', buf.read(4))[0]
-
 	def set_responsei(self, r):
-		lib.set_responsei(self.duel, r)
-		self.cm.call_callbacks('debug', event_type='set_responsei', response=r)
+		self.core.set_responsei(r)
+		if self.cm.has_subscribers('debug'):
+			self.cm.call_callbacks('debug', event_type='set_responsei', response=r)
 
 	def set_responseb(self, r):
-		buf = ffi.new('char[64]', r)
-		lib.set_responseb(self.duel, ffi.cast('byte *', buf))
-		self.cm.call_callbacks('debug', event_type='set_responseb', response=r.decode('latin1'))
+		self.core.set_responseb(r)
+		if self.cm.has_subscribers('debug'):
+			self.cm.call_callbacks('debug', event_type='set_responseb', response=r)
 
 	def get_cards_in_location(self, player, location):
+		# the current stats of cards on the field are only known to the core,
+		# cards anywhere else are fully described by the mirror
+		if location in (LOCATION_MZONE, LOCATION_SZONE):
+			return self.query_cards_in_location(player, location)
+		return self.mirror.cards(player, location)
+
+	def query_location(self, player, location):
+		data = self.core.query_field_card(player, location, QUERY_CODE | QUERY_POSITION, False)
+		bl = len(data)
+		buf = MessageReader(data)
+		res = []
+		while buf.pos < bl:
+			length = buf.u32()
+			if length == 4:
+				continue
+			# remote cores answer with more fields than asked for
+			end = buf.pos - 4 + length
+			f = buf.u32()
+			code = buf.u32()
+			res.append((code, buf.u32()))
+			buf.pos = end
+		return res
+
+	def query_cards_in_location(self, player, location):
 		cards = []
+		equips = []
 		flags = QUERY_CODE | QUERY_POSITION | QUERY_LEVEL | QUERY_RANK | QUERY_ATTACK | QUERY_DEFENSE | QUERY_EQUIP_CARD | QUERY_OVERLAY_CARD | QUERY_COUNTERS | QUERY_LINK
-		bl = lib.query_field_card(self.duel, player, location, flags, ffi.cast('byte *', self.buf), False)
-		buf = io.BytesIO(ffi.unpack(self.buf, bl))
-		while True:
-			if buf.tell() == bl:
-				break
-			length = self.read_u32(buf)
+		data = self.core.query_field_card(player, location, flags, False)
+		bl = len(data)
+		buf = MessageReader(data)
+		while buf.pos < bl:
+			length = buf.u32()
 			if length == 4:
 				continue #No card here
-			f = self.read_u32(buf)
-			code = self.read_u32(buf)
-			card = Card(code)
-			position = self.read_u32(buf)
-			card.set_location(position)
-			level = self.read_u32(buf)
+			card, equip_target = self.read_queried_card(buf, length)
+			card.equip_target = None
+			if equip_target is not None:
+				equips.append((card, equip_target))
+			cards.append(card)
+		# get_card reuses the query buffer, so equip targets are only looked up afterwards
+		for card, equip_target in equips:
+			card.equip_target = self.get_card(equip_target & 0xff, (equip_target >> 8) & 0xff, (equip_target >> 16) & 0xff)
+		return cards
+
+	def read_queried_card(self, buf, length):
+		"""
+		Reads one card of a query result by the flags the core wrote.
+
+		Returns the card and the location info of its equip target, or None.
+		"""
+		end = buf.pos - 4 + length
+		f = buf.u32()
+		card = Card(buf.u32())
+		card.set_location(buf.u32())
+		if f & QUERY_LEVEL:
+			level = buf.u32()
 			if (level & 0xff) > 0:
 				card.level = level & 0xff
-			rank = self.read_u32(buf)
+		if f & QUERY_RANK:
+			rank = buf.u32()
 			if (rank & 0xff) > 0:
 				card.level = rank & 0xff
-			card.attack = self.read_u32(buf)
-			card.defense = self.read_u32(buf)
-
-			card.equip_target = None
-
-			if f & QUERY_EQUIP_CARD == QUERY_EQUIP_CARD: # optional
-
-				equip_target = self.read_u32(buf)
-				pl = equip_target & 0xff
-				loc = (equip_target >> 8) & 0xff
-				seq = (equip_target >> 16) & 0xff
-				card.equip_target = self.get_card(pl, loc, seq)
-
-			card.xyz_materials = []
-
-			xyz = self.read_u32(buf)
-
-			for i in range(xyz):
-				card.xyz_materials.append(Card(self.read_u32(buf)))
-
-			cs = self.read_u32(buf)
-			card.counters = []
-			for i in range(cs):
-				card.counters.append(self.read_u32(buf))
-
-			link = self.read_u32(buf)
-			link_marker = self.read_u32(buf)
-
+		if f & QUERY_ATTACK:
+			card.attack = buf.u32()
+		if f & QUERY_DEFENSE:
+			card.defense = buf.u32()
+		equip_target = buf.u32() if f & QUERY_EQUIP_CARD else None
+		if f & QUERY_OVERLAY_CARD:
+			card.xyz_materials = [Card(c) for c in buf.u32s(buf.u32())]
+		if f & QUERY_COUNTERS:
+			card.counters = list(buf.u32s(buf.u32()))
+		if f & QUERY_LINK:
+			link = buf.u32()
+			link_marker = buf.u32()
 			if (link & 0xff) > 0:
 				card.level = link & 0xff
-
 			if link_marker > 0:
 				card.defense = link_marker
+		buf.pos = end
+		return card, equip_target
 
-			cards.append(card)
-		return cards
+	def query_field(self):
+		"""Snapshot of both fields, taken with a single call into the core."""
+		data = self.core.query_field_snapshot()
+		if not len(data):
+			# a worker which failed to take the snapshot answers with nothing
+			raise RuntimeError("couldn't take a field snapshot")
+		return FieldSnapshot(data)
 
 	def get_card(self, player, loc, seq):
 		flags = QUERY_CODE | QUERY_ATTACK | QUERY_DEFENSE | QUERY_POSITION | QUERY_LEVEL | QUERY_RANK | QUERY_LINK
-		bl = lib.query_card(self.duel, player, loc, seq, flags, ffi.cast('byte *', self.buf), False)
-		buf = io.BytesIO(ffi.unpack(self.buf, bl))
-		f = self.read_u32(buf)
-		if f == 4:
+		data = self.core.query_card(player, loc, seq, flags, False)
+		buf = MessageReader(data)
+		length = buf.u32()
+		if length == 4:
 			return
-		f = self.read_u32(buf)
-		code = self.read_u32(buf)
-		card = Card(code)
-		position = self.read_u32(buf)
-		card.set_location(position)
-		level = self.read_u32(buf)
-		if (level & 0xff) > 0:
-			card.level = level & 0xff
-		rank = self.read_u32(buf)
-		if (rank & 0xff) > 0:
-			card.level = rank & 0xff
-		card.attack = self.read_u32(buf)
-		card.defense = self.read_u32(buf)
-		link = self.read_u32(buf)
-		link_marker = self.read_u32(buf)
-		if (link & 0xff) > 0:
-			card.level = link & 0xff
-		if link_marker > 0:
-			card.defense = link_marker
-		return card
+		return self.read_queried_card(buf, length)[0]
 
 	def unpack_location(self, loc):
 		controller = loc & 0xff
@@ -342,57 +501,22 @@ class Duel:
 		position = (loc >> 24) & 0xff
 		return (controller, location, sequence, position)
 
-	# all modules in ygo.message_handlers package will be imported here
-	# if a module contains a MESSAGES dictionary attribute,
-	# all of those entries will be considered message handlers
-	# if a module contains a CALLBACKS dictionary attribute,
-	# all of those entries will be considered callbacks for message handlers
-	# all methods mentioned in those dictionaries will be linked into
-	# the Duel object, same goes for all additional methods mentioned
-	# in an additional METHODS dictionary attribute
-
 	def bind_message_handlers(self):
-
-		all_handlers = {}
-
-		all_callbacks = {}
-
-		all_methods = {}
-
-		for importer, modname, ispkg in pkgutil.iter_modules(message_handlers.__path__):
-			if not ispkg:
-				try:
-					m = importer.find_module(modname).load_module(modname)
-					# check if we got message handlers registered in there
-					handlers = m.__dict__.get('MESSAGES')
-					if type(handlers) is dict:
-						all_handlers.update(handlers)
-
-					# process callbacks defined in there
-					callbacks = m.__dict__.get('CALLBACKS')
-					if type(callbacks) is dict:
-						all_callbacks.update(callbacks)
-
-					# additional methods we shell link?
-					meths = m.__dict__.get('METHODS')
-					if type(meths) is dict:
-						all_methods.update(meths)
-
-				except Exception as e:
-					print("Error loading message handler", modname)
-					print(e)
-
+		handlers, callbacks, methods = load_message_handlers()
 		# link all those methods into this object
-		for h in all_handlers.keys():
-			m = all_handlers[h].__get__(self)
-			setattr(self, all_handlers[h].__name__, m)
-			self.message_map[h] = m
-		for c in all_callbacks.keys():
-			m = all_callbacks[c].__get__(self)
-			setattr(self, all_callbacks[c].__name__, m)
+		self.message_map = [None] * len(handlers)
+		for msg, fn in enumerate(handlers):
+			if fn is None:
+				continue
+			m = fn.__get__(self)
+			setattr(self, fn.__name__, m)
+			self.message_map[msg] = m
+		for c in callbacks.keys():
+			m = callbacks[c].__get__(self)
+			setattr(self, callbacks[c].__name__, m)
 			self.cm.register_callback(c, m)
-		for n in all_methods.keys():
-			setattr(self, n, all_methods[n].__get__(self))
+		for n in methods.keys():
+			setattr(self, n, methods[n].__get__(self))
 
 	def show_usable(self, pl):
 		summonable = natsort.natsorted([card.get_spec(pl.duel_player) for card in self.summonable])
@@ -466,8 +590,9 @@ class Duel:
 		return "{name} ({spec})".format(name=name, spec=spec)
 
 	def show_table(self, pl, player, hide_facedown=False):
-		mz = self.get_cards_in_location(player, LOCATION_MZONE)
-		sz = self.get_cards_in_location(player, LOCATION_SZONE)
+		field = self.query_field()
+		mz = field.cards(player, LOCATION_MZONE)
+		sz = field.cards(player, LOCATION_SZONE)
 		if len(mz+sz) == 0:
 			pl.notify(pl._("Table is empty."))
 			return
@@ -523,7 +648,7 @@ class Duel:
 
 		for card in mz:
 			if card.type & TYPE_LINK:
-				zone = self.get_linked_zone(card)
+				zone = self.linked_zone_specs(field.linked_zone(card))
 				if zone == '':
 					continue
 				pl.notify(pl._("Zone linked by %s (%s): %s")%(card.get_name(pl), card.get_spec(player), zone))
@@ -547,14 +672,15 @@ class Duel:
 
 	def show_score(self, pl):
 		player = pl.duel_player
-		deck = lib.query_field_count(self.duel, player, LOCATION_DECK)
-		odeck = lib.query_field_count(self.duel, 1 - player, LOCATION_DECK)
-		grave = lib.query_field_count(self.duel, player, LOCATION_GRAVE)
-		ograve = lib.query_field_count(self.duel, 1 - player, LOCATION_GRAVE)
-		hand = lib.query_field_count(self.duel, player, LOCATION_HAND)
-		ohand = lib.query_field_count(self.duel, 1 - player, LOCATION_HAND)
-		removed = lib.query_field_count(self.duel, player, LOCATION_REMOVED)
-		oremoved = lib.query_field_count(self.duel, 1 - player, LOCATION_REMOVED)
+		field = self.query_field()
+		deck = field.count(player, LOCATION_DECK)
+		odeck = field.count(1 - player, LOCATION_DECK)
+		grave = field.count(player, LOCATION_GRAVE)
+		ograve = field.count(1 - player, LOCATION_GRAVE)
+		hand = field.count(player, LOCATION_HAND)
+		ohand = field.count(1 - player, LOCATION_HAND)
+		removed = field.count(player, LOCATION_REMOVED)
+		oremoved = field.count(1 - player, LOCATION_REMOVED)
 		if pl.watching:
 			if self.tag is True:
 				nick0 = pl._("team %s")%(self.players[0].nickname+", "+self.tag_players[0].nickname)
@@ -584,7 +710,7 @@ class Duel:
 	def show_info(self, card, pl):
 		pln = pl.duel_player
 		cs = card.get_spec(pln)
-		if card.position in (0x8, 0xa) and (pl.watching or card in self.get_cards_in_location(1 - pln, LOCATION_MZONE) + self.get_cards_in_location(1 - pln, LOCATION_SZONE)):
+		if card.position in (0x8, 0xa) and (pl.watching or card in self.mirror.cards(1 - pln, LOCATION_MZONE) + self.mirror.cards(1 - pln, LOCATION_SZONE)):
 			pl.notify(pl._("%s: %s card.") % (cs, card.get_position(pl)))
 			return
 		pl.notify(card.get_info(pl))
@@ -593,7 +719,7 @@ class Duel:
 		cards = []
 		for i in (0, 1):
 			for j in (LOCATION_MZONE, LOCATION_SZONE, LOCATION_GRAVE, LOCATION_REMOVED, LOCATION_HAND, LOCATION_EXTRA):
-				cards.extend(card for card in self.get_cards_in_location(i, j) if card.controller == pl.duel_player or card.position not in (0x8, 0xa))
+				cards.extend(card for card in self.mirror.cards(i, j) if card.controller == pl.duel_player or card.position not in (0x8, 0xa))
 		specs = {}
 		for card in cards:
 			specs[card.get_spec(pl.duel_player)] = card
@@ -602,10 +728,15 @@ class Duel:
 		if spec not in specs:
 			pl.notify(pl._("Invalid card."))
 			return
-		self.show_info(specs[spec], pl)
-
-	def start_debug(self, options):
-		self.debug_mode = True
+		card = specs[spec]
+		if card.location in (LOCATION_MZONE, LOCATION_SZONE) and not spec.isdigit():
+			# stats and materials of field cards come from the core
+			card = next((c for c in self.get_cards_in_location(card.controller, card.location) if c.sequence == card.sequence), card)
+		self.show_info(card, pl)
+
+	def start_journal(self, options):
+		# nothing listens to debug events unless a journal gets written
+		self.cm.register_callback('debug', self.debug)
 		lt = datetime.datetime.now().strftime('%Y-%m-%d_%H:%M:%S')
 		if self.tag is True:
 			pl0 = self.players[0].nickname+","+self.tag_players[0].nickname
@@ -614,7 +745,7 @@ class Duel:
 			pl0 = self.players[0].nickname
 			pl1 = self.players[1].nickname
 		fn = lt+"_"+pl0+"_"+pl1
-		self.debug_fp = open(os.path.join('duels', fn), 'w')
+		self.journal = DuelJournal(os.path.join('duels', fn))
 		if self.tag is True:
 			players = [self.players[0].nickname, self.tag_players[0].nickname, self.players[1].nickname, self.tag_players[1].nickname]
 			decks = [self.cards[0], self.tag_cards[0], self.cards[1], self.tag_cards[1]]
@@ -680,10 +811,11 @@ class Duel:
 			pl.notify(pl._("The duel is currently paused due to not all players being connected."))
 
 	def get_linked_zone(self, card):
+		return self.linked_zone_specs(self.core.query_linked_zone(card.controller, card.location, card.sequence))
 
-		lst = []
+	def linked_zone_specs(self, zone):
 
-		zone = lib.query_linked_zone(self.duel, card.controller, card.location, card.sequence)
+		lst = []
 
 		i = 0
 
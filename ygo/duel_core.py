@@ -0,0 +1,101 @@
+from _duel import ffi, lib
+import struct
+import threading
+
+EMPTY_CARD = struct.pack('<I', 4)
+
+class LocalCore:
+	"""
+	The core state of a duel, living in this process.
+
+	Duel only talks to the core through these methods, so that it can live in
+	a worker process just as well, see core_shards.py. Buffers returned by
+	process() and the queries stay valid until the next call of the same kind.
+	"""
+
+	# processed by process_duel itself or the process pool, not by a shard
+	runner = None
+
+	def __init__(self, seed):
+		self.duel = lib.create_duel(seed)
+		self.buf = ffi.new('char[]', 4096)
+		# messages get decoded straight out of buf, so queries need a buffer of their own
+		self.query_buf = ffi.new('char[]', 4096)
+		# held while the core runs in a pool thread, anything else touching it has to wait;
+		# reentrant so a worker can hold it across process() and the queries that follow
+		self.lock = threading.RLock()
+		self.ended = False
+
+	def set_player_info(self, player, lp, start_count, draw_count):
+		lib.set_player_info(self.duel, player, lp, start_count, draw_count)
+
+	def new_card(self, code, owner, player, location, sequence, position):
+		lib.new_card(self.duel, code, owner, player, location, sequence, position)
+
+	def new_tag_card(self, code, owner, location):
+		lib.new_tag_card(self.duel, code, owner, location)
+
+	def start(self, options):
+		lib.start_duel(self.duel, options)
+
+	def end(self):
+		with self.lock:
+			if not self.ended:
+				lib.end_duel(self.duel)
+				self.ended = True
+
+	def process(self, buf=None):
+		"""Runs the core once, returns the result and the messages in buf, or None once the duel ended."""
+		if buf is None:
+			buf = self.buf
+		with self.lock:
+			if self.ended:
+				return None
+			res = lib.process(self.duel)
+			l = lib.get_message(self.duel, ffi.cast('byte *', buf))
+		return res, ffi.buffer(buf, l)
+
+	def set_responsei(self, r):
+		with self.lock:
+			if not self.ended:
+				lib.set_responsei(self.duel, r)
+
+	def set_responseb(self, r):
+		buf = ffi.new('char[64]', r)
+		with self.lock:
+			if not self.ended:
+				lib.set_responseb(self.duel, ffi.cast('byte *', buf))
+
+	def query_card(self, player, location, sequence, flags, use_cache):
+		with self.lock:
+			if self.ended:
+				# an empty record, just its length
+				return EMPTY_CARD
+			bl = lib.query_card(self.duel, player, location, sequence, flags, ffi.cast('byte *', self.query_buf), use_cache)
+		return ffi.buffer(self.query_buf, bl)
+
+	def query_field_card(self, player, location, flags, use_cache):
+		with self.lock:
+			if self.ended:
+				return b''
+			bl = lib.query_field_card(self.duel, player, location, flags, ffi.cast('byte *', self.query_buf), use_cache)
+		return ffi.buffer(self.query_buf, bl)
+
+	def query_field_snapshot(self):
+		with self.lock:
+			if self.ended:
+				return b''
+			bl = lib.query_field_snapshot(self.duel, ffi.cast('byte *', self.query_buf), len(self.query_buf))
+			if bl < 0:
+				# a crowded field, the buffer has to grow to the size the core asked for
+				self.query_buf = ffi.new('char[]', -bl)
+				bl = lib.query_field_snapshot(self.duel, ffi.cast('byte *', self.query_buf), len(self.query_buf))
+		if bl < 0:
+			raise RuntimeError("field snapshot doesn't fit into %d bytes" % len(self.query_buf))
+		return ffi.buffer(self.query_buf, bl)
+
+	def query_linked_zone(self, player, location, sequence):
+		with self.lock:
+			if self.ended:
+				return 0
+			return lib.query_linked_zone(self.duel, player, location, sequence)
@@ -0,0 +1,228 @@
+import itertools
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+MAGIC = b'YGOJRN01'
+# magic, seed, options, lp of both players, number of players
+HEADER = struct.Struct('<8sIIiiB')
+# record type, length of the payload following
+RECORD = struct.Struct('<BI')
+
+RECORD_PROCESS = 1
+RECORD_RESPONSEI = 2
+RECORD_RESPONSEB = 3
+# anything else worth keeping, as json
+RECORD_NOTE = 4
+
+# result of process(), optionally followed by the crc32 of the messages it returned
+PROCESS = struct.Struct('<I')
+PROCESS_CHECKSUM = struct.Struct('<II')
+RESPONSEI = struct.Struct('<i')
+
+def encode_header(seed, options, lp, players, decks):
+	data = HEADER.pack(MAGIC, seed, options, lp[0], lp[1], len(players))
+	for name, deck in zip(players, decks):
+		name = name.encode('utf-8')
+		data += struct.pack('<B', len(name)) + name + struct.pack('<H%dI' % len(deck), len(deck), *deck)
+	return data
+
+def encode_record(type, payload):
+	return RECORD.pack(type, len(payload)) + payload
+
+class JournalWriter:
+	"""
+	Background thread writing journals to disk.
+
+	Records are only queued by the reactor thread. The thread writes them in
+	batches and syncs the files it wrote to at most once per interval.
+	"""
+
+	def __init__(self, interval=1.0):
+		self.interval = interval
+		self.queue = queue.Queue()
+		self.thread = None
+		self.lock = threading.Lock()
+
+	def submit(self, fp, data):
+		"""Queues data to be written to fp, None closes it after everything before got written."""
+		if self.thread is None:
+			with self.lock:
+				if self.thread is None:
+					self.thread = threading.Thread(target=self.run, name='journal writer', daemon=True)
+					self.thread.start()
+		self.queue.put((fp, data))
+
+	def wait(self):
+		"""Blocks until everything queued so far was written."""
+		self.queue.join()
+
+	def run(self):
+		dirty = set()
+		last_sync = time.monotonic()
+		while True:
+			timeout = None
+			if dirty:
+				timeout = max(0, self.interval - (time.monotonic() - last_sync))
+			batch = []
+			try:
+				batch.append(self.queue.get(timeout=timeout))
+				while True:
+					batch.append(self.queue.get_nowait())
+			except queue.Empty:
+				pass
+			for fp, data in batch:
+				if data is None:
+					self.sync(fp)
+					fp.close()
+					dirty.discard(fp)
+				else:
+					fp.write(data)
+					dirty.add(fp)
+			if dirty and time.monotonic() - last_sync >= self.interval:
+				for fp in dirty:
+					self.sync(fp)
+				dirty.clear()
+				last_sync = time.monotonic()
+			for item in batch:
+				self.queue.task_done()
+
+	def sync(self, fp):
+		fp.flush()
+		os.fsync(fp.fileno())
+
+writer = JournalWriter()
+
+class DuelJournal:
+	"""
+	Binary journal of a duel, everything needed to replay it.
+
+	A header with seed, options, lp, players and decks,
+	followed by length-prefixed records of every process() call and response.
+	"""
+
+	# process records pile up between two responses, they get handed over together
+	max_pending = 64
+
+	def __init__(self, path, checksums=True, writer=writer):
+		self.fp = open(path, 'wb')
+		self.checksums = checksums
+		self.writer = writer
+		self.pending = []
+
+	def flush(self):
+		if self.pending:
+			self.writer.submit(self.fp, b''.join(self.pending))
+			self.pending = []
+
+	def start(self, seed, options, lp, players, decks):
+		self.writer.submit(self.fp, encode_header(seed, options, lp, players, decks))
+
+	def process(self, result, data=None):
+		if self.checksums and data is not None:
+			payload = PROCESS_CHECKSUM.pack(result, zlib.crc32(data))
+		else:
+			payload = PROCESS.pack(result)
+		self.pending.append(encode_record(RECORD_PROCESS, payload))
+		if len(self.pending) >= self.max_pending:
+			self.flush()
+
+	def response_int(self, response):
+		self.pending.append(encode_record(RECORD_RESPONSEI, RESPONSEI.pack(response)))
+		self.flush()
+
+	def response_bytes(self, response):
+		self.pending.append(encode_record(RECORD_RESPONSEB, response))
+		self.flush()
+
+	def note(self, **kwargs):
+		self.pending.append(encode_record(RECORD_NOTE, json.dumps(kwargs).encode('utf-8')))
+		self.flush()
+
+	def close(self):
+		self.flush()
+		self.writer.submit(self.fp, None)
+
+def read_journal(path):
+	"""Yields the events of a binary journal, the same way they appear in json duel logs."""
+	with open(path, 'rb') as fp:
+		data = fp.read()
+	magic, seed, options, lp0, lp1, count = HEADER.unpack_from(data)
+	if magic != MAGIC:
+		raise ValueError("%s is no duel journal" % path)
+	pos = HEADER.size
+	players = []
+	decks = []
+	for i in range(count):
+		length = data[pos]
+		players.append(data[pos + 1:pos + 1 + length].decode('utf-8'))
+		pos += 1 + length
+		cards, = struct.unpack_from('<H', data, pos)
+		decks.append(list(struct.unpack_from('<%dI' % cards, data, pos + 2)))
+		pos += 2 + cards * 4
+	yield {'event_type': 'start', 'players': players, 'decks': decks, 'seed': seed, 'options': options, 'lp': [lp0, lp1]}
+	while pos + RECORD.size <= len(data):
+		type, length = RECORD.unpack_from(data, pos)
+		pos += RECORD.size
+		payload = data[pos:pos + length]
+		pos += length
+		if len(payload) < length:
+			# the server went down while writing this record
+			break
+		if type == RECORD_PROCESS:
+			event = {'event_type': 'process', 'result': PROCESS.unpack_from(payload)[0]}
+			if length == PROCESS_CHECKSUM.size:
+				event['checksum'] = PROCESS_CHECKSUM.unpack(payload)[1]
+			yield event
+		elif type == RECORD_RESPONSEI:
+			yield {'event_type': 'set_responsei', 'response': RESPONSEI.unpack(payload)[0]}
+		elif type == RECORD_RESPONSEB:
+			yield {'event_type': 'set_responseb', 'response': payload.decode('latin1')}
+		elif type == RECORD_NOTE:
+			yield json.loads(payload.decode('utf-8'))
+
+def read_events(path):
+	"""Events of a duel log, either a binary journal or json lines."""
+	with open(path, 'rb') as fp:
+		binary = fp.read(len(MAGIC)) == MAGIC
+	if binary:
+		return list(read_journal(path))
+	with open(path) as fp:
+		return [json.loads(line) for line in fp]
+
+def write_journal(path, events, checksums=True):
+	"""
+	Writes events of a json duel log into a binary journal.
+
+	The messages of process events don't get copied, only their crc32 is kept
+	so replays can verify them. The core returns the same messages again when
+	the journal gets replayed.
+	"""
+	events = iter(events)
+	first = next(events, None)
+	if first is None or first['event_type'] != 'start':
+		raise ValueError("a duel log has to begin with its start event")
+	with open(path, 'wb') as fp:
+		for event in itertools.chain([first], events):
+			t = event['event_type']
+			if t == 'start':
+				lp = event.get('lp', [8000, 8000])
+				fp.write(encode_header(event.get('seed', 0), event.get('options', 0), lp, event.get('players', []), event.get('decks', [])))
+			elif t == 'process':
+				if checksums and 'checksum' in event:
+					payload = PROCESS_CHECKSUM.pack(event['result'], event['checksum'])
+				elif checksums and 'data' in event:
+					payload = PROCESS_CHECKSUM.pack(event['result'], zlib.crc32(event['data'].encode('latin1')))
+				else:
+					payload = PROCESS.pack(event['result'])
+				fp.write(encode_record(RECORD_PROCESS, payload))
+			elif t == 'set_responsei':
+				fp.write(encode_record(RECORD_RESPONSEI, RESPONSEI.pack(event['response'])))
+			elif t == 'set_responseb':
+				fp.write(encode_record(RECORD_RESPONSEB, event['response'].encode('latin1')))
+			else:
+				fp.write(encode_record(RECORD_NOTE, json.dumps(event).encode('utf-8')))
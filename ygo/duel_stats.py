@@ -0,0 +1,108 @@
+import time
+import weakref
+
+from .message_schema import SCHEMA
+
+class Histogram:
+	"""Counts values in power of two buckets, cheap enough to fill for every message."""
+
+	__slots__ = ('counts', 'count', 'total', 'max')
+
+	def __init__(self):
+		self.counts = [0] * 64
+		self.count = 0
+		self.total = 0
+		self.max = 0
+
+	def add(self, value):
+		self.counts[min(int(value).bit_length(), 63)] += 1
+		self.count += 1
+		self.total += value
+		if value > self.max:
+			self.max = value
+
+	def percentile(self, p):
+		"""Upper bound of the bucket holding the p-th percentile."""
+		if not self.count:
+			return 0
+		rank = self.count * p / 100.0
+		seen = 0
+		for i, n in enumerate(self.counts):
+			seen += n
+			if seen >= rank:
+				return min(1 << i, self.max)
+		return self.max
+
+	@property
+	def mean(self):
+		return self.total / self.count if self.count else 0
+
+class DuelStats:
+	"""
+	Where the time of duels goes, collected while enabled.
+
+	Times are kept in microseconds: lib.process per call, and every message
+	handler by message id. Besides that the bytes and number of messages each
+	call returned, and per duel totals to find the slowest ones. While disabled,
+	Duel only pays for checking the flag.
+	"""
+
+	def __init__(self):
+		self.enabled = False
+		self.reset()
+
+	def reset(self):
+		self.since = time.time()
+		self.process_time = Histogram()
+		self.process_bytes = Histogram()
+		self.messages = Histogram()
+		self.handlers = {}
+		# duel -> [process calls, microseconds in the core, microseconds in handlers, slowest call]
+		self.duels = weakref.WeakKeyDictionary()
+
+	def duel(self, duel):
+		entry = self.duels.get(duel)
+		if entry is None:
+			entry = self.duels[duel] = [0, 0, 0, 0]
+		return entry
+
+	def record_process(self, duel, seconds):
+		us = seconds * 1000000
+		self.process_time.add(us)
+		entry = self.duel(duel)
+		entry[0] += 1
+		entry[1] += us
+		if us > entry[3]:
+			entry[3] = us
+
+	def record_messages(self, duel, size, count):
+		self.process_bytes.add(size)
+		self.messages.add(count)
+
+	def record_handler(self, duel, msg, seconds):
+		us = seconds * 1000000
+		histogram = self.handlers.get(msg)
+		if histogram is None:
+			histogram = self.handlers[msg] = Histogram()
+		histogram.add(us)
+		self.duel(duel)[2] += us
+
+	def report(self, slowest=5):
+		"""Lines of text summing up everything collected so far."""
+		lines = ["Collected over %d seconds%s." % (time.time() - self.since, "" if self.enabled else ", currently disabled")]
+		row = "%-24s %8d %10.1f %10d %10d %10d"
+		lines.append("%-24s %8s %10s %10s %10s %10s" % ("", "count", "mean", "p50", "p99", "max"))
+		for name, histogram in (("process (us)", self.process_time), ("process (bytes)", self.process_bytes), ("messages per call", self.messages)):
+			lines.append(row % (name, histogram.count, histogram.mean, histogram.percentile(50), histogram.percentile(99), histogram.max))
+		for msg, histogram in sorted(self.handlers.items(), key=lambda item: item[1].total, reverse=True):
+			name = "%s=%d (us)" % (SCHEMA[msg][0] if msg in SCHEMA else "msg", msg)
+			lines.append(row % (name, histogram.count, histogram.mean, histogram.percentile(50), histogram.percentile(99), histogram.max))
+		duels = sorted(self.duels.items(), key=lambda item: item[1][1] + item[1][2], reverse=True)[:slowest]
+		if duels:
+			lines.append("Slowest duels:")
+		for duel, (calls, core, handlers, slowest_call) in duels:
+			players = ", ".join(pl.nickname for pl in duel.players + duel.tag_players if pl is not None)
+			lines.append("%s: %d calls, %.1f ms in the core, %.1f ms in handlers, slowest call %.1f ms" % (players or "no players", calls, core / 1000, handlers / 1000, slowest_call / 1000))
+		return lines
+
+stats = DuelStats()
@@ -0,0 +1,56 @@
+from logging import getLogger
+logger = getLogger('event_bus')
+
+class EventBus(object):
+	"""
+	Associates callbacks with events and calls them all when that event happens.
+
+	Subscribers are kept as a tuple per event type, so emitting an event nobody
+	listens to costs a single dict lookup. Callbacks registered for '*' get every
+	event, with its type as first argument.
+	"""
+
+	def __init__(self):
+		self.subscribers = {}
+		self.wildcard = ()
+
+	def register_callback(self, event_type, callback):
+		"""Registers a callback as a callable to an event type, which can be anything hashable"""
+		if event_type == '*':
+			self.wildcard += (callback,)
+		else:
+			self.subscribers[event_type] = self.subscribers.get(event_type, ()) + (callback,)
+
+	def unregister_callback(self, event_type, callback):
+		"""Unregisters a callback from an event type"""
+		if event_type == '*':
+			callbacks = list(self.wildcard)
+			callbacks.remove(callback)
+			self.wildcard = tuple(callbacks)
+			return
+		callbacks = list(self.subscribers[event_type])
+		callbacks.remove(callback)
+		if callbacks:
+			self.subscribers[event_type] = tuple(callbacks)
+		else:
+			del self.subscribers[event_type]
+
+	def has_subscribers(self, event_type):
+		"""Whether emitting an event would reach anyone, to skip building expensive arguments."""
+		return event_type in self.subscribers or bool(self.wildcard)
+
+	def call_callbacks(self, type, *args, **kwargs):
+		"""Calls all callbacks for a given event type with the provided args and kwargs"""
+		callbacks = self.subscribers.get(type)
+		if callbacks is not None:
+			for callback in callbacks:
+				try:
+					callback(*args, **kwargs)
+				except Exception as e:
+					logger.exception("Error calling callback %r" % callback)
+		if self.wildcard:
+			for callback in self.wildcard:
+				try:
+					callback(type, *args, **kwargs)
+				except Exception as e:
+					logger.exception("Error calling callback %r" % callback)
@@ -0,0 +1,185 @@
+from .card import Card
+from .constants import *
+
+LOCATIONS = (LOCATION_DECK, LOCATION_HAND, LOCATION_MZONE, LOCATION_SZONE, LOCATION_GRAVE, LOCATION_REMOVED, LOCATION_EXTRA)
+# zones keep their sequence, all other locations are piles which close up gaps
+ZONES = (LOCATION_MZONE, LOCATION_SZONE)
+# messages which leave every card where it is, any other message the mirror
+# doesn't follow itself might have moved some, so it goes stale
+UNMOVED = frozenset((
+	1, 2, 5, 10, 11, 12, 13, 14, 15, 16, 18, 19, 20, 21, 22, 23, 24, 25,
+	31, 38, 40, 41, 54, 56, 60, 61, 62, 64, 70, 73, 83, 91, 92, 93, 94,
+	100, 101, 102, 110, 111, 113, 114, 130, 131, 140, 141, 142, 143, 144,
+))
+
+def split_location(loc):
+	return loc & 0xff, (loc >> 8) & 0xff, (loc >> 16) & 0xff, (loc >> 24) & 0xff
+
+class FieldMirror:
+	"""
+	Copy of which card lies where, kept up to date from the messages of a duel.
+
+	Only codes and positions get mirrored, everything else the core computes
+	(current stats, counters, equips, materials) still has to be queried.
+	Whenever the mirror can't follow a message it goes stale and reads
+	the whole field from the core the next time it is used.
+	"""
+
+	def __init__(self, query):
+		# query(player, location) returns (code, location info) of all cards the core has there
+		self.query = query
+		self.locations = {}
+		self.stale = True
+		self.syncs = 0
+		self.handlers = {
+			32: self.shuffle_deck,
+			33: self.shuffle_pile,
+			39: self.shuffle_pile,
+			50: self.move,
+			53: self.pos_change,
+			55: self.swap,
+			90: self.draw,
+		}
+
+	def read(self, player, location):
+		"""Contents of a location as the core sees it."""
+		if location in ZONES:
+			entries = {}
+			for code, info in self.query(player, location):
+				entries[(info >> 16) & 0xff] = (code, info >> 24)
+		else:
+			entries = [(code, info >> 24) for code, info in self.query(player, location)]
+		return entries
+
+	def sync(self):
+		for player in (0, 1):
+			for location in LOCATIONS:
+				self.locations[player, location] = self.read(player, location)
+		self.stale = False
+		self.syncs += 1
+
+	def invalidate(self):
+		self.stale = True
+
+	def apply(self, m):
+		"""Follows a decoded message, if it moves cards around."""
+		if self.stale:
+			return
+		fn = self.handlers.get(m.msg)
+		if fn:
+			fn(m)
+		elif m.msg not in UNMOVED:
+			self.stale = True
+
+	def cards(self, player, location):
+		"""Cards of a location, carrying code, place and position only."""
+		if self.stale:
+			self.sync()
+		entries = self.locations[player, location]
+		if location in ZONES:
+			entries = sorted(entries.items())
+		else:
+			entries = enumerate(entries)
+		res = []
+		for seq, (code, position) in entries:
+			card = Card(code)
+			card.controller = player
+			card.location = location
+			card.sequence = seq
+			card.position = position
+			res.append(card)
+		return res
+
+	def take(self, player, location, seq, code):
+		entries = self.locations[player, location]
+		if location in ZONES:
+			if entries.pop(seq, None) is None:
+				self.stale = True
+			return
+		# cards leaving a pile together all report the sequence they had before the first one left
+		if seq < len(entries) and entries[seq][0] == code:
+			del entries[seq]
+			return
+		for i, entry in enumerate(entries):
+			if entry[0] == code:
+				del entries[i]
+				return
+		self.stale = True
+
+	def put(self, player, location, seq, entry):
+		entries = self.locations[player, location]
+		if location in ZONES:
+			entries[seq] = entry
+		else:
+			entries.insert(seq, entry)
+
+	def move(self, m):
+		cp, l, s, p = split_location(m.location)
+		ncp, nl, ns, np = split_location(m.newloc)
+		# xyz materials aren't part of any location
+		if l and not l & LOCATION_OVERLAY:
+			self.take(cp, l, s, m.code)
+		if nl and not nl & LOCATION_OVERLAY:
+			self.put(ncp, nl, ns, (m.code, np))
+
+	def pos_change(self, m):
+		entries = self.locations[m.controller, m.location]
+		if m.location not in ZONES or m.sequence not in entries:
+			self.stale = True
+			return
+		entries[m.sequence] = (entries[m.sequence][0], m.position)
+
+	def swap(self, m):
+		# both cards are reported with the places they ended up in
+		for code, loc in ((m.code1, m.location1), (m.code2, m.location2)):
+			cp, l, s, p = split_location(loc)
+			if l not in ZONES:
+				self.stale = True
+				return
+			self.locations[cp, l][s] = (code, p)
+
+	def draw(self, m):
+		deck = self.locations[m.player, LOCATION_DECK]
+		hand = self.locations[m.player, LOCATION_HAND]
+		for code in m.cards:
+			if not deck:
+				self.stale = True
+				return
+			deck.pop()
+			hand.append((code & 0x7fffffff, POS_FACEUP if code & 0x80000000 else POS_FACEDOWN))
+
+	def shuffle_deck(self, m):
+		# the new order stays secret, only the number of cards is known
+		deck = self.locations[m.player, LOCATION_DECK]
+		deck[:] = [(0, POS_FACEDOWN_DEFENSE)] * len(deck)
+
+	def shuffle_pile(self, m):
+		location = LOCATION_HAND if m.msg == 33 else LOCATION_EXTRA
+		entries = self.locations[m.player, location]
+		if len(entries) != len(m.cards):
+			self.stale = True
+			return
+		positions = {}
+		for code, position in entries:
+			positions.setdefault(code, []).append(position)
+		try:
+			entries[:] = [(code, positions[code].pop()) for code in m.cards]
+		except (KeyError, IndexError):
+			self.stale = True
+
+	def differences(self):
+		"""Locations in which the mirror and the core disagree, as (player, location, mirror, core)."""
+		res = []
+		for (player, location), entries in sorted(self.locations.items()):
+			core = self.read(player, location)
+			if location == LOCATION_DECK:
+				# the deck order is unknown after shuffling, so only its size can be compared
+				same = len(entries) == len(core)
+			elif location in ZONES:
+				same = entries == core
+			else:
+				# a card in a pile is either public or not, the exact position doesn't matter
+				same = [(code, bool(p & POS_FACEUP)) for code, p in entries] == [(code, bool(p & POS_FACEUP)) for code, p in core]
+			if not same:
+				res.append((player, location, entries, core))
+		return res
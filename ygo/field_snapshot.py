@@ -0,0 +1,70 @@
+import struct
+
+from .card import Card
+from .constants import *
+from .message_reader import MessageReader
+
+PILES = (LOCATION_DECK, LOCATION_HAND, LOCATION_GRAVE, LOCATION_REMOVED, LOCATION_EXTRA)
+# location info, attack, defense, level, rank, link, link marker, linked zone, equip target
+ZONE = struct.Struct('<9I')
+
+class FieldSnapshot:
+	"""
+	Both players' fields as written by query_field_snapshot() in duel_build.py.
+
+	Holds the number of cards in every pile and the cards in all monster and
+	spell zones, with their current stats, linked zones and equip targets.
+	"""
+
+	def __init__(self, data):
+		reader = MessageReader(data)
+		self.counts = {}
+		self.zones = {}
+		self.linked_zones = {}
+		equips = []
+		for player in (0, 1):
+			for location, count in zip(PILES, reader.u32s(len(PILES))):
+				self.counts[player, location] = count
+			for location in (LOCATION_MZONE, LOCATION_SZONE):
+				cards = self.zones[player, location] = []
+				for i in range(reader.u32()):
+					code = reader.u32()
+					if code == 0:
+						continue
+					info, attack, defense, level, rank, link, link_marker, linked_zone, equip_target = reader.unpack(ZONE)
+					card = Card(code)
+					card.set_location(info)
+					if (level & 0xff) > 0:
+						card.level = level & 0xff
+					if (rank & 0xff) > 0:
+						card.level = rank & 0xff
+					card.attack = attack
+					card.defense = defense
+					if (link & 0xff) > 0:
+						card.level = link & 0xff
+					if link_marker > 0:
+						card.defense = link_marker
+					card.xyz_materials = [Card(c) for c in reader.u32s(reader.u32())]
+					card.counters = list(reader.u32s(reader.u32()))
+					card.equip_target = None
+					if equip_target:
+						equips.append((card, equip_target))
+					self.linked_zones[card.controller, card.location, card.sequence] = linked_zone
+					cards.append(card)
+		for card, equip_target in equips:
+			card.equip_target = self.card(equip_target & 0xff, (equip_target >> 8) & 0xff, (equip_target >> 16) & 0xff)
+
+	def count(self, player, location):
+		return self.counts[player, location]
+
+	def cards(self, player, location):
+		return self.zones[player, location]
+
+	def card(self, player, location, sequence):
+		"""Card in a zone, or None if it's empty."""
+		for card in self.zones.get((player, location), ()):
+			if card.sequence == sequence:
+				return card
+
+	def linked_zone(self, card):
+		return self.linked_zones.get((card.controller, card.location, card.sequence), 0)
@@ -0,0 +1,71 @@
+import struct
+
+from .constants import *
+
+# the field state is a list of sections, each prefixed with its length:
+# the field snapshot, every location of both players as query_field_card returns it
+# with all of QUERY_FLAGS, and the linked zones of all monster zones
+SECTION = struct.Struct('<I')
+LOCATIONS = (LOCATION_DECK, LOCATION_HAND, LOCATION_MZONE, LOCATION_SZONE, LOCATION_GRAVE, LOCATION_REMOVED, LOCATION_EXTRA)
+QUERY_FLAGS = QUERY_CODE | QUERY_POSITION | QUERY_LEVEL | QUERY_RANK | QUERY_ATTACK | QUERY_DEFENSE | QUERY_EQUIP_CARD | QUERY_OVERLAY_CARD | QUERY_COUNTERS | QUERY_LINK
+MONSTER_ZONES = 7
+LINKED_ZONES = struct.Struct('<%dI' % (2 * MONSTER_ZONES))
+
+# what query_card returns for an empty place
+EMPTY_RECORD = SECTION.pack(4)
+
+class FieldState:
+	"""
+	Answers to all queries about a remote core, as of its last start or process call.
+
+	The field only changes while the core processes, so the worker sends
+	everything the handlers may ask for along with the messages, see
+	field_state() below. Records carry every field of QUERY_FLAGS,
+	no matter which ones a query asked for.
+	"""
+
+	def __init__(self, data=b''):
+		self.snapshot = b''
+		self.locations = {}
+		self.linked_zones = (0,) * (2 * MONSTER_ZONES)
+		if not data:
+			return
+		sections = []
+		pos = 0
+		while pos < len(data):
+			length = SECTION.unpack_from(data, pos)[0]
+			pos += SECTION.size
+			sections.append(data[pos:pos + length])
+			pos += length
+		self.snapshot = sections[0]
+		places = [(player, location) for player in (0, 1) for location in LOCATIONS]
+		self.locations = dict(zip(places, sections[1:]))
+		self.linked_zones = LINKED_ZONES.unpack(sections[-1])
+
+	def query_card(self, player, location, sequence):
+		data = self.locations.get((player, location), b'')
+		pos = 0
+		while pos < len(data):
+			length = SECTION.unpack_from(data, pos)[0]
+			if sequence == 0:
+				return data[pos:pos + length]
+			sequence -= 1
+			pos += length
+		return EMPTY_RECORD
+
+	def query_field_card(self, player, location):
+		return self.locations.get((player, location), b'')
+
+	def query_linked_zone(self, player, location, sequence):
+		if location != LOCATION_MZONE or player not in (0, 1) or sequence >= MONSTER_ZONES:
+			return 0
+		return self.linked_zones[player * MONSTER_ZONES + sequence]
+
+def field_state(core):
+	"""Everything the front-end may query about a core until it processes again."""
+	sections = [core.query_field_snapshot()[:]]
+	for player in (0, 1):
+		for location in LOCATIONS:
+			sections.append(core.query_field_card(player, location, QUERY_FLAGS, False)[:])
+	sections.append(LINKED_ZONES.pack(*(core.query_linked_zone(player, LOCATION_MZONE, sequence) for player in (0, 1) for sequence in range(MONSTER_ZONES))))
+	return b''.join(SECTION.pack(len(section)) + section for section in sections)
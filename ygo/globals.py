@@ -1,8 +1,16 @@
+card_texts = {}
+catalog = None
 german_db = None
+# write a journal of every duel, not only with DEBUG set
+journal = False
 japanese_db = None
 lflist = {}
+# ProcessPool running lib.process off the reactor, if enabled
+process_pool = None
 rebooting = False
 server = None
+# ShardManager placing the cores of duels in worker processes, if enabled
+shards = None
 spanish_db = None
 strings = {}
 websocket_server = None
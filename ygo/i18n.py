@@ -6,18 +6,22 @@ from . import globals
 def set_language(pl, language):
 	if language == 'en':
 		pl.cdb = globals.server.db
+		pl.card_texts = globals.card_texts['en']
 		pl._ = gettext.NullTranslations().gettext
 		pl.language = 'en'
 	elif language == 'de':
 		pl.cdb = globals.german_db
+		pl.card_texts = globals.card_texts['de']
 		pl._ = gettext.translation('game', 'locale', languages=['de'], fallback=True).gettext
 		pl.language = 'de'
 	elif language == 'ja':
 		pl.cdb = globals.japanese_db
+		pl.card_texts = globals.card_texts['ja']
 		pl._ = gettext.translation('game', 'locale', languages=['ja'], fallback=True).gettext
 		pl.language = 'ja'
 	elif language == 'es':
 		pl.cdb = globals.spanish_db
+		pl.card_texts = globals.card_texts['es']
 		pl._ = gettext.translation('game', 'locale', languages=['es'], fallback=True).gettext
 		pl.language = 'es'
 
@@ -79,7 +79,7 @@ def act_on_card(self, caller, card):
 			pl.notify(pl._("Invalid action."))
 			prompt()
 			return
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	prompt()
 
 METHODS = {'act_on_card': act_on_card}
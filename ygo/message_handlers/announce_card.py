@@ -1,17 +1,11 @@
 from gsb.intercept import Reader
-import io
-from twisted.internet import reactor
 
 from ygo.parsers.duel_parser import DuelParser
 from ygo.utils import process_duel
 from ygo import globals
 
-def msg_announce_card(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	type = self.read_u32(data)
-	self.cm.call_callbacks('announce_card', player, type)
-	return data.read()
+def msg_announce_card(self, m):
+	self.cm.call_callbacks('announce_card', m.player, m.type)
 
 def announce_card(self, player, type):
 	pl = self.players[player]
@@ -28,7 +22,7 @@ def announce_card(self, player, type):
 		if not card.type & type:
 			return error(pl._("Wrong type."))
 		self.set_responsei(card.code)
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	prompt()
 
 MESSAGES = {142: msg_announce_card}
@@ -1,19 +1,15 @@
-import io
-
-def msg_attack(self, data):
-	data = io.BytesIO(data[1:])
-	attacker = self.read_u32(data)
+def msg_attack(self, m):
+	attacker = m.attacker
 	ac = attacker & 0xff
 	al = (attacker >> 8) & 0xff
 	aseq = (attacker >> 16) & 0xff
 	apos = (attacker >> 24) & 0xff
-	target = self.read_u32(data)
+	target = m.target
 	tc = target & 0xff
 	tl = (target >> 8) & 0xff
 	tseq = (target >> 16) & 0xff
 	tpos = (target >> 24) & 0xff
 	self.cm.call_callbacks('attack', ac, al, aseq, apos, tc, tl, tseq, tpos)
-	return data.read()
 
 def attack(self, ac, al, aseq, apos, tc, tl, tseq, tpos):
 	acard = self.get_card(ac, al, aseq)
@@ -1,19 +1,7 @@
-import io
-
 from ygo.constants import TYPE_LINK
 
-def msg_battle(self, data):
-	data = io.BytesIO(data[1:])
-	attacker = self.read_u32(data)
-	aa = self.read_u32(data)
-	ad = self.read_u32(data)
-	bd0 = self.read_u8(data)
-	tloc = self.read_u32(data)
-	da = self.read_u32(data)
-	dd = self.read_u32(data)
-	bd1 = self.read_u8(data)
-	self.cm.call_callbacks('battle', attacker, aa, ad, bd0, tloc, da, dd, bd1)
-	return data.read()
+def msg_battle(self, m):
+	self.cm.call_callbacks('battle', *m)
 
 def battle(self, attacker, aa, ad, bd0, tloc, da, dd, bd1):
 	loc = (attacker >> 8) & 0xff
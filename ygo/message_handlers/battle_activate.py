@@ -1,5 +1,3 @@
-from twisted.internet import reactor
-
 from ygo.duel_reader import DuelReader
 from ygo.utils import process_duel
 from ygo.parsers.duel_parser import DuelParser
@@ -24,7 +22,7 @@ def battle_activate(self, pl):
 		card = specs[caller.text]
 		seq = self.activatable.index(card)
 		self.set_responsei((seq << 16))
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	pl.notify(DuelReader, r, no_abort="Invalid command", restore_parser=DuelParser)
 
 METHODS = {'battle_activate': battle_activate}
@@ -1,5 +1,3 @@
-from twisted.internet import reactor
-
 from ygo.duel_reader import DuelReader
 from ygo.constants import TYPE_LINK
 from ygo.utils import process_duel
@@ -27,7 +25,7 @@ def battle_attack(self, pl):
 		card = specs[caller.text]
 		seq = self.attackable.index(card)
 		self.set_responsei((seq << 16) + 1)
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	pl.notify(DuelReader, r, no_abort=pl._("Invalid command."), prompt=pl._("Select a card:"), restore_parser=DuelParser)
 
 METHODS = {'battle_attack': battle_attack}
@@ -1,15 +1,9 @@
-import io
-
-def msg_become_target(self, data):
-	data = io.BytesIO(data[1:])
-	u = self.read_u8(data)
-	target = self.read_u32(data)
-	tc = target & 0xff
-	tl = (target >> 8) & 0xff
-	tseq = (target >> 16) & 0xff
-	tpos = (target >> 24) & 0xff
-	self.cm.call_callbacks('become_target', tc, tl, tseq)
-	return data.read()
+def msg_become_target(self, m):
+	for target in m.targets:
+		tc = target & 0xff
+		tl = (target >> 8) & 0xff
+		tseq = (target >> 16) & 0xff
+		self.cm.call_callbacks('become_target', tc, tl, tseq)
 
 def become_target(self, tc, tl, tseq):
 	card = self.get_card(tc, tl, tseq)
@@ -1,6 +1,5 @@
-def msg_begin_damage(self, data):
+def msg_begin_damage(self, m):
 	self.cm.call_callbacks('begin_damage')
-	return data[1:]
 
 def begin_damage(self):
 	for pl in self.players + self.watchers:
@@ -1,10 +1,5 @@
-import io
-
-def msg_chain_solved(self, data):
-	data = io.BytesIO(data[1:])
-	count = self.read_u8(data)
-	self.cm.call_callbacks('chain_solved', count)
-	return data.read()
+def msg_chain_solved(self, m):
+	self.cm.call_callbacks('chain_solved', m.chain_index)
 
 def chain_solved(self, count):
 	self.revealed = {}
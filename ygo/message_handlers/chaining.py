@@ -1,19 +1,9 @@
-import io
-
 from ygo.card import Card
 
-def msg_chaining(self, data):
-	data = io.BytesIO(data[1:])
-	code = self.read_u32(data)
-	card = Card(code)
-	card.set_location(self.read_u32(data))
-	tc = self.read_u8(data)
-	tl = self.read_u8(data)
-	ts = self.read_u8(data)
-	desc = self.read_u32(data)
-	cs = self.read_u8(data)
-	self.cm.call_callbacks('chaining', card, tc, tl, ts, desc, cs)
-	return data.read()
+def msg_chaining(self, m):
+	card = Card(m.code)
+	card.set_location(m.location)
+	self.cm.call_callbacks('chaining', card, m.target_controller, m.target_location, m.target_sequence, m.desc, m.chain_size)
 
 def chaining(self, card, tc, tl, ts, desc, cs):
 	c = card.controller
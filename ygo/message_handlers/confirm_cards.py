@@ -1,19 +1,6 @@
-import io
-
-def msg_confirm_cards(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	size = self.read_u8(data)
-	cards = []
-	for i in range(size):
-		code = self.read_u32(data)
-		c = self.read_u8(data)
-		l = self.read_u8(data)
-		s = self.read_u8(data)
-		card = self.get_card(c, l, s)
-		cards.append(card)
-	self.cm.call_callbacks('confirm_cards', player, cards)
-	return data.read()
+def msg_confirm_cards(self, m):
+	cards = [self.get_card(c.controller, c.location, c.sequence) for c in m.cards]
+	self.cm.call_callbacks('confirm_cards', m.player, cards)
 
 def confirm_cards(self, player, cards):
 	pl = self.players[player]
@@ -1,27 +1,8 @@
-import io
-
 from ygo import globals
 
-def msg_counters(self, data):
-	data = io.BytesIO(data[0:])
-
-	msg = self.read_u8(data)
-
-	ctype = self.read_u16(data)
-
-	pl = self.read_u8(data)
-
-	loc = self.read_u8(data)
-
-	seq = self.read_u8(data)
-
-	count = self.read_u16(data)
-
-	card = self.get_card(pl, loc, seq)
-
-	self.cm.call_callbacks('counters', card, ctype, count, msg==101)
-			
-	return data.read()
+def msg_counters(self, m):
+	card = self.get_card(m.controller, m.location, m.sequence)
+	self.cm.call_callbacks('counters', card, m.counter_type, m.count, m.msg == 101)
 
 def counters(self, card, type, count, added):
 
@@ -1,11 +1,5 @@
-import io
-
-def msg_damage(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	amount = self.read_u32(data)
-	self.cm.call_callbacks('damage', player, amount)
-	return data.read()
+def msg_damage(self, m):
+	self.cm.call_callbacks('damage', m.player, m.amount)
 
 def damage(self, player, amount):
 	new_lp = self.lp[player]-amount
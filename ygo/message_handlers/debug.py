@@ -1,10 +1,14 @@
-import json
+def debug(self, event_type, **kwargs):
+	if event_type == 'process':
+		self.journal.process(kwargs['result'], kwargs['data'])
+	elif event_type == 'set_responsei':
+		self.journal.response_int(kwargs['response'])
+	elif event_type == 'set_responseb':
+		self.journal.response_bytes(kwargs['response'])
+	elif event_type == 'start':
+		self.journal.start(kwargs['seed'], kwargs['options'], kwargs['lp'], kwargs['players'], kwargs['decks'])
+	else:
+		self.journal.note(event_type=event_type, **kwargs)
 
-def debug(self, **kwargs):
-	if not self.debug_mode:
-		return
-	s = json.dumps(kwargs)
-	self.debug_fp.write(s+'\n')
-	self.debug_fp.flush()
-
-CALLBACKS = {'debug': debug}
+# subscribed to debug events by Duel.start_journal
+METHODS = {'debug': debug}
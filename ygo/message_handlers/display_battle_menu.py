@@ -1,5 +1,3 @@
-from twisted.internet import reactor
-
 from ygo.duel_reader import DuelReader
 from ygo.utils import process_duel
 from ygo.parsers.duel_parser import DuelParser
@@ -21,10 +19,10 @@ def display_battle_menu(self, pl):
 			self.battle_activate(caller.connection.player)
 		elif caller.text == 'e' and self.to_ep:
 			self.set_responsei(3)
-			reactor.callLater(0, process_duel, self)
+			process_duel(self)
 		elif caller.text == 'm' and self.to_m2:
 			self.set_responsei(2)
-			reactor.callLater(0, process_duel, self)
+			process_duel(self)
 		else:
 			pl.notify(pl._("Invalid option."))
 			return self.display_battle_menu(pl)
@@ -1,18 +1,8 @@
-import io
-
 from ygo.card import Card
 
-def msg_draw(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	drawed = self.read_u8(data)
-	cards = []
-	for i in range(drawed):
-		c = self.read_u32(data)
-		card = Card(c & 0x7fffffff)
-		cards.append(card)
-	self.cm.call_callbacks('draw', player, cards)
-	return data.read()
+def msg_draw(self, m):
+	cards = [Card(c & 0x7fffffff) for c in m.cards]
+	self.cm.call_callbacks('draw', m.player, cards)
 
 def draw(self, player, cards):
 	pl = self.players[player]
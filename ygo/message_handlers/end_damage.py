@@ -1,6 +1,5 @@
-def msg_end_damage(self, data):
+def msg_end_damage(self, m):
 	self.cm.call_callbacks('end_damage')
-	return data[1:]
 
 def end_damage(self):
 	for pl in self.players + self.watchers:
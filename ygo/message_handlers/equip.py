@@ -1,15 +1,9 @@
-import io
-
-def msg_equip(self, data):
-	data = io.BytesIO(data[1:])
-	loc = self.read_u32(data)
-	target = self.read_u32(data)
-	u = self.unpack_location(loc)
+def msg_equip(self, m):
+	u = self.unpack_location(m.location)
 	card = self.get_card(u[0], u[1], u[2])
-	u = self.unpack_location(target)
+	u = self.unpack_location(m.target)
 	target = self.get_card(u[0], u[1], u[2])
 	self.cm.call_callbacks('equip', card, target)
-	return data.read()
 
 def equip(self, card, target):
 	for pl in self.players + self.watchers:
@@ -1,10 +1,5 @@
-import io
-
-def msg_field_disabled(self, data):
-	data = io.BytesIO(data[1:])
-	locations = self.read_u32(data)
-	self.cm.call_callbacks('field_disabled', locations)
-	return data.read()
+def msg_field_disabled(self, m):
+	self.cm.call_callbacks('field_disabled', m.locations)
 
 def field_disabled(self, locations):
 	specs = self.flag_to_usable_cardspecs(locations, reverse=True)
@@ -1,15 +1,10 @@
-import io
-
-def msg_flipsummoning(self, data):
-	data = io.BytesIO(data[1:])
-	code = self.read_u32(data)
-	location = self.read_u32(data)
+def msg_flipsummoning(self, m):
+	location = m.location
 	c = location & 0xff
 	loc = (location >> 8) & 0xff;
 	seq = (location >> 16) & 0xff
 	card = self.get_card(c, loc, seq)
 	self.cm.call_callbacks('flipsummoning', card)
-	return data.read()
 
 def flipsummoning(self, card):
 	cpl = self.players[card.controller]
@@ -1,27 +1,19 @@
-import io
-from twisted.internet import reactor
-
-from ygo.utils import process_duel
 from ygo import globals
 
-def msg_hint(self, data):
-	data = io.BytesIO(data[1:])
-	msg = self.read_u8(data)
-	player = self.read_u8(data)
-	value = self.read_u32(data)
-	self.cm.call_callbacks('hint', msg, player, value)
-	return data.read()
+def msg_hint(self, m):
+	self.cm.call_callbacks('hint', m.type, m.player, m.value)
 
 def hint(self, msg, player, data):
 	pl = self.players[player]
 	op = self.players[1 - player]
 	if msg == 3 and data in globals.strings[pl.language]['system']:
 		self.players[player].notify(globals.strings[pl.language]['system'][data])
+	# nothing to answer, the core can go on right away
 	elif msg == 6 or msg == 7 or msg == 8:
-		reactor.callLater(0, process_duel, self)
+		self.keep_processing = True
 	elif msg == 9:
 		op.notify(globals.strings[op.language]['system'][1512] % data)
-		reactor.callLater(0, process_duel, self)
+		self.keep_processing = True
 
 MESSAGES = {2: msg_hint}
 
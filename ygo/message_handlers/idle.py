@@ -1,20 +1,12 @@
-import io
-
-def msg_idlecmd(self, data):
+def msg_idlecmd(self, m):
 	self.state = 'idle'
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	summonable = self.read_cardlist(data)
-	spsummon = self.read_cardlist(data)
-	repos = self.read_cardlist(data)
-	idle_mset = self.read_cardlist(data)
-	idle_set = self.read_cardlist(data)
-	idle_activate = self.read_cardlist(data, True)
-	to_bp = self.read_u8(data)
-	to_ep = self.read_u8(data)
-	cs = self.read_u8(data)
-	self.cm.call_callbacks('idle', summonable, spsummon, repos, idle_mset, idle_set, idle_activate, to_bp, to_ep, cs)
-	return data.read()
+	summonable = self.get_cardlist(m.summonable)
+	spsummon = self.get_cardlist(m.spsummon)
+	repos = self.get_cardlist(m.repos)
+	idle_mset = self.get_cardlist(m.mset)
+	idle_set = self.get_cardlist(m.set)
+	idle_activate = self.get_cardlist(m.activate)
+	self.cm.call_callbacks('idle', summonable, spsummon, repos, idle_mset, idle_set, idle_activate, m.to_bp, m.to_ep, m.shuffle)
 
 def idle(self, summonable, spsummon, repos, idle_mset, idle_set, idle_activate, to_bp, to_ep, cs):
 	self.state = "idle"
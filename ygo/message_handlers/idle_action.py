@@ -1,5 +1,3 @@
-from twisted.internet import reactor
-
 from ygo.constants import *
 from ygo.duel_reader import DuelReader
 from ygo.parsers.duel_parser import DuelParser
@@ -20,16 +18,16 @@ def idle_action(self, pl):
 	cards = []
 	for i in (0, 1):
 		for j in (LOCATION_HAND, LOCATION_MZONE, LOCATION_SZONE, LOCATION_GRAVE, LOCATION_EXTRA):
-			cards.extend(self.get_cards_in_location(i, j))
+			cards.extend(self.mirror.cards(i, j))
 	specs = set(card.get_spec(self.tp) for card in cards)
 	def r(caller):
 		if caller.text == 'b' and self.to_bp:
 			self.set_responsei(6)
-			reactor.callLater(0, process_duel, self)
+			process_duel(self)
 			return
 		elif caller.text == 'e' and self.to_ep:
 			self.set_responsei(7)
-			reactor.callLater(0, process_duel, self)
+			process_duel(self)
 			return
 		elif caller.text == '?':
 			self.show_usable(pl)
@@ -1,11 +1,5 @@
-import io
-
-def msg_lpupdate(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	lp = self.read_u32(data)
-	self.cm.call_callbacks('lpupdate', player, lp)
-	return data.read()
+def msg_lpupdate(self, m):
+	self.cm.call_callbacks('lpupdate', m.player, m.amount)
 
 def lpupdate(self, player, lp):
 	if lp > self.lp[player]:
@@ -1,16 +1,8 @@
-import io
-
 from ygo.card import Card
 from ygo.constants import *
 
-def msg_move(self, data):
-	data = io.BytesIO(data[1:])
-	code = self.read_u32(data)
-	location = self.read_u32(data)
-	newloc = self.read_u32(data)
-	reason = self.read_u32(data)
-	self.cm.call_callbacks('move', code, location, newloc, reason)
-	return data.read()
+def msg_move(self, m):
+	self.cm.call_callbacks('move', m.code, m.location, m.newloc, m.reason)
 
 def move(self, code, location, newloc, reason):
 	card = Card(code)
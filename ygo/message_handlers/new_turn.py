@@ -1,7 +1,5 @@
-def msg_new_turn(self, data):
-	tp = int(data[1])
-	self.cm.call_callbacks('new_turn', tp)
-	return data[2:]
+def msg_new_turn(self, m):
+	self.cm.call_callbacks('new_turn', m.player)
 
 def new_turn(self, tp):
 	self.tp = tp
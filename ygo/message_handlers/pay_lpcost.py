@@ -1,11 +1,5 @@
-import io
-
-def msg_pay_lpcost(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	cost = self.read_u32(data)
-	self.cm.call_callbacks('pay_lpcost', player, cost)
-	return data.read()
+def msg_pay_lpcost(self, m):
+	self.cm.call_callbacks('pay_lpcost', m.player, m.amount)
 
 def pay_lpcost(self, player, cost):
 	self.lp[player] -= cost
@@ -1,11 +1,7 @@
-import struct
-
 from ygo.constants import PHASES
 
-def msg_new_phase(self, data):
-	phase = struct.unpack('h', data[1:])[0]
-	self.cm.call_callbacks('phase', phase)
-	return b''
+def msg_new_phase(self, m):
+	self.cm.call_callbacks('phase', m.phase)
 
 def phase(self, phase):
 	phase_str = PHASES.get(phase, str(phase))
@@ -1,18 +1,12 @@
-import io
-
 from ygo.card import Card
 
-def msg_pos_change(self, data):
-	data = io.BytesIO(data[1:])
-	code = self.read_u32(data)
-	card = Card(code)
-	card.controller = self.read_u8(data)
-	card.location = self.read_u8(data)
-	card.sequence = self.read_u8(data)
-	prevpos = self.read_u8(data)
-	card.position = self.read_u8(data)
-	self.cm.call_callbacks('pos_change', card, prevpos)
-	return data.read()
+def msg_pos_change(self, m):
+	card = Card(m.code)
+	card.controller = m.controller
+	card.location = m.location
+	card.sequence = m.sequence
+	card.position = m.position
+	self.cm.call_callbacks('pos_change', card, m.prev_position)
 
 def pos_change(self, card, prevpos):
 	cs = card.get_spec(card.controller)
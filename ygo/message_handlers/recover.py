@@ -1,11 +1,5 @@
-import io
-
-def msg_recover(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	amount = self.read_u32(data)
-	self.cm.call_callbacks('recover', player, amount)
-	return data.read()
+def msg_recover(self, m):
+	self.cm.call_callbacks('recover', m.player, m.amount)
 
 def recover(self, player, amount):
 	new_lp = self.lp[player] + amount
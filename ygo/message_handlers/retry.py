@@ -1,5 +1,4 @@
-def msg_retry(self, buf):
+def msg_retry(self, m):
 	print("retry")
-	return buf[1:]
 
 MESSAGES = {1: msg_retry}
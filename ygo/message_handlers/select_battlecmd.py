@@ -1,14 +1,7 @@
-import io
-
-def msg_select_battlecmd(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	activatable = self.read_cardlist(data, True)
-	attackable = self.read_cardlist(data, True, True)
-	to_m2 = self.read_u8(data)
-	to_ep = self.read_u8(data)
-	self.cm.call_callbacks('select_battlecmd', player, activatable, attackable, to_m2, to_ep)
-	return data.read()
+def msg_select_battlecmd(self, m):
+	activatable = self.get_cardlist(m.activatable)
+	attackable = self.get_cardlist(m.attackable)
+	self.cm.call_callbacks('select_battlecmd', m.player, activatable, attackable, m.to_m2, m.to_ep)
 
 def select_battlecmd(self, player, activatable, attackable, to_m2, to_ep):
 	self.state = "battle"
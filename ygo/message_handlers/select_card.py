@@ -1,47 +1,30 @@
-import io
-from twisted.internet import reactor
-
 from ygo.card import Card
 from ygo.duel_reader import DuelReader
 from ygo.parsers.duel_parser import DuelParser
 from ygo.utils import process_duel, parse_ints
 
-def msg_select_tribute(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	cancelable = self.read_u8(data)
-	min = self.read_u8(data)
-	max = self.read_u8(data)
-	size = self.read_u8(data)
+def msg_select_tribute(self, m):
 	cards = []
-	for i in range(size):
-		code = self.read_u32(data)
-		card = Card(code)
-		card.controller = self.read_u8(data)
-		card.location = self.read_u8(data)
-		card.sequence = self.read_u8(data)
-		card.position = self.get_card(card.controller, card.location, card.sequence).position
-		card.release_param = self.read_u8(data)
+	field = self.query_field()
+	for c in m.cards:
+		card = Card(c.code)
+		card.controller = c.controller
+		card.location = c.location
+		card.sequence = c.sequence
+		# tributes usually come from the field, only others need to be queried
+		current = field.card(c.controller, c.location, c.sequence) or self.get_card(c.controller, c.location, c.sequence)
+		card.position = current.position
+		card.release_param = c.release_param
 		cards.append(card)
-	self.cm.call_callbacks('select_tribute', player, cancelable, min, max, cards)
-	return data.read()
+	self.cm.call_callbacks('select_tribute', m.player, m.cancelable, m.min, m.max, cards)
 
-def msg_select_card(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	cancelable = self.read_u8(data)
-	min = self.read_u8(data)
-	max = self.read_u8(data)
-	size = self.read_u8(data)
+def msg_select_card(self, m):
 	cards = []
-	for i in range(size):
-		code = self.read_u32(data)
-		loc = self.read_u32(data)
-		card = Card(code)
-		card.set_location(loc)
+	for c in m.cards:
+		card = Card(c.code)
+		card.set_location(c.location)
 		cards.append(card)
-	self.cm.call_callbacks('select_card', player, cancelable, min, max, cards)
-	return data.read()
+	self.cm.call_callbacks('select_card', m.player, m.cancelable, m.min, m.max, cards)
 
 def select_card(self, player, cancelable, min_cards, max_cards, cards, is_tribute=False):
 	pl = self.players[player]
@@ -74,7 +57,7 @@ def select_card(self, player, cancelable, min_cards, max_cards, cards, is_tribut
 		if is_tribute and tribute_value < min_cards:
 			return error(pl._("Not enough tributes."))
 		self.set_responseb(buf)
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	return prompt()
 
 def select_tribute(self, *args, **kwargs):
@@ -1,30 +1,15 @@
-import io
-from twisted.internet import reactor
-
 from ygo.card import Card
 from ygo.duel_reader import DuelReader
 from ygo.parsers.duel_parser import DuelParser
 from ygo.utils import process_duel
 
-def msg_select_chain(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	size = self.read_u8(data)
-	spe_count = self.read_u8(data)
-	forced = self.read_u8(data)
-	hint_timing = self.read_u32(data)
-	other_timing = self.read_u32(data)
+def msg_select_chain(self, m):
 	chains = []
-	for i in range(size):
-		et = self.read_u8(data)
-		code = self.read_u32(data)
-		loc = self.read_u32(data)
-		card = Card(code)
-		card.set_location(loc)
-		desc = self.read_u32(data)
-		chains.append((et, card, desc))
-	self.cm.call_callbacks('select_chain', player, size, spe_count, forced, chains)
-	return data.read()
+	for c in m.chains:
+		card = Card(c.code)
+		card.set_location(c.location)
+		chains.append((c.type, card, c.desc))
+	self.cm.call_callbacks('select_chain', m.player, m.size, m.spe_count, m.forced, chains)
 
 def select_chain(self, player, size, spe_count, forced, chains):
 	if size == 0 and spe_count == 0:
@@ -69,7 +54,7 @@ def select_chain(self, player, size, spe_count, forced, chains):
 	def r(caller):
 		if caller.text == 'c' and not forced:
 			self.set_responsei(-1)
-			reactor.callLater(0, process_duel, self)
+			process_duel(self)
 			return
 		if caller.text.startswith('i'):
 			info = True
@@ -85,7 +70,7 @@ def select_chain(self, player, size, spe_count, forced, chains):
 			self.show_info(card, pl)
 			return prompt()
 		self.set_responsei(idx)
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	prompt()
 
 MESSAGES = {16: msg_select_chain}
@@ -1,6 +1,4 @@
-import io
 import struct
-from twisted.internet import reactor
 
 from ygo.card import Card
 from ygo.duel_reader import DuelReader
@@ -8,22 +6,16 @@ from ygo.parsers.duel_parser import DuelParser
 from ygo.utils import parse_ints, process_duel
 from ygo import globals
 
-def msg_select_counter(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	countertype = self.read_u16(data)
-	count = self.read_u16(data)
-	size = self.read_u8(data)
+def msg_select_counter(self, m):
 	cards = []
-	for i in range(size):
-		card = Card(self.read_u32(data))
-		card.controller = self.read_u8(data)
-		card.location = self.read_u8(data)
-		card.sequence = self.read_u8(data)
-		card.counter = self.read_u16(data)
+	for c in m.cards:
+		card = Card(c.code)
+		card.controller = c.controller
+		card.location = c.location
+		card.sequence = c.sequence
+		card.counter = c.counter
 		cards.append(card)
-	self.cm.call_callbacks('select_counter', player, countertype, count, cards)
-	return data.read()
+	self.cm.call_callbacks('select_counter', m.player, m.counter_type, m.count, cards)
 
 def select_counter(self, player, countertype, count, cards):
 	pl = self.players[player]
@@ -48,7 +40,7 @@ def select_counter(self, player, countertype, count, cards):
 			return error(pl._("Please specify %d values with a sum of %d.") % (len(cards), count))
 		bytes = struct.pack('h' * len(cards), *ints)
 		self.set_responseb(bytes)
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	prompt()
 
 MESSAGES = {22: msg_select_counter}
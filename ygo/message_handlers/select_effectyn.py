@@ -1,28 +1,21 @@
-import io
-from twisted.internet import reactor
-
 from ygo.card import Card
 from ygo.parsers.yes_or_no_parser import yes_or_no_parser
 from ygo.utils import process_duel
 
-def msg_select_effectyn(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	card = Card(self.read_u32(data))
-	card.set_location(self.read_u32(data))
-	desc = self.read_u32(data)
-	self.cm.call_callbacks('select_effectyn', player, card, desc)
-	return data.read()
+def msg_select_effectyn(self, m):
+	card = Card(m.code)
+	card.set_location(m.location)
+	self.cm.call_callbacks('select_effectyn', m.player, card, m.desc)
 
 def select_effectyn(self, player, card, desc):
 	pl = self.players[player]
 	old_parser = pl.connection.parser
 	def yes(caller):
 		self.set_responsei(1)
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	def no(caller):
 		self.set_responsei(0)
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	spec = card.get_spec(player)
 	question = pl._("Do you want to use the effect from {card} in {spec}?").format(card=card.get_name(pl), spec=spec)
 	s = card.get_effect_description(pl, desc, True)
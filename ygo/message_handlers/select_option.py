@@ -1,27 +1,18 @@
 from gsb.intercept import Menu
-import io
-from twisted.internet import reactor
 
 from ygo.card import Card
 from ygo.parsers.duel_parser import DuelParser
 from ygo.utils import process_duel
 from ygo import globals
 
-def msg_select_option(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	size = self.read_u8(data)
-	options = []
-	for i in range(size):
-		options.append(self.read_u32(data))
-	self.cm.call_callbacks("select_option", player, options)
-	return data.read()
+def msg_select_option(self, m):
+	self.cm.call_callbacks("select_option", m.player, list(m.options))
 
 def select_option(self, player, options):
 	pl = self.players[player]
 	def select(caller, idx):
 		self.set_responsei(idx)
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	opts = []
 	for opt in options:
 		if opt > 10000:
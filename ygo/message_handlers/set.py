@@ -1,15 +1,9 @@
-import io
-
 from ygo.card import Card
 
-def msg_set(self, data):
-	data = io.BytesIO(data[1:])
-	code = self.read_u32(data)
-	loc = self.read_u32(data)
-	card = Card(code)
-	card.set_location(loc)
+def msg_set(self, m):
+	card = Card(m.code)
+	card.set_location(m.location)
 	self.cm.call_callbacks('set', card)
-	return data.read()
 
 def set(self, card):
 	c = card.controller
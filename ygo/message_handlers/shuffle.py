@@ -1,10 +1,5 @@
-import io
-
-def msg_shuffle(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	self.cm.call_callbacks('shuffle', player)
-	return data.read()
+def msg_shuffle(self, m):
+	self.cm.call_callbacks('shuffle', m.player)
 
 def shuffle(self, player):
 	pl = self.players[player]
@@ -1,24 +1,17 @@
-import io
-from twisted.internet import reactor
-
 from ygo.card import Card
 from ygo.duel_reader import DuelReader
 from ygo.parsers.duel_parser import DuelParser
 from ygo.utils import process_duel, parse_ints
 
-def msg_sort_card(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	size = self.read_u8(data)
+def msg_sort_card(self, m):
 	cards = []
-	for i in range(size):
-		card = Card(self.read_u32(data))
-		card.controller = self.read_u8(data)
-		card.location = self.read_u8(data)
-		card.sequence = self.read_u8(data)
+	for c in m.cards:
+		card = Card(c.code)
+		card.controller = c.controller
+		card.location = c.location
+		card.sequence = c.sequence
 		cards.append(card)
-	self.cm.call_callbacks('sort_card', player, cards)
-	return data.read()
+	self.cm.call_callbacks('sort_card', m.player, cards)
 
 def sort_card(self, player, cards):
 	pl = self.players[player]
@@ -33,7 +26,7 @@ def sort_card(self, player, cards):
 	def r(caller):
 		if caller.text == 'c':
 			self.set_responseb(bytes([255]))
-			reactor.callLater(0, process_duel, self)
+			process_duel(self)
 			return
 		ints = [i - 1 for i in parse_ints(caller.text)]
 		if len(ints) != len(cards):
@@ -43,7 +36,7 @@ def sort_card(self, player, cards):
 		if any(i < 0 or i > len(cards) - 1 for i in ints):
 			return error(pl._("Please enter values between 1 and %d.") % len(cards))
 		self.set_responseb(bytes(ints))
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	prompt()
 
 MESSAGES = {25: msg_sort_card}
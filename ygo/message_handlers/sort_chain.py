@@ -1,27 +1,19 @@
-import io
-from twisted.internet import reactor
-
 from ygo.card import Card
 from ygo.utils import process_duel
 
-def msg_sort_chain(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	size = self.read_u8(data)
+def msg_sort_chain(self, m):
 	cards = []
-	for i in range(size):
-		code = self.read_u32(data)
-		card = Card(code)
-		card.controller = self.read_u8(data)
-		card.location = self.read_u8(data)
-		card.sequence = self.read_u8(data)
+	for c in m.cards:
+		card = Card(c.code)
+		card.controller = c.controller
+		card.location = c.location
+		card.sequence = c.sequence
 		cards.append(card)
-	self.cm.call_callbacks('sort_chain', player, cards)
-	return data.read()
+	self.cm.call_callbacks('sort_chain', m.player, cards)
 
 def sort_chain(self, player, cards):
 	self.set_responsei(-1)
-	reactor.callLater(0, process_duel, self)
+	process_duel(self)
 
 MESSAGES = {21: msg_sort_chain}
 
@@ -1,22 +1,12 @@
-import io
-
 from ygo.card import Card
 
-def msg_swap(self, data):
-	data = io.BytesIO(data[1:])
-
-	code1 = self.read_u32(data)
-	location1 = self.read_u32(data)
-	code2 = self.read_u32(data)
-	location2 = self.read_u32(data)
-
-	card1 = Card(code1)
-	card1.set_location(location1)
-	card2 = Card(code2)
-	card2.set_location(location2)
+def msg_swap(self, m):
+	card1 = Card(m.code1)
+	card1.set_location(m.location1)
+	card2 = Card(m.code2)
+	card2.set_location(m.location2)
 	self.cm.call_callbacks('swap', card1, card2)
 
-	return data.read()
 
 def swap(self, card1, card2):
 	for p in self.watchers+self.players:
@@ -1,25 +1,9 @@
-import io
-
 from ygo.card import Card
 
-def msg_tag_swap(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	main_deck_count = self.read_u8(data)
-	extra_deck_count = self.read_u8(data)
-	extra_p_count = self.read_u8(data)
-	hand_count = self.read_u8(data)
-	top_card = self.read_u32(data)
-	# we don't need the following information, so we trash it
-	# that allows us to process all following messages too (if any)
-	for i in range(hand_count):
-		self.read_u32(data)
-	for i in range(extra_deck_count):
-		self.read_u32(data)
-	self.cm.call_callbacks('tag_swap', player)
-	if top_card > 0:
-		self.cm.call_callbacks('decktop', player, Card(top_card))
-	return data.read()
+def msg_tag_swap(self, m):
+	self.cm.call_callbacks('tag_swap', m.player)
+	if m.top_card > 0:
+		self.cm.call_callbacks('decktop', m.player, Card(m.top_card))
 
 def tag_swap(self, player):
 
@@ -1,17 +1,10 @@
-import io
-
 from ygo import globals
 
-def msg_toss_coin(self, data, dice=False):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	count = self.read_u8(data)
-	options = [self.read_u8(data) for i in range(count)]
-	if dice:
-		self.cm.call_callbacks('toss_dice', player, options)
+def msg_toss(self, m):
+	if m.msg == 131:
+		self.cm.call_callbacks('toss_dice', m.player, list(m.results))
 	else:
-		self.cm.call_callbacks('toss_coin', player, options)
-	return data.read()
+		self.cm.call_callbacks('toss_coin', m.player, list(m.results))
 
 def toss_coin(self, player, options):
 	players = []
@@ -31,10 +24,6 @@ def toss_dice(self, player, options):
 		s += ", ".join(opts)
 		pl.notify(s)
 
-def msg_toss_dice(self, *args, **kwargs):
-	kwargs['dice'] = True
-	self.msg_toss_coin(*args, **kwargs)
-
-MESSAGES = {130: msg_toss_coin, 131: msg_toss_dice}
+MESSAGES = {130: msg_toss, 131: msg_toss}
 
 CALLBACKS = {'toss_coin': toss_coin, 'toss_dice': toss_dice}
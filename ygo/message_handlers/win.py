@@ -1,14 +1,8 @@
-import io
-
 from ygo.constants import __
 from ygo import globals
 
-def msg_win(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	reason = self.read_u8(data)
-	self.cm.call_callbacks('win', player, reason)
-	return data.read()
+def msg_win(self, m):
+	self.cm.call_callbacks('win', m.player, m.reason)
 
 def win(self, player, reason):
 	if player == 2:
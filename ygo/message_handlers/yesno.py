@@ -1,27 +1,20 @@
-import io
-from twisted.internet import reactor
-
 from ygo.card import Card
 from ygo.parsers.yes_or_no_parser import yes_or_no_parser
 from ygo.utils import process_duel
 from ygo import globals
 
-def msg_yesno(self, data):
-	data = io.BytesIO(data[1:])
-	player = self.read_u8(data)
-	desc = self.read_u32(data)
-	self.cm.call_callbacks('yesno', player, desc)
-	return data.read()
+def msg_yesno(self, m):
+	self.cm.call_callbacks('yesno', m.player, m.desc)
 
 def yesno(self, player, desc):
 	pl = self.players[player]
 	old_parser = pl.connection.parser
 	def yes(caller):
 		self.set_responsei(1)
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	def no(caller):
 		self.set_responsei(0)
-		reactor.callLater(0, process_duel, self)
+		process_duel(self)
 	if desc > 10000:
 		code = desc >> 4
 		opt = Card(code).get_strings(pl)[desc & 0xf]
@@ -0,0 +1,67 @@
+import struct
+
+U16 = struct.Struct('<H')
+U32 = struct.Struct('<I')
+I32 = struct.Struct('<i')
+
+class MessageReader:
+	"""
+	Cursor over a buffer of messages and query results the core wrote.
+
+	Fields are unpacked in place from a memoryview, nothing gets copied
+	while advancing through the buffer.
+	"""
+
+	__slots__ = ('view', 'pos', 'end')
+
+	def __init__(self, data, pos=0, end=None):
+		self.view = memoryview(data)
+		self.pos = pos
+		self.end = len(self.view) if end is None else end
+
+	def u8(self):
+		v = self.view[self.pos]
+		self.pos += 1
+		return v
+
+	def u16(self):
+		v = U16.unpack_from(self.view, self.pos)[0]
+		self.pos += 2
+		return v
+
+	def u32(self):
+		v = U32.unpack_from(self.view, self.pos)[0]
+		self.pos += 4
+		return v
+
+	def i32(self):
+		v = I32.unpack_from(self.view, self.pos)[0]
+		self.pos += 4
+		return v
+
+	def unpack(self, st):
+		"""Reads several fields at once with a precompiled struct.Struct."""
+		v = st.unpack_from(self.view, self.pos)
+		self.pos += st.size
+		return v
+
+	def u32s(self, n):
+		v = struct.unpack_from('<%dI' % n, self.view, self.pos)
+		self.pos += n * 4
+		return v
+
+	def peek(self):
+		return self.view[self.pos]
+
+	def skip(self, n):
+		self.pos += n
+
+	def read(self, n):
+		"""Returns the next n bytes as a copy."""
+		v = self.view[self.pos:self.pos + n].tobytes()
+		self.pos += n
+		return v
+
+	@property
+	def remaining(self):
+		return self.end - self.pos
@@ -0,0 +1,146 @@
+from collections import namedtuple
+import struct
+
+# Layout of every core message the server understands, by message id.
+#
+# A message is a list of fields following the message id. Fields are either
+# (name, format) with a struct format character, where a name of None skips
+# the byte, or (name, count, item) for lists. count is either the format of
+# a count preceding the list or the name of an earlier field holding it.
+# item is a format character for lists of plain numbers, or one of the
+# record layouts below.
+#
+# The decoders generated from this table return a namedtuple per message,
+# named after the message.
+
+CARD_SPEC = ('CardSpec', [('code', 'I'), ('controller', 'B'), ('location', 'B'), ('sequence', 'B')])
+ACTIVATABLE_CARD = ('ActivatableCard', CARD_SPEC[1] + [('desc', 'I')])
+ATTACKABLE_CARD = ('AttackableCard', CARD_SPEC[1] + [('direct', 'B')])
+TRIBUTE_CARD = ('TributeCard', CARD_SPEC[1] + [('release_param', 'B')])
+COUNTER_CARD = ('CounterCard', CARD_SPEC[1] + [('counter', 'H')])
+SUM_CARD = ('SumCard', CARD_SPEC[1] + [('param', 'I')])
+CARD_LOCATION = ('CardLocation', [('code', 'I'), ('location', 'I')])
+CHAIN_OPTION = ('ChainOption', [('type', 'B'), ('code', 'I'), ('location', 'I'), ('desc', 'I')])
+
+LP_CHANGE = [('player', 'B'), ('amount', 'I')]
+ANNOUNCE = [('player', 'B'), ('count', 'B'), ('available', 'I')]
+
+SCHEMA = {
+	1: ('retry', []),
+	2: ('hint', [('type', 'B'), ('player', 'B'), ('value', 'I')]),
+	5: ('win', [('player', 'B'), ('reason', 'B')]),
+	10: ('select_battlecmd', [('player', 'B'), ('activatable', 'B', ACTIVATABLE_CARD), ('attackable', 'B', ATTACKABLE_CARD), ('to_m2', 'B'), ('to_ep', 'B')]),
+	11: ('select_idlecmd', [('player', 'B'), ('summonable', 'B', CARD_SPEC), ('spsummon', 'B', CARD_SPEC), ('repos', 'B', CARD_SPEC), ('mset', 'B', CARD_SPEC), ('set', 'B', CARD_SPEC), ('activate', 'B', ACTIVATABLE_CARD), ('to_bp', 'B'), ('to_ep', 'B'), ('shuffle', 'B')]),
+	12: ('select_effectyn', [('player', 'B'), ('code', 'I'), ('location', 'I'), ('desc', 'I')]),
+	13: ('select_yesno', [('player', 'B'), ('desc', 'I')]),
+	14: ('select_option', [('player', 'B'), ('options', 'B', 'I')]),
+	15: ('select_card', [('player', 'B'), ('cancelable', 'B'), ('min', 'B'), ('max', 'B'), ('cards', 'B', CARD_LOCATION)]),
+	16: ('select_chain', [('player', 'B'), ('size', 'B'), ('spe_count', 'B'), ('forced', 'B'), ('hint_timing', 'I'), ('other_timing', 'I'), ('chains', 'size', CHAIN_OPTION)]),
+	18: ('select_place', [('player', 'B'), ('count', 'B'), ('flag', 'I')]),
+	19: ('select_position', [('player', 'B'), ('code', 'I'), ('positions', 'B')]),
+	20: ('select_tribute', [('player', 'B'), ('cancelable', 'B'), ('min', 'B'), ('max', 'B'), ('cards', 'B', TRIBUTE_CARD)]),
+	21: ('sort_chain', [('player', 'B'), ('cards', 'B', CARD_SPEC)]),
+	22: ('select_counter', [('player', 'B'), ('counter_type', 'H'), ('count', 'H'), ('cards', 'B', COUNTER_CARD)]),
+	23: ('select_sum', [('mode', 'B'), ('player', 'B'), ('value', 'I'), ('min', 'B'), ('max', 'B'), ('must_select', 'B', SUM_CARD), ('select_some', 'B', SUM_CARD)]),
+	24: ('select_disfield', [('player', 'B'), ('count', 'B'), ('flag', 'I')]),
+	25: ('sort_card', [('player', 'B'), ('cards', 'B', CARD_SPEC)]),
+	31: ('confirm_cards', [('player', 'B'), ('cards', 'B', CARD_SPEC)]),
+	32: ('shuffle_deck', [('player', 'B')]),
+	33: ('shuffle_hand', [('player', 'B'), ('cards', 'B', 'I')]),
+	37: ('reverse_deck', []),
+	38: ('deck_top', [('player', 'B'), (None, 'x'), ('code', 'I')]),
+	39: ('shuffle_extra', [('player', 'B'), ('cards', 'B', 'I')]),
+	40: ('new_turn', [('player', 'B')]),
+	41: ('new_phase', [('phase', 'H')]),
+	50: ('move', [('code', 'I'), ('location', 'I'), ('newloc', 'I'), ('reason', 'I')]),
+	53: ('pos_change', [('code', 'I'), ('controller', 'B'), ('location', 'B'), ('sequence', 'B'), ('prev_position', 'B'), ('position', 'B')]),
+	54: ('set', [('code', 'I'), ('location', 'I')]),
+	55: ('swap', [('code1', 'I'), ('location1', 'I'), ('code2', 'I'), ('location2', 'I')]),
+	56: ('field_disabled', [('locations', 'I')]),
+	60: ('summoning', [('code', 'I'), ('location', 'I')]),
+	61: ('summoned', []),
+	62: ('spsummoning', [('code', 'I'), ('location', 'I')]),
+	64: ('flipsummoning', [('code', 'I'), ('location', 'I')]),
+	70: ('chaining', [('code', 'I'), ('location', 'I'), ('target_controller', 'B'), ('target_location', 'B'), ('target_sequence', 'B'), ('desc', 'I'), ('chain_size', 'B')]),
+	73: ('chain_solved', [('chain_index', 'B')]),
+	83: ('become_target', [('targets', 'B', 'I')]),
+	90: ('draw', [('player', 'B'), ('cards', 'B', 'I')]),
+	91: ('damage', LP_CHANGE),
+	92: ('recover', LP_CHANGE),
+	93: ('equip', [('location', 'I'), ('target', 'I')]),
+	94: ('lpupdate', LP_CHANGE),
+	100: ('pay_lpcost', LP_CHANGE),
+	101: ('add_counter', [('counter_type', 'H'), ('controller', 'B'), ('location', 'B'), ('sequence', 'B'), ('count', 'H')]),
+	102: ('remove_counter', [('counter_type', 'H'), ('controller', 'B'), ('location', 'B'), ('sequence', 'B'), ('count', 'H')]),
+	110: ('attack', [('attacker', 'I'), ('target', 'I')]),
+	111: ('battle', [('attacker', 'I'), ('attack', 'I'), ('defense', 'I'), ('damage', 'B'), ('target', 'I'), ('target_attack', 'I'), ('target_defense', 'I'), ('target_damage', 'B')]),
+	113: ('damage_step_start', []),
+	114: ('damage_step_end', []),
+	130: ('toss_coin', [('player', 'B'), ('results', 'B', 'B')]),
+	131: ('toss_dice', [('player', 'B'), ('results', 'B', 'B')]),
+	140: ('announce_race', ANNOUNCE),
+	141: ('announce_attrib', ANNOUNCE),
+	142: ('announce_card', [('player', 'B'), ('type', 'I')]),
+	143: ('announce_number', [('player', 'B'), ('options', 'B', 'I')]),
+	144: ('announce_card_filter', [('player', 'B'), ('options', 'B', 'I')]),
+	161: ('tag_swap', [('player', 'B'), ('main_deck_count', 'B'), ('extra_deck_count', 'B'), ('extra_p_count', 'B'), ('hand_count', 'B'), ('top_card', 'I'), ('hand', 'hand_count', 'I'), ('extra', 'extra_deck_count', 'I')]),
+}
+
+def record_name(name):
+	return ''.join(part.capitalize() for part in name.split('_'))
+
+def build_decoder(msg, name, fields, records):
+	"""
+	Generates the source of a decoder reading one message from a MessageReader.
+
+	Consecutive plain fields get read with a single precompiled struct.
+	"""
+	ns = {'unpack_from': struct.unpack_from}
+	lines = ['def decode_%s(data):' % name, '\tview = data.view', '\tpos = data.pos + 1']
+	run = []
+	def flush():
+		if not run:
+			return
+		st = struct.Struct('<' + ''.join(fmt for n, fmt in run))
+		targets = ['f_' + n for n, fmt in run if n is not None]
+		if targets:
+			ns['s%d' % len(lines)] = st
+			lines.append('\t%s, = s%d.unpack_from(view, pos)' % (', '.join(targets), len(lines)))
+		lines.append('\tpos += %d' % st.size)
+		del run[:]
+	for field in fields:
+		if len(field) == 2:
+			run.append(field)
+			continue
+		flush()
+		n, count, item = field
+		if count in ('B', 'H', 'I'):
+			lines.append('\tn, = unpack_from(%r, view, pos)' % ('<' + count))
+			lines.append('\tpos += %d' % struct.calcsize(count))
+		else:
+			lines.append('\tn = f_%s' % count)
+		if isinstance(item, str):
+			size = struct.calcsize(item)
+			lines.append("\tf_%s = unpack_from('<%%d%s' %% n, view, pos)" % (n, item))
+		else:
+			item_name, item_fields = item
+			if item_name not in records:
+				records[item_name] = namedtuple(item_name, [f[0] for f in item_fields])
+			st = struct.Struct('<' + ''.join(f[1] for f in item_fields))
+			size = st.size
+			ns['r_' + n] = records[item_name]._make
+			ns['s_' + n] = st
+			lines.append('\tf_%s = list(map(r_%s, s_%s.iter_unpack(view[pos:pos + n * %d])))' % (n, n, n, size))
+		lines.append('\tpos += n * %d' % size)
+	flush()
+	record = namedtuple(record_name(name), [f[0] for f in fields if f[0] is not None])
+	record.msg = msg
+	records[record.__name__] = record
+	ns['record'] = record
+	lines.append('\tdata.pos = pos')
+	lines.append('\treturn record(%s)' % ', '.join('f_' + f[0] for f in fields if f[0] is not None))
+	exec('\n'.join(lines), ns)
+	return ns['decode_' + name]
+
+RECORDS = {}
+DECODERS = {msg: build_decoder(msg, name, fields, RECORDS) for msg, (name, fields) in SCHEMA.items()}
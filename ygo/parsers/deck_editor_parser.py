@@ -186,7 +186,7 @@ def goto(caller):
 		pl.notify(pl._("Invalid card."))
 		return
 	code = list(cnt.keys())[n]
-	editor.deck_edit_pos = globals.server.all_cards.index(code)
+	editor.deck_edit_pos = globals.server.card_positions[code]
 
 @DeckEditorParser.command(names=['q'])
 def quit(caller):
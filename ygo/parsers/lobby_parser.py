@@ -3,7 +3,6 @@ import codecs
 import datetime
 import gsb
 from gsb.intercept import Reader
-import json
 import locale
 import natsort
 import os.path
@@ -11,10 +10,13 @@ from twisted.internet import reactor
 from twisted.python import log
 
 from ..constants import *
-from ..duel import Duel
+from ..duel import Duel, reset_script_stats, script_report
+from ..duel_journal import read_events
+from ..duel_stats import stats
 from .. import globals
 from ..room import Room
-from ..utils import process_duel, process_duel_replay
+from ..replay import ReplayEngine
+from ..utils import process_duel
 from ..websockets import start_websocket_server
 from .duel_parser import DuelParser
 from .room_parser import RoomParser
@@ -160,42 +162,40 @@ def who(caller):
 
 @LobbyParser.command(names=['replay'], args_regexp=r'([a-zA-Z0-9_\.:\-,]+)(?:=(\d+))?', allowed=lambda caller: caller.connection.player.is_admin)
 def replay(caller):
-	with open(os.path.join('duels', caller.args[0])) as fp:
-		lines = [json.loads(line) for line in fp]
+	lines = read_events(os.path.join('duels', caller.args[0]))
 	if caller.args[1] is not None:
 		limit = int(caller.args[1])
 	else:
 		limit = len(lines)
-	for line in lines[:limit]:
-		if line['event_type'] == 'start':
-			players = line.get('players', [])
-			decks = line.get('decks', [[]]*len(players))
-			lp = line.get('lp', [8000, 8000])
-			for i, pl in enumerate(players):
-				p = globals.server.get_player(pl)
-				if p is None:
-					caller.connection.notify(caller.connection._("%s is not logged in.")%(pl))
-					return
-				if p.duel is not None:
-					caller.connection.notify(caller.connection._("%s is already dueling.")%(p.nickname))
-					return
-				if p.room is not None:
-					caller.connection.player.notify(caller.connection.player._("%s is currently in a duel room.")%(p.nickname))
-					return
-				players[i] = p
-				p.deck = {'cards': decks[i]}
-			duel = Duel(line.get('seed', 0))
-			duel.add_players(players, shuffle = False)
-			duel.set_player_info(0, lp[0])
-			duel.set_player_info(1, lp[1])
-			duel.start(line.get('options', 0))
-		elif line['event_type'] == 'process':
-			process_duel_replay(duel)
-		elif line['event_type'] == 'set_responsei':
-			duel.set_responsei(line['response'])
-		elif line['event_type'] == 'set_responseb':
-			duel.set_responseb(line['response'].encode('latin1'))
-	reactor.callLater(0, process_duel, duel)
+	line = lines[0]
+	if line['event_type'] != 'start':
+		return
+	players = line.get('players', [])
+	decks = line.get('decks', [[]]*len(players))
+	lp = line.get('lp', [8000, 8000])
+	for i, pl in enumerate(players):
+		p = globals.server.get_player(pl)
+		if p is None:
+			caller.connection.notify(caller.connection._("%s is not logged in.")%(pl))
+			return
+		if p.duel is not None:
+			caller.connection.notify(caller.connection._("%s is already dueling.")%(p.nickname))
+			return
+		if p.room is not None:
+			caller.connection.player.notify(caller.connection.player._("%s is currently in a duel room.")%(p.nickname))
+			return
+		players[i] = p
+		p.deck = {'cards': decks[i]}
+	duel = Duel(line.get('seed', 0))
+	duel.add_players(players, shuffle = False)
+	duel.set_player_info(0, lp[0])
+	duel.set_player_info(1, lp[1])
+	# the core only gets handed to the live handlers once the recording got fed into it
+	duel.start(line.get('options', 0), process=False)
+	engine = ReplayEngine(duel)
+	engine.run(lines[1:limit])
+	engine.finish()
+	process_duel(duel)
 
 @LobbyParser.command(names=['help'], args_regexp=r'(.*)')
 def help(caller):
@@ -443,6 +443,24 @@ def challenge(caller):
 	else:
 		con.notify(con._("Challenge off."))
 
+@LobbyParser.command(args_regexp=r'(on|off|reset)?', allowed=lambda caller: caller.connection.player.is_admin)
+def duelstats(caller):
+	con = caller.connection
+	if caller.args[0] == 'on':
+		stats.enabled = True
+		con.notify(con._("Collecting duel statistics."))
+	elif caller.args[0] == 'off':
+		stats.enabled = False
+		con.notify(con._("Stopped collecting duel statistics."))
+	elif caller.args[0] == 'reset':
+		stats.reset()
+		reset_script_stats()
+		con.notify(con._("Duel statistics cleared."))
+	else:
+		for line in stats.report():
+			con.notify(line)
+		con.notify(script_report())
+
 @LobbyParser.command(allowed=lambda caller: caller.connection.player.is_admin)
 def reboot(caller):
 	globals.rebooting = True
@@ -1,3 +1,4 @@
+from collections import Counter
 import gsb
 import json
 
@@ -256,10 +257,8 @@ def deck(caller):
 
 	# check against selected banlist
 	if room.get_banlist() != 'none':
-		codes = set(content['cards'])
 		errors = 0
-		for code in codes:
-			count = content['cards'].count(code)
+		for code, count in Counter(content['cards']).items():
 			if code not in globals.lflist[room.get_banlist()] or count <= globals.lflist[room.get_banlist()][code]:
 				continue
 			card = Card(code)
@@ -310,7 +309,7 @@ def start(caller):
 			p.notify(p._("%s starts the duel.")%(pl.nickname))
 
 	# launch the duel
-	duel = Duel()
+	duel = Duel(cores=globals.shards)
 	duel.add_players(room.teams[1]+room.teams[2])
 	duel.set_player_info(0, room.lp[0])
 	duel.set_player_info(1, room.lp[1])
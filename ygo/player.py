@@ -57,23 +57,15 @@ class Player:
 	def count_deck_cards(self, deck = None):
 		if deck is None:
 			deck = self.deck['cards']
-		rows = globals.server.db.execute('select id, type from datas where id in (%s)'%(','.join([str(c) for c in set(deck)])))
-		main = 0
-		extra = 0
-		for row in rows:
-			if row[1]&(TYPE_XYZ | TYPE_SYNCHRO | TYPE_FUSION | TYPE_LINK):
-				extra += deck.count(row[0])
-			else:
-				main += deck.count(row[0])
-
-		return (main, extra)
+		summary = globals.catalog.summarize(deck)
+		return (summary.main, summary.extra)
 
 	def get_invalid_cards_in_deck(self, deck=None):
 
 		if deck is None:
 			deck = self.deck['cards']
 
-		return set([c for c in deck if c not in globals.server.all_cards])
+		return set([c for c in deck if c not in globals.server.all_cards_set])
 
 	def set_parser(self, p):
 		p=p.lower()
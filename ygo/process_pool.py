@@ -0,0 +1,89 @@
+from _duel import ffi
+from logging import getLogger
+import threading
+import time
+from twisted.internet import defer, reactor, threads
+from twisted.python.threadpool import ThreadPool
+
+from .duel_stats import stats
+from .scheduler import continue_processing
+
+logger = getLogger('process_pool')
+
+# every pool thread copies messages out of a buffer of its own
+buffers = threading.local()
+
+def process_core(duel):
+	"""Runs the core of a duel once, returns its result and a copy of the messages, or None if the duel ended meanwhile."""
+	buf = getattr(buffers, 'messages', None)
+	if buf is None:
+		buf = buffers.messages = ffi.new('char[]', 4096)
+	result = duel.core.process(buf)
+	if result is None:
+		return None
+	return result[0], result[1][:]
+
+class ProcessRunner:
+	"""
+	Runs the core of duels somewhere else than on the reactor thread.
+
+	process() returns a Deferred firing with the result of one process() call
+	and a copy of its messages, which are handled on the reactor thread as usual.
+	Each duel has at most one call in flight. The runner itself calls the core
+	right away, subclasses move that call to threads or other processes.
+	"""
+
+	def __init__(self):
+		# duels with a call in flight, and when it started if stats are enabled
+		self.running = {}
+		# duels process_duel was called for again while they were running
+		self.again = set()
+
+	def process(self, duel):
+		return defer.maybeDeferred(process_core, duel)
+
+	def run(self, duel):
+		"""Processes a duel until the core waits for a response, the asynchronous process_duel."""
+		if duel in self.running:
+			self.again.add(duel)
+			return
+		self.running[duel] = time.perf_counter() if stats.enabled else None
+		d = self.process(duel)
+		d.addCallback(self.processed, duel)
+		d.addErrback(self.failed, duel)
+
+	def processed(self, result, duel):
+		start = self.running.pop(duel, None)
+		again = duel in self.again
+		self.again.discard(duel)
+		if result is None or not duel.started:
+			return
+		# for a runner the time spent waiting for a thread or worker counts as well
+		if start is not None and stats.enabled:
+			stats.record_process(duel, time.perf_counter() - start)
+		res = duel.process_result(*result)
+		if duel.started and (continue_processing(duel, res) or again):
+			self.run(duel)
+
+	def failed(self, failure, duel):
+		self.running.pop(duel, None)
+		self.again.discard(duel)
+		logger.error("Error processing duel: %s", failure.getTraceback())
+
+class ProcessPool(ProcessRunner):
+	"""
+	Runs lib.process of all duels in a bounded pool of threads, off the reactor.
+
+	cffi releases the GIL while the core runs, so a long chain or a heavy script
+	no longer stalls every other connection.
+	"""
+
+	def __init__(self, size):
+		super().__init__()
+		self.threads = ThreadPool(1, size, name='duel process')
+		reactor.callWhenRunning(self.threads.start)
+		reactor.addSystemEventTrigger('during', 'shutdown', self.threads.stop)
+
+	def process(self, duel):
+		"""Deferred firing with the result of process_core in a pool thread."""
+		return threads.deferToThreadPool(reactor, self.threads, process_core, duel)
@@ -0,0 +1,113 @@
+import zlib
+
+from .constants import *
+from .message_reader import MessageReader
+from .message_schema import DECODERS
+
+class ReplayMismatch(Exception):
+	"""The core returned other messages than it did when the duel was recorded."""
+
+	def __init__(self, step):
+		super().__init__("messages differ from the recording at step %d" % step)
+		self.step = step
+
+class ReplayEngine:
+	"""
+	Fast-forwards a duel through recorded events without rendering anything.
+
+	Recorded responses get fed straight into the core. Messages are only decoded
+	to follow the little state the server keeps itself (turn player, phase, lp);
+	no handlers or callbacks run and no cards get built. Once the target step is
+	reached, finish() drops everything derived from the field, so the live
+	handlers read it from the core afresh.
+	"""
+
+	def __init__(self, duel, verify=False):
+		self.duel = duel
+		self.verify = verify
+		self.step = 0
+		self.trackers = {
+			40: self.new_turn,
+			41: self.new_phase,
+			73: self.chain_solved,
+			91: self.damage,
+			92: self.recover,
+			94: self.lpupdate,
+			100: self.damage,
+			161: self.tag_swap,
+		}
+
+	def setup(self, start):
+		"""Creates the decks of a start event and starts the duel, for duels without players."""
+		self.duel.start_headless(start.get('decks', []), start.get('options', 0), start.get('lp', [8000, 8000]))
+
+	def run(self, events):
+		"""Replays process and response events, everything else gets skipped."""
+		for event in events:
+			t = event['event_type']
+			if t == 'process':
+				self.process(event)
+			elif t == 'set_responsei':
+				self.duel.core.set_responsei(event['response'])
+				if self.duel.journal is not None:
+					self.duel.journal.response_int(event['response'])
+			elif t == 'set_responseb':
+				response = event['response'].encode('latin1')
+				self.duel.core.set_responseb(response)
+				if self.duel.journal is not None:
+					self.duel.journal.response_bytes(response)
+			self.step += 1
+
+	def process(self, event):
+		duel = self.duel
+		result = duel.core.process()
+		if result is None:
+			raise ReplayMismatch(self.step)
+		res, data = result
+		if self.verify:
+			if 'checksum' in event and zlib.crc32(data) != event['checksum']:
+				raise ReplayMismatch(self.step)
+			if 'data' in event and data[:] != event['data'].encode('latin1'):
+				raise ReplayMismatch(self.step)
+		if duel.journal is not None:
+			duel.journal.process(res, data)
+		reader = MessageReader(data)
+		while reader.remaining > 0:
+			decode = DECODERS.get(reader.peek())
+			if decode is None:
+				break
+			m = decode(reader)
+			fn = self.trackers.get(m.msg)
+			if fn:
+				fn(m)
+		return res
+
+	def finish(self):
+		self.duel.mirror.invalidate()
+
+	def new_turn(self, m):
+		self.duel.tp = m.player
+
+	def new_phase(self, m):
+		self.duel.current_phase = m.phase
+
+	def chain_solved(self, m):
+		self.duel.revealed = {}
+
+	def damage(self, m):
+		self.duel.lp[m.player] -= m.amount
+
+	def recover(self, m):
+		self.duel.lp[m.player] += m.amount
+
+	def lpupdate(self, m):
+		self.duel.lp[m.player] = m.amount
+
+	def tag_swap(self, m):
+		duel = self.duel
+		if not duel.tag_players:
+			return
+		c = duel.players[m.player]
+		duel.players[m.player] = duel.tag_players[m.player]
+		duel.tag_players[m.player] = c
+		duel.watchers[m.player] = c
@@ -0,0 +1,69 @@
+import collections
+from logging import getLogger
+import time
+from twisted.internet import reactor
+
+logger = getLogger('scheduler')
+
+def continue_processing(d, res):
+	"""Whether the core has to run again right away after returning res."""
+	# handlers ask to go on for this result only, it mustn't linger until the next one
+	keep_processing = d.keep_processing
+	d.keep_processing = False
+	if res & 0x20000:
+		return False
+	elif res & 0x10000 and res != 0x10000:
+		return keep_processing
+	return True
+
+class DuelScheduler:
+	"""
+	Takes turns running the core of every duel with pending work, on the reactor thread.
+
+	A duel gets to process for at most max_steps calls or max_time seconds per
+	round before it goes back to the end of the queue. Every round is a reactor
+	iteration of its own, so connections get served in between no matter how
+	many duels are busy.
+	"""
+
+	def __init__(self, max_steps=32, max_time=0.005):
+		self.max_steps = max_steps
+		self.max_time = max_time
+		self.queue = collections.deque()
+		self.queued = set()
+		self.call = None
+
+	def schedule(self, duel):
+		"""Queues a duel to be processed until the core waits for a response."""
+		if duel in self.queued:
+			return
+		self.queued.add(duel)
+		self.queue.append(duel)
+		if self.call is None:
+			self.call = reactor.callLater(0, self.tick)
+
+	def tick(self):
+		self.call = None
+		# duels queued during this round have to wait for the next one
+		for i in range(len(self.queue)):
+			duel = self.queue.popleft()
+			self.queued.discard(duel)
+			try:
+				pending = self.run(duel)
+			except Exception:
+				logger.exception("Error processing duel")
+				continue
+			if pending:
+				self.schedule(duel)
+
+	def run(self, duel):
+		"""Processes a duel within its budget, returns whether it has work left."""
+		deadline = time.perf_counter() + self.max_time
+		for step in range(self.max_steps):
+			if not duel.started or not continue_processing(duel, duel.process()):
+				return False
+			if time.perf_counter() >= deadline:
+				break
+		return duel.started
+
+scheduler = DuelScheduler()
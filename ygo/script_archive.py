@@ -0,0 +1,79 @@
+import mmap
+import os
+import struct
+import threading
+
+MAGIC = b'YGOSCR01'
+# magic, number of scripts
+HEADER = struct.Struct('<8sI')
+# length of the name, offset and length of the script
+ENTRY = struct.Struct('<HII')
+
+ARCHIVE_PATH = 'scripts.bin'
+
+def pack_scripts(directory, path):
+	"""
+	Packs all lua scripts of a directory into a single archive.
+
+	The archive starts with an index of all scripts, the contents follow directly after it.
+	"""
+	names = sorted(n for n in os.listdir(directory) if n.endswith('.lua'))
+	scripts = []
+	for n in names:
+		with open(os.path.join(directory, n), 'rb') as fp:
+			scripts.append((n.encode('utf-8'), fp.read()))
+	index_size = HEADER.size + sum(ENTRY.size + len(n) for n, data in scripts)
+	with open(path + '.tmp', 'wb') as fp:
+		fp.write(HEADER.pack(MAGIC, len(scripts)))
+		offset = index_size
+		for n, data in scripts:
+			fp.write(ENTRY.pack(len(n), offset, len(data)))
+			fp.write(n)
+			offset += len(data)
+		for n, data in scripts:
+			fp.write(data)
+	os.replace(path + '.tmp', path)
+	return len(scripts)
+
+class ScriptArchive:
+	"""
+	Serves scripts out of a memory map of a packed archive.
+
+	Only scripts inside the archive exist, changed or added scripts need the archive to be packed again.
+	"""
+
+	def __init__(self, path):
+		with open(path, 'rb') as fp:
+			self.map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+		self.view = memoryview(self.map)
+		magic, count = HEADER.unpack_from(self.view)
+		if magic != MAGIC:
+			raise ValueError("%s is no script archive" % path)
+		self.scripts = {}
+		pos = HEADER.size
+		for i in range(count):
+			length, offset, size = ENTRY.unpack_from(self.view, pos)
+			pos += ENTRY.size
+			name = self.view[pos:pos + length].tobytes()
+			pos += length
+			self.scripts[name] = (offset, size)
+		self.hits = 0
+		self.misses = 0
+		self.bytes_served = 0
+		# scripts are read from the pool threads too
+		self.lock = threading.Lock()
+
+	def read(self, name):
+		"""Returns a memoryview of a script, or None if it isn't archived."""
+		# the core asks for paths like ./script/c12345.lua
+		entry = self.scripts.get(os.path.basename(name))
+		with self.lock:
+			if entry is None:
+				self.misses += 1
+				return None
+			self.hits += 1
+			self.bytes_served += entry[1]
+		return self.view[entry[0]:entry[0] + entry[1]]
+
+	def __len__(self):
+		return len(self.scripts)
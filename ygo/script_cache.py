@@ -0,0 +1,78 @@
+from collections import OrderedDict
+import os
+import threading
+
+class ScriptCache:
+	"""
+	LRU cache of lua script contents, keyed by file name.
+
+	Keeps at most max_bytes of scripts in memory. With check_mtime set,
+	cached scripts get read again when their file was modified since.
+	Reads may come from several threads at once, see process_pool.py.
+	"""
+
+	def __init__(self, max_bytes=32 * 1024 * 1024, check_mtime=False):
+		self.max_bytes = max_bytes
+		self.check_mtime = check_mtime
+		self.scripts = OrderedDict()
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self.bytes_served = 0
+		self.lock = threading.Lock()
+
+	def read(self, name):
+		"""Returns the contents of a script, or None if it doesn't exist."""
+		with self.lock:
+			return self.read_locked(name)
+
+	def read_locked(self, name):
+		entry = self.scripts.get(name)
+		if entry is not None and self.check_mtime:
+			try:
+				if os.stat(name).st_mtime != entry[1]:
+					self.remove(name)
+					entry = None
+			except OSError:
+				self.remove(name)
+				return None
+		if entry is None:
+			self.misses += 1
+			try:
+				with open(name, 'rb') as fp:
+					mtime = os.fstat(fp.fileno()).st_mtime
+					data = fp.read()
+			except OSError:
+				return None
+			self.store(name, data, mtime)
+		else:
+			self.hits += 1
+			self.scripts.move_to_end(name)
+			data = entry[0]
+		self.bytes_served += len(data)
+		return data
+
+	def store(self, name, data, mtime):
+		if len(data) > self.max_bytes:
+			return
+		self.scripts[name] = (data, mtime)
+		self.size += len(data)
+		while self.size > self.max_bytes:
+			name, entry = self.scripts.popitem(last=False)
+			self.size -= len(entry[0])
+
+	def remove(self, name):
+		entry = self.scripts.pop(name, None)
+		if entry is not None:
+			self.size -= len(entry[0])
+
+	def clear(self):
+		self.scripts.clear()
+		self.size = 0
+
+	@property
+	def hit_rate(self):
+		lookups = self.hits + self.misses
+		if lookups == 0:
+			return 0.0
+		return float(self.hits) / lookups
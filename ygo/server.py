@@ -5,6 +5,7 @@ import gsb
 from twisted.internet import reactor
 
 from .card import Card
+from .duel import load_card_data
 from . import globals
 from . import models
 from .channels.challenge import Challenge
@@ -21,7 +22,20 @@ class Server(gsb.Server):
 		self.db.row_factory = sqlite3.Row
 		self.players = {}
 		self.session_factory = models.setup()
-		self.all_cards = [int(row[0]) for row in self.db.execute("select id from datas order by id asc")]
+		self.all_cards = []
+		self.all_cards_set = frozenset()
+		self.card_positions = {}
+
+	def set_catalog(self, catalog):
+		globals.catalog = catalog
+		load_card_data(catalog)
+		# ordered list for the deck editor, plus constant time membership and position lookups
+		self.all_cards = sorted(catalog)
+		self.all_cards_set = frozenset(self.all_cards)
+		self.card_positions = {code: i for i, code in enumerate(self.all_cards)}
+		# the name indexes of the texts list the cards of the previous catalog
+		for texts in globals.card_texts.values():
+			texts.use_catalog(catalog)
 
 	def on_connect(self, caller):
 		### for backwards compatibility ###
@@ -99,12 +113,10 @@ class Server(gsb.Server):
 			n = 1
 		if n == 0:
 			n = 1
-		name = '%'+name+'%'
-		rows = pl.cdb.execute('select id from texts where name like ? limit ?', (name, n)).fetchall()
-		if not rows:
+		codes = pl.card_texts.names.search(name, n)
+		if not codes:
 			return
-		nr = rows[min(n - 1, len(rows) - 1)]
-		card = Card(nr[0])
+		card = Card(codes[min(n - 1, len(codes) - 1)])
 		return card
 
 	def check_reboot(self):
@@ -0,0 +1,340 @@
+from _duel import ffi, lib
+import collections
+import multiprocessing
+import os.path
+import random
+import sqlite3
+import struct
+import time
+
+from .constants import *
+from .duel import Duel, fill_card_data, load_card_data
+from .message_reader import MessageReader
+from .message_schema import DECODERS
+from . import globals
+
+SimulationResult = collections.namedtuple('SimulationResult', ('seed', 'winner', 'reason', 'turns', 'steps', 'responses', 'retries', 'messages', 'bytes', 'elapsed', 'error'))
+
+# messages the core waits for a response after
+PROMPTS = frozenset((10, 11, 12, 13, 14, 15, 16, 18, 19, 20, 21, 22, 23, 24, 25, 140, 141, 142, 143, 144))
+
+class SimulationError(Exception):
+	pass
+
+class RandomPolicy:
+	"""
+	Answers every prompt with a random, legal response.
+
+	Passing the same seed gives the same answers to the same prompts,
+	so a seeded duel always plays out the same way.
+	"""
+
+	def __init__(self, seed=None):
+		self.random = random.Random(seed)
+		self.codes = None
+		self.answers = {
+			10: self.battlecmd,
+			11: self.idlecmd,
+			12: self.yesno,
+			13: self.yesno,
+			14: self.option,
+			15: self.select_card,
+			16: self.select_chain,
+			18: self.select_place,
+			19: self.select_position,
+			20: self.select_tribute,
+			21: self.sort,
+			22: self.select_counter,
+			23: self.select_sum,
+			24: self.select_place,
+			25: self.sort,
+			140: self.announce,
+			141: self.announce,
+			142: self.announce_card,
+			143: self.option,
+			144: self.announce_card_filter,
+		}
+
+	def __call__(self, duel, m):
+		return self.answers[m.msg](duel, m)
+
+	def battlecmd(self, duel, m):
+		choices = [(i << 16) for i in range(len(m.activatable))]
+		choices.extend((i << 16) + 1 for i in range(len(m.attackable)))
+		if m.to_m2:
+			choices.append(2)
+		if m.to_ep:
+			choices.append(3)
+		return self.random.choice(choices)
+
+	def idlecmd(self, duel, m):
+		choices = []
+		for type, cards in enumerate((m.summonable, m.spsummon, m.repos, m.mset, m.set, m.activate)):
+			choices.extend((i << 16) + type for i in range(len(cards)))
+		if m.to_bp:
+			choices.append(6)
+		if m.to_ep:
+			choices.append(7)
+		return self.random.choice(choices)
+
+	def yesno(self, duel, m):
+		return self.random.randint(0, 1)
+
+	def option(self, duel, m):
+		return self.random.randrange(len(m.options))
+
+	def select_card(self, duel, m):
+		count = self.random.randint(m.min, min(m.max, len(m.cards)))
+		return bytes([count] + self.random.sample(range(len(m.cards)), count))
+
+	def select_chain(self, duel, m):
+		if not m.chains or (not m.forced and self.random.randint(0, 1)):
+			return -1
+		return self.random.randrange(len(m.chains))
+
+	def select_place(self, duel, m):
+		places = []
+		for i, (player, location) in enumerate(((m.player, LOCATION_MZONE), (m.player, LOCATION_SZONE), (1 - m.player, LOCATION_MZONE), (1 - m.player, LOCATION_SZONE))):
+			zones = (m.flag >> (i * 8)) & 0xff
+			places.extend(bytes([player, location, s]) for s in range(8) if not zones & (1 << s))
+		return b''.join(self.random.sample(places, min(m.count, len(places))))
+
+	def select_position(self, duel, m):
+		return self.random.choice([p for p in (POS_FACEUP_ATTACK, POS_FACEDOWN_ATTACK, POS_FACEUP_DEFENSE, POS_FACEDOWN_DEFENSE) if m.positions & p])
+
+	def select_tribute(self, duel, m):
+		indices = list(range(len(m.cards)))
+		self.random.shuffle(indices)
+		selected = []
+		value = 0
+		for i in indices:
+			if value >= m.min or len(selected) == m.max:
+				break
+			selected.append(i)
+			value += m.cards[i].release_param
+		return bytes([len(selected)] + selected)
+
+	def sort(self, duel, m):
+		if m.msg == 21:
+			return -1
+		return bytes([255])
+
+	def select_counter(self, duel, m):
+		values = [0] * len(m.cards)
+		left = m.count
+		indices = list(range(len(m.cards)))
+		self.random.shuffle(indices)
+		for i in indices:
+			take = self.random.randint(0, min(left, m.cards[i].counter))
+			values[i] = take
+			left -= take
+		# whatever is left goes wherever there still are counters
+		for i in indices:
+			take = min(left, m.cards[i].counter - values[i])
+			values[i] += take
+			left -= take
+		return struct.pack('h' * len(values), *values)
+
+	def select_sum(self, duel, m):
+		acc = m.value - sum(c.param & 0xffff for c in m.must_select)
+		indices = list(range(len(m.select_some)))
+		self.random.shuffle(indices)
+		if m.mode == 0:
+			selected = self.find_sum(m.select_some, indices, acc) or []
+		else:
+			selected = []
+			for i in indices:
+				if acc <= 0:
+					break
+				selected.append(i)
+				acc -= m.select_some[i].param & 0xffff
+		return bytes([len(m.must_select) + len(selected)] + [0] * len(m.must_select) + selected)
+
+	def find_sum(self, cards, indices, acc):
+		if acc == 0:
+			return []
+		if acc < 0 or not indices:
+			return None
+		i = indices[0]
+		for value in (cards[i].param & 0xffff, cards[i].param >> 16):
+			if value > 0:
+				rest = self.find_sum(cards, indices[1:], acc - value)
+				if rest is not None:
+					return [i] + rest
+		return self.find_sum(cards, indices[1:], acc)
+
+	def announce(self, duel, m):
+		bits = [1 << i for i in range(32) if m.available & (1 << i)]
+		result = 0
+		for bit in self.random.sample(bits, min(m.count, len(bits))):
+			result |= bit
+		return result
+
+	def catalog_codes(self):
+		if self.codes is None:
+			self.codes = sorted(globals.catalog)
+		return self.codes
+
+	def announce_card(self, duel, m):
+		codes = self.catalog_codes()
+		for i in range(1000):
+			code = self.random.choice(codes)
+			if globals.catalog[code].type & m.type:
+				return code
+		return codes[0]
+
+	def announce_card_filter(self, duel, m):
+		codes = self.catalog_codes()
+		cd = ffi.new('struct card_data *')
+		for i in range(1000):
+			code = self.random.choice(codes)
+			fill_card_data(cd[0], globals.catalog[code])
+			if lib.declarable(cd, len(m.options), list(m.options)):
+				return code
+		return codes[0]
+
+class ScriptedPolicy:
+	"""Answers prompts with a fixed list of responses, then hands over to fallback, if any."""
+
+	def __init__(self, responses, fallback=None):
+		self.responses = list(responses)
+		self.position = 0
+		self.fallback = fallback
+
+	def __call__(self, duel, m):
+		if self.position < len(self.responses):
+			response = self.responses[self.position]
+			self.position += 1
+			return response
+		if self.fallback is None:
+			raise SimulationError("ran out of scripted responses at message %d" % m.msg)
+		return self.fallback(duel, m)
+
+class Simulation:
+	"""
+	A duel between two decks without any players attached.
+
+	policy gets called with the duel and the decoded message whenever the core
+	asks for a response and returns an int or bytes. This can be a RandomPolicy,
+	a ScriptedPolicy or any other callable. Messages are not rendered and no
+	handlers run, only the outcome and some counters are kept.
+	"""
+
+	def __init__(self, decks, policy=None, seed=None, options=0, lp=8000, max_responses=10000, max_retries=10):
+		if seed is None:
+			seed = random.randint(0, 0xffffffff)
+		if policy is None:
+			policy = RandomPolicy(seed)
+		self.seed = seed
+		self.policy = policy
+		self.max_responses = max_responses
+		self.max_retries = max_retries
+		self.messages = collections.Counter()
+		self.winner = self.reason = self.error = None
+		self.turns = self.steps = self.responses = self.retries = self.bytes = 0
+		self.ended = False
+		self.prompt = None
+		self.begin = time.perf_counter()
+		rng = random.Random(seed)
+		decks = [list(deck) for deck in decks]
+		for deck in decks:
+			rng.shuffle(deck)
+		self.duel = Duel(seed)
+		self.duel.start_headless(decks, options, [lp, lp])
+
+	@property
+	def done(self):
+		return self.ended or self.winner is not None or self.error is not None
+
+	def run(self):
+		"""Runs the core until the duel is over."""
+		core = self.duel.core
+		while not self.done:
+			self.feed(*core.process())
+
+	def feed(self, res, data):
+		"""Handles what one process() call returned, no matter where the core ran."""
+		self.steps += 1
+		self.bytes += len(data)
+		try:
+			self.read_messages(data)
+		except SimulationError as e:
+			self.error = str(e)
+		if res & 0x20000:
+			self.ended = True
+
+	def read_messages(self, data):
+		reader = MessageReader(data)
+		while reader.remaining > 0:
+			decode = DECODERS.get(reader.peek())
+			if decode is None:
+				break
+			m = decode(reader)
+			self.messages[m.msg] += 1
+			if m.msg == 40:
+				self.turns += 1
+			elif m.msg == 5:
+				self.winner, self.reason = m.player, m.reason
+			elif m.msg == 1:
+				# the core wants the last prompt answered again
+				self.retries += 1
+				if self.prompt is None or self.retries > self.max_retries:
+					raise SimulationError("too many invalid responses")
+				m = self.prompt
+			if m.msg in PROMPTS:
+				self.prompt = m
+				response = self.policy(self.duel, m)
+				if isinstance(response, bytes):
+					self.duel.set_responseb(response)
+				else:
+					self.duel.set_responsei(response)
+				self.responses += 1
+				if self.responses > self.max_responses:
+					raise SimulationError("no winner after %d responses" % self.max_responses)
+
+	def finish(self):
+		"""Frees the core and returns the result."""
+		self.duel.core.end()
+		self.duel.started = False
+		return SimulationResult(self.seed, self.winner, self.reason, self.turns, self.steps, self.responses, self.retries, dict(self.messages), self.bytes, time.perf_counter() - self.begin, self.error)
+
+def simulate(decks, policy=None, seed=None, **kwargs):
+	"""Plays a duel between two decks to the end, see Simulation for the arguments."""
+	simulation = Simulation(decks, policy, seed, **kwargs)
+	try:
+		simulation.run()
+	finally:
+		result = simulation.finish()
+	return result
+
+def load_worker_catalog(database):
+	# forked workers inherit the catalog of their parent
+	if globals.catalog is None:
+		from .card_catalog import CardCatalog
+		from .catalog_file import CATALOG_PATH, CatalogFile, StaleCatalogError, load_catalog
+		if os.path.exists(CATALOG_PATH):
+			try:
+				globals.catalog = load_catalog(CatalogFile.open(CATALOG_PATH))
+			except (StaleCatalogError, ValueError) as e:
+				print("%s, reading the card database instead." % e)
+		if globals.catalog is None:
+			globals.catalog = CardCatalog.from_db(sqlite3.connect(database))
+	load_card_data(globals.catalog)
+
+def simulate_seed(args):
+	decks, seed, kwargs = args
+	try:
+		return simulate(decks, seed=seed, **kwargs)
+	except Exception as e:
+		# a crashing script shouldn't take the rest of the batch with it
+		return SimulationResult(seed, None, None, 0, 0, 0, 0, {}, 0, 0.0, repr(e))
+
+def run_batch(decks, seeds, processes=None, database='locale/en/cards.cdb', **kwargs):
+	"""
+	Simulates a duel between decks for every seed with random responses, on all cores by default.
+
+	Yields the results in the order of seeds.
+	"""
+	with multiprocessing.Pool(processes, initializer=load_worker_catalog, initargs=(database,)) as pool:
+		for result in pool.imap(simulate_seed, ((decks, seed, kwargs) for seed in seeds), chunksize=16):
+			yield result
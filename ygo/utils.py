@@ -1,7 +1,8 @@
 import collections
 import natsort
 
-from _duel import ffi, lib
+from . import globals
+from .scheduler import scheduler
 
 def parse_lflist(filename):
 	lst = {}
@@ -21,41 +22,11 @@ def parse_lflist(filename):
 	return collections.OrderedDict(natsort.natsorted(lst.items(), reverse=True))
 
 def process_duel(d):
-	while d.started:
-		res = d.process()
-		if res & 0x20000:
-			break
-		elif res & 0x10000 and res != 0x10000:
-			if d.keep_processing:
-				d.keep_processing = False
-				continue
-			break
-
-def process_duel_replay(duel):
-	res = lib.process(duel.duel)
-	l = lib.get_message(duel.duel, ffi.cast('byte *', duel.buf))
-	data = ffi.unpack(duel.buf, l)
-	cb = duel.cm.callbacks
-	duel.cm.callbacks = collections.defaultdict(list)
-	def tp(t):
-		duel.tp = t
-	duel.cm.register_callback('new_turn', tp)
-	def recover(player, amount):
-		duel.lp[player] += amount
-	def damage(player, amount):
-		duel.lp[player] -= amount
-	def tag_swap(player):
-		c = duel.players[player]
-		n = duel.tag_players[player]
-		duel.players[player] = n
-		duel.watchers[player] = c
-		duel.tag_players[player] = c
-	duel.cm.register_callback('recover', recover)
-	duel.cm.register_callback('damage', damage)
-	duel.cm.register_callback('tag_swap', tag_swap)
-	duel.process_messages(data)
-	duel.cm.callbacks = cb
-	return data
+	"""Has the core of a duel run until it waits for a response, soon but not right away."""
+	runner = d.core.runner or globals.process_pool
+	if runner is not None:
+		return runner.run(d)
+	scheduler.schedule(d)
 
 def check_sum(cards, acc):
 	if acc < 0: